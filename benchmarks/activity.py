@@ -0,0 +1,185 @@
+"""
+Measures the CPU used by GazeTracking with and without the activity gate
+while the user is away, still and moving, and how long the gate takes to
+wake up when the user comes back.
+
+    python -m benchmarks.activity
+    python -m benchmarks.activity recordings/session.mp4 --backend face_mesh
+
+The scenario is played at --fps with frame timestamps, as fast as the
+CPU allows: away (an empty background), still (one face frame with
+camera noise), moving, then away and moving again. The away phases
+last up to a second more, so the return of the user does not always
+fall on an idle search. Without a source the face is synthetic and its
+landmarks are given, the cost of the face detector is then emulated
+with --detect-ms of busy CPU per search. With a source the first frame
+is the still face, the following ones the moving face, and the chosen
+backend runs for real.
+
+cpu_%    CPU time over the duration of the phase, share of one core
+ms       CPU time per frame
+wake_ms  from the first frame with a face back to the first sample with
+         pupils, in frame time, for each return of the user
+"""
+import argparse
+import time
+import numpy as np
+from gaze_tracking import GazeTracking, ActivityGate, open_source
+from gaze_tracking.landmarks import FaceLandmarks, LandmarkBackend
+from .synthetic import synthetic_face
+
+
+class ScriptedBackend(LandmarkBackend):
+    """
+    Backend that returns the landmarks set by the scenario, after spinning
+    the CPU for the cost of a detector.
+    """
+
+    name = "scripted"
+
+    def __init__(self, detect_seconds):
+        self.detect_seconds = detect_seconds
+        self.landmarks = None
+
+    def process(self, frame, gray):
+        deadline = time.process_time() + self.detect_seconds
+        while time.process_time() < deadline:
+            pass
+        return self.landmarks
+
+
+def noisy(frame, rng, sigma=3.0, count=8):
+    """Returns count copies of the frame with camera noise"""
+    frames = []
+    for _ in range(count):
+        noise = rng.normal(0, sigma, frame.shape)
+        frames.append(np.clip(frame + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def shifted(landmarks, dx):
+    """Returns the landmarks moved dx pixels to the right"""
+    offset = np.array((dx, 0), np.int32)
+    return FaceLandmarks(landmarks.array + (dx, 0, 0), landmarks.eye(0) + offset, landmarks.eye(1) + offset)
+
+
+def synthetic_phases(fps, seconds, rng):
+    """Yields (phase, frames) where frames are (frame, landmarks) pairs"""
+    face, landmarks = synthetic_face(640, 480)
+    background = np.full_like(face, (90, 100, 110))
+    count = int(fps * seconds)
+
+    away = [(frame, None) for frame in noisy(background, rng)]
+    still = [(frame, landmarks) for frame in noisy(face, rng)]
+    moving = []
+    for dx in (np.sin(np.linspace(0, 2 * np.pi, 30, endpoint=False)) * 40).astype(int):
+        moving.append((noisy(np.roll(face, dx, axis=1), rng, count=1)[0], shifted(landmarks, dx)))
+
+    def phase(frames, count=count):
+        return (frames[i % len(frames)] for i in range(count))
+
+    yield "away", phase(away, count + int(fps * rng.uniform(0, 1)))
+    yield "still", phase(still)
+    yield "moving", phase(moving)
+    yield "away", phase(away, count + int(fps * rng.uniform(0, 1)))
+    yield "moving", phase(moving)
+
+
+def recorded_phases(source, fps, seconds, rng):
+    """Yields (phase, frames) from a recording, the landmarks are left to the backend"""
+    frames = []
+    for frame in open_source(source):
+        frames.append(frame)
+        if len(frames) > fps * seconds:
+            break
+    count = int(fps * seconds)
+    background = np.full_like(frames[0], 100)
+
+    away = noisy(background, rng)
+    still = noisy(frames[0], rng)
+
+    def phase(frames, count=count):
+        return ((frames[i % len(frames)], None) for i in range(count))
+
+    yield "away", phase(away, count + int(fps * rng.uniform(0, 1)))
+    yield "still", phase(still)
+    yield "moving", phase(frames[1:] or frames)
+    yield "away", phase(away, count + int(fps * rng.uniform(0, 1)))
+    yield "moving", phase(frames[1:] or frames)
+
+
+def run(phases, gaze, backend, fps):
+    """Plays the phases and returns ([(phase, cpu seconds, frames)], wake latencies)"""
+    results = []
+    wakes = []
+    index = 0
+    for name, frames in phases:
+        cpu = 0.0
+        count = 0
+        returned_at = None
+        for frame, landmarks in frames:
+            if isinstance(backend, ScriptedBackend):
+                backend.landmarks = landmarks
+            timestamp = index / fps
+            index += 1
+
+            start = time.process_time()
+            sample = gaze.refresh(frame, timestamp)
+            cpu += time.process_time() - start
+            count += 1
+
+            if name != "away" and results and results[-1][0] == "away":
+                if returned_at is None:
+                    returned_at = timestamp
+                if sample.pupils_located and returned_at is not False:
+                    wakes.append(timestamp - returned_at)
+                    returned_at = False
+        results.append((name, cpu, count))
+    return results, wakes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", help="video file or image directory, synthetic face by default")
+    parser.add_argument("--backend", choices=["face_mesh", "dlib"], default="face_mesh",
+                        help="landmark backend for a recorded source")
+    parser.add_argument("--fps", type=float, default=30.0, help="camera frame rate")
+    parser.add_argument("--seconds", type=float, default=10.0, help="duration of each phase")
+    parser.add_argument("--detect-ms", type=float, default=15.0,
+                        help="emulated CPU cost of a face search, synthetic face only")
+    parser.add_argument("--idle-after", type=float, default=2.0, help="seconds without a face before going idle")
+    parser.add_argument("--idle-interval", type=float, default=0.5, help="seconds between two searches while idle")
+    args = parser.parse_args()
+
+    modes = [
+        ("ungated", None),
+        ("gated", lambda: ActivityGate(args.idle_after, args.idle_interval)),
+        ("gated, timer wake", lambda: ActivityGate(args.idle_after, args.idle_interval, wake_on_motion=False)),
+    ]
+
+    print("{:<18} {:<8} {:>7} {:>8} {:>10}".format("mode", "phase", "cpu_%", "ms", "wake_ms"))
+    for mode, make_gate in modes:
+        rng = np.random.default_rng(0)
+        if args.source:
+            from gaze_tracking.landmarks import DlibBackend, FaceMeshBackend
+            backend = FaceMeshBackend(refine_landmarks=True) if args.backend == "face_mesh" else DlibBackend()
+            phases = recorded_phases(args.source, args.fps, args.seconds, rng)
+        else:
+            backend = ScriptedBackend(args.detect_ms / 1000)
+            phases = synthetic_phases(args.fps, args.seconds, rng)
+
+        gaze = GazeTracking(backend=backend, activity=make_gate() if make_gate else None)
+        results, wakes = run(phases, gaze, backend, args.fps)
+
+        for i, (phase, cpu, count) in enumerate(results):
+            wake = ""
+            if phase != "away" and i and results[i - 1][0] == "away" and wakes:
+                wake = "{:.0f}".format(1000 * wakes.pop(0))
+            print("{:<18} {:<8} {:7.1f} {:8.2f} {:>10}".format(
+                mode, phase, 100 * cpu * args.fps / max(count, 1), 1000 * cpu / max(count, 1), wake))
+        if gaze.activity is not None:
+            print("{:<18} {}".format("", gaze.activity.stats))
+
+
+if __name__ == "__main__":
+    main()
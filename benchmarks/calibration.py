@@ -0,0 +1,56 @@
+"""
+Compares Calibration.find_best_threshold with the previous implementation,
+which ran the whole Pupil.image_processing once per candidate threshold,
+and checks that both pick the same threshold.
+
+    python -m benchmarks.calibration --frames 200
+"""
+import argparse
+import time
+import numpy as np
+from gaze_tracking.calibration import Calibration
+from gaze_tracking.pupil import Pupil
+from .synthetic import synthetic_eye
+
+
+def legacy_find_best_threshold(eye_frame):
+    """find_best_threshold as it was before the single-pass search"""
+    average_iris_size = 0.48
+    trials = {}
+
+    for threshold in range(5, 100, 5):
+        iris_frame = Pupil.image_processing(eye_frame, threshold)
+        trials[threshold] = Calibration.iris_size(iris_frame)
+
+    best_threshold, iris_size = min(trials.items(), key=(lambda p: abs(p[1] - average_iris_size)))
+    return best_threshold
+
+
+def timed(function, frames):
+    start = time.perf_counter()
+    results = [function(frame) for frame in frames]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200, help="number of synthetic eye frames")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    frames = [synthetic_eye(rng) for _ in range(args.frames)]
+
+    legacy, legacy_time = timed(legacy_find_best_threshold, frames)
+    current, current_time = timed(Calibration.find_best_threshold, frames)
+
+    mismatches = sum(a != b for a, b in zip(legacy, current))
+    print("legacy       {:8.3f} ms/frame".format(1000 * legacy_time / len(frames)))
+    print("single pass  {:8.3f} ms/frame".format(1000 * current_time / len(frames)))
+    print("speedup      x{:.1f}".format(legacy_time / current_time))
+    print("mismatches   {}".format(mismatches))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,135 @@
+"""
+Measures how long after the start of a phrase its first text can be
+shown, with the former whole-phrase listening and with the streaming
+segmenter and its partial segments, on a replayed WAV file.
+
+    python -m benchmarks.dictation
+    python -m benchmarks.dictation --recognize-ms 300 --rtf 0.2
+
+Without --wav, a synthetic recording is written to a temporary file:
+phrases of voiced words with soft onsets over background noise, whose
+true start and end are known. The recognizer is emulated, a recognition
+takes --recognize-ms plus --rtf times the duration of the audio.
+
+first_ms   from the true start of a phrase to its first text, partial or final
+final_ms   from the true end of a phrase to its final text
+onset_ms   audio kept before the true start, negative when the onset is clipped
+phrases    phrases found over phrases spoken
+"""
+import argparse
+import os
+import tempfile
+import wave
+import numpy as np
+from speech_audio import VadSegmenter, WavFileSource
+
+RATE = 16000
+
+
+def synthetic_recording(path, phrases=8, seed=0):
+    """Writes a WAV file of spoken-like phrases and returns their (start, end) times"""
+    rng = np.random.default_rng(seed)
+    chunks = [rng.normal(0, 100, int(RATE * 1.0))]
+    position = len(chunks[0])
+    truth = []
+
+    for _ in range(phrases):
+        start = position
+        for _ in range(rng.integers(3, 7)):
+            duration = rng.uniform(0.25, 0.6)
+            t = np.arange(int(RATE * duration)) / RATE
+            pitch = rng.uniform(110, 220)
+            voice = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 5))
+            # Soft attack and release, the first tens of milliseconds are quiet
+            envelope = np.minimum(1.0, np.minimum(t / 0.08, (duration - t) / 0.05))
+            chunks.append(4000 * envelope * voice + rng.normal(0, 100, len(t)))
+            gap = rng.normal(0, 100, int(RATE * rng.uniform(0.08, 0.25)))
+            chunks.append(gap)
+            position += len(t) + len(gap)
+        truth.append((start / RATE, (position - len(gap)) / RATE))
+
+        pause = rng.normal(0, 100, int(RATE * rng.uniform(1.0, 2.0)))
+        chunks.append(pause)
+        position += len(pause)
+
+    samples = np.clip(np.concatenate(chunks), -32768, 32767).astype(np.int16)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(samples.tobytes())
+    return truth
+
+
+def replay(path, segmenter, recognize_seconds, rtf):
+    """Returns {phrase: (first text time, final text time, segment start, segment end)}"""
+    phrases = {}
+    for segment in segmenter.segments(WavFileSource(path)):
+        done = segment.emitted + recognize_seconds + rtf * (segment.end - segment.start)
+        first, final, start, end = phrases.get(segment.phrase, (None, None, segment.start, segment.end))
+        first = done if first is None else min(first, done)
+        if segment.final:
+            final, end = done, segment.end
+        phrases[segment.phrase] = (first, final, start, end)
+    return phrases
+
+
+def score(phrases, truth):
+    """Matches the phrases found with the true ones, returns (first_ms, final_ms, onset_ms, found)"""
+    first, final, onset = [], [], []
+    found = 0
+    for true_start, true_end in truth:
+        overlapping = [p for p in phrases.values() if p[2] < true_end and p[3] > true_start]
+        if not overlapping:
+            continue
+        found += 1
+        first.append(min(p[0] for p in overlapping) - true_start)
+        final.append(max(p[1] for p in overlapping if p[1] is not None) - true_end)
+        onset.append(true_start - min(p[2] for p in overlapping))
+    mean = lambda values: 1000 * float(np.mean(values)) if values else float("nan")
+    return mean(first), mean(final), mean(onset), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", help="16-bit WAV recording, its phrases are then the ones found by the segmenter")
+    parser.add_argument("--recognize-ms", type=float, default=150.0, help="fixed time of a recognition")
+    parser.add_argument("--rtf", type=float, default=0.1, help="recognition time per second of audio")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    path = args.wav
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix=".wav")
+        os.close(handle)
+        truth = synthetic_recording(path, seed=args.seed)
+    else:
+        truth = None
+
+    modes = [
+        # recognizer.listen() with its 0.5 s of kept audio, 0.8 s pause threshold and phrase_time_limit=5
+        ("listen, 5 s limit", VadSegmenter(pre_roll=0.5, silence=0.8, partial_interval=None, max_phrase=5.0)),
+        ("whole phrases", VadSegmenter(partial_interval=None)),
+        ("partial 0.3 s", VadSegmenter(partial_interval=0.3)),
+        ("partial 0.2 s", VadSegmenter(partial_interval=0.2)),
+    ]
+
+    try:
+        print("{:<20} {:>9} {:>9} {:>9} {:>8}".format("mode", "first_ms", "final_ms", "onset_ms", "phrases"))
+        for name, segmenter in modes:
+            phrases = replay(path, segmenter, args.recognize_ms / 1000, args.rtf)
+            if truth is None:
+                # Without ground truth, the segments found are the reference
+                reference = [(p[2], p[3]) for p in phrases.values()]
+            else:
+                reference = truth
+            first, final, onset, found = score(phrases, reference)
+            print("{:<20} {:9.0f} {:9.0f} {:9.0f} {:>8}".format(
+                name, first, final, onset, "{}/{}".format(found, len(reference))))
+    finally:
+        if args.wav is None:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
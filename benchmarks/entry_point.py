@@ -0,0 +1,113 @@
+"""
+Measures the startup of each eyecontrol.py mode in a fresh process:
+the time spent importing, the time until the mode is ready and the time
+to the first frame, or to the first audio chunk for dictation, against
+importing up front every library main.py used to import.
+
+    python -m benchmarks.entry_point
+    python -m benchmarks.entry_point recordings/frames --backend dlib --repeat 5
+
+Without a source, synthetic face frames are written to a temporary
+directory, and without --wav a synthetic recording. The cursor posts
+nothing, the recognizer is the stub and the text is only recorded, so
+the numbers are the startup of the modes and not of the devices.
+
+imports_ms  from the start of the process to the end of the imports of the mode
+ready_ms    to the start of the capture
+first_ms    to the first frame through the pipeline, or the first audio chunk
+loaded      libraries slow to import that the mode loaded
+"""
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import cv2
+from .dictation import synthetic_recording
+from .synthetic import synthetic_face
+
+# Every library main.py imported before it opened the camera
+EAGER_IMPORTS = ["cv2", "numpy", "pyautogui", "mediapipe", "dlib", "speech_recognition", "gaze_tracking"]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def eager_import_ms():
+    """Returns the time to import EAGER_IMPORTS in a new process, and the ones missing"""
+    code = ("import time, importlib\n"
+            "start = time.perf_counter()\n"
+            "missing = []\n"
+            "for name in {!r}:\n"
+            "    try:\n"
+            "        importlib.import_module(name)\n"
+            "    except ImportError:\n"
+            "        missing.append(name)\n"
+            "print(1000 * (time.perf_counter() - start), ','.join(missing))\n").format(EAGER_IMPORTS)
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    ms, _, missing = output.stdout.strip().partition(" ")
+    return float(ms), missing
+
+
+def run_mode(mode, source, wav, backend):
+    """Runs eyecontrol.py once and returns ({mark: ms}, loaded libraries)"""
+    command = [sys.executable, "eyecontrol.py", mode, source, "--timing", "--headless", "--frames", "5",
+               "--backend", backend, "--cursor", "recording", "--screen", "1920x1080",
+               "--recognizer", "stub", "--typing", "recording", "--wav", wav, "--partial-interval", "0"]
+    output = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    line = next((l for l in output.stdout.splitlines() if l.startswith("timing:")), None)
+    if line is None:
+        raise RuntimeError("{} did not start:\n{}".format(mode, output.stderr.strip().splitlines()[-1:]))
+    marks, _, loaded = line[len("timing: "):].partition("; loaded: ")
+    return {name.strip(): float(ms) for name, ms in re.findall(r"([\w ]+?) (\d+) ms", marks)}, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", help="video file or image directory, synthetic frames by default")
+    parser.add_argument("--wav", help="16-bit WAV file for dictation, a synthetic recording by default")
+    parser.add_argument("--backend", choices=["face_mesh", "dlib"], default="face_mesh", help="landmark backend")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each mode, the median is shown")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        source = args.source
+        if source is None:
+            source = directory
+            for i in range(60):
+                frame, _ = synthetic_face(640, 480, seed=i)
+                cv2.imwrite(os.path.join(directory, "{:03d}.png".format(i)), frame)
+        wav = args.wav
+        if wav is None:
+            wav = os.path.join(directory, "dictation.wav")
+            synthetic_recording(wav, phrases=1)
+
+        ms, missing = eager_import_ms()
+        print("{:<12} {:>10} {:>9} {:>9}  {}".format("mode", "imports_ms", "ready_ms", "first_ms", "loaded"))
+        print("{:<12} {:10.0f} {:>9} {:>9}  {}".format(
+            "main.py was", ms, "", "", "all" + (", missing: " + missing if missing else "")))
+
+        for mode in ("gaze", "head", "blink", "dictation", "combined"):
+            try:
+                runs = [run_mode(mode, source, wav, args.backend) for _ in range(args.repeat)]
+            except RuntimeError as e:
+                print("{:<12} {}".format(mode, e))
+                continue
+
+            def median(*names):
+                """Median over the runs of the first of the marks each run has"""
+                values = [next(marks[name] for name in names if name in marks)
+                          for marks, _ in runs if any(name in marks for name in names)]
+                return "{:.0f}".format(statistics.median(values)) if values else "-"
+            print("{:<12} {:>10} {:>9} {:>9}  {}".format(
+                mode, median("imports", "speech imports"), median("ready"), median("first frame", "first audio"),
+                runs[-1][1]))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Measures the time eye_detection.py spends locating the face on each
+frame: the former Haar scan of the whole frame followed by the dlib HOG
+detector on the same frame, the Haar box alone handed to the predictor,
+and the Haar search in a window around the last box.
+
+    python -m benchmarks.face_search recordings/session.mp4
+    python -m benchmarks.face_search recordings/1080p.mp4 --detect-width 640
+
+ms       face location time per frame, landmarks not included
+x        speedup over the first row
+found    share of the frames with a face
+scans    full frame scans and window scans of the cascade
+"""
+import argparse
+import time
+import cv2
+from gaze_tracking import CascadeFaceSearch, detect_faces, open_source
+
+
+def read_frames(source, count, width):
+    """Returns (resized grayscale, scale, full grayscale) for the first count frames"""
+    frames = []
+    for frame in open_source(source):
+        full = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        scale = width / float(full.shape[1])
+        small = cv2.resize(full, (width, int(full.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+        frames.append((small, scale, full))
+        if len(frames) >= count:
+            break
+    return frames
+
+
+def haar_and_hog(cascade, frames, padding):
+    """The former loop: a whole frame Haar scan, then the HOG detector"""
+    import dlib
+    detector = dlib.get_frontal_face_detector()
+    found = 0
+    for small, scale, full in frames:
+        faces = cascade.detectMultiScale(small, 1.15)
+        rects = detect_faces(detector, full, scale)
+        found += len(faces) > 0 and len(rects) > 0
+    return found, None
+
+
+def haar_only(cascade, frames, padding):
+    """A whole frame Haar scan, its box is the one read by the predictor"""
+    search = CascadeFaceSearch(cascade, 1.15)
+    found = 0
+    for small, scale, full in frames:
+        search.reset()
+        face = search.find(small)
+        found += face is not None
+    return found, search.stats
+
+
+def haar_window(cascade, frames, padding):
+    """The Haar search limited to a window around the last box"""
+    search = CascadeFaceSearch(cascade, 1.15, padding=padding)
+    found = 0
+    for small, scale, full in frames:
+        face = search.find(small)
+        found += face is not None
+    return found, search.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="video file or image directory")
+    parser.add_argument("--cascade", default="res/haarcascade_frontalface_default.xml")
+    parser.add_argument("--detect-width", type=int, default=450, help="width of the frame the face is searched on")
+    parser.add_argument("--padding", type=float, default=0.5, help="window margin around the last box")
+    parser.add_argument("--frames", type=int, default=300, help="frames read from the source")
+    parser.add_argument("--no-hog", action="store_true", help="skip the former Haar and HOG row, without dlib")
+    args = parser.parse_args()
+    cascade = cv2.CascadeClassifier(args.cascade)
+    frames = read_frames(args.source, args.frames, args.detect_width)
+
+    modes = [("haar + hog", haar_and_hog), ("haar box", haar_only), ("haar window", haar_window)]
+    if args.no_hog:
+        modes = modes[1:]
+
+    baseline = None
+    print("{:<12} {:>8} {:>6} {:>7} {:>12}".format("mode", "ms", "x", "found", "scans"))
+    for name, run in modes:
+        start = time.perf_counter()
+        found, stats = run(cascade, frames, args.padding)
+        ms = 1000 * (time.perf_counter() - start) / max(len(frames), 1)
+        baseline = baseline or ms
+        scans = "{}/{}".format(stats["full_scans"], stats["window_scans"]) if stats else ""
+        print("{:<12} {:8.2f} {:6.2f} {:7.0%} {:>12}".format(
+            name, ms, baseline / ms if ms else 0.0, found / max(len(frames), 1), scans))
+
+
+if __name__ == "__main__":
+    main()
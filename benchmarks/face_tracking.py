@@ -0,0 +1,65 @@
+"""
+Compares the frame rate of GazeTracking with a full-frame face detection
+on every frame against the FaceTracker mode, and against the FaceTracker
+searching a downscaled frame, on a recorded video.
+
+    python -m benchmarks.face_tracking recordings/session.mp4 --interval 10 --padding 0.5
+    python -m benchmarks.face_tracking recordings/1080p.mp4 --detect-scale 0.33
+"""
+import argparse
+import time
+from gaze_tracking import GazeTracking, FaceTracker, open_source
+
+
+def run(source, face_tracker=None, max_frames=None):
+    """Returns (frames, seconds, faces found) for a pass over the source"""
+    gaze = GazeTracking(face_tracker=face_tracker)
+    frames = 0
+    found = 0
+    elapsed = 0.0
+
+    for frame in open_source(source):
+        start = time.perf_counter()
+        gaze.refresh(frame)
+        elapsed += time.perf_counter() - start
+
+        frames += 1
+        found += gaze.eye_left is not None
+        if max_frames and frames >= max_frames:
+            break
+
+    return frames, elapsed, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="video file or image directory")
+    parser.add_argument("--interval", type=int, default=10, help="frames between two detections")
+    parser.add_argument("--padding", type=float, default=0.5, help="search margin around the last box")
+    parser.add_argument("--fallback", default=FaceTracker.FALLBACK_FULL,
+                        choices=[FaceTracker.FALLBACK_FULL, FaceTracker.FALLBACK_NEXT_FRAME])
+    parser.add_argument("--detect-scale", type=float, default=0.5,
+                        help="size of the frame searched by the pyramid mode, relative to the frame")
+    parser.add_argument("--frames", type=int, default=None, help="stop after this many frames")
+    args = parser.parse_args()
+
+    tracker = FaceTracker(args.interval, args.padding, args.fallback)
+    pyramid = FaceTracker(args.interval, args.padding, args.fallback, detect_scale=args.detect_scale)
+    results = [
+        ("full detection", run(args.source, None, args.frames)),
+        ("face tracker", run(args.source, tracker, args.frames)),
+        ("pyramid x{:.2f}".format(args.detect_scale), run(args.source, pyramid, args.frames)),
+    ]
+
+    baseline_fps = None
+    for name, (frames, elapsed, found) in results:
+        fps = frames / elapsed if elapsed else 0.0
+        baseline_fps = baseline_fps or fps
+        print("{:<16} {:6d} frames  {:7.1f} fps  x{:.2f}  face found in {:.0%}".format(
+            name, frames, fps, fps / baseline_fps if baseline_fps else 0.0, found / max(frames, 1)))
+    print("tracker stats:", tracker.stats)
+    print("pyramid stats:", pyramid.stats)
+
+
+if __name__ == "__main__":
+    main()
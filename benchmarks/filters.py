@@ -0,0 +1,148 @@
+"""
+Replays a cursor trajectory through each motion filter and reports the
+lag and the jitter of the cursor, as it is seen on screen after the
+pipeline latency, with and without prediction.
+
+    python -m benchmarks.filters --fps 30 --latency 0.06 --drop 0.1
+    python -m benchmarks.filters --samples samples.npz
+
+The synthetic trajectory alternates fixations and quick moves, with
+measurement noise and randomly dropped frames. With --samples the gaze
+points recorded by gaze_tracking.batch are replayed instead, and a
+centered (non causal) smoothing of them is taken as the true position.
+
+lag_ms     delay that best aligns the cursor with the true position while moving
+jitter_px  RMS cursor step between two frames, half a second into a fixation
+rmse_px    RMS distance of the cursor to the true position overall
+"""
+import argparse
+import numpy as np
+from gaze_tracking.filters import EmaFilter, KalmanFilter, OneEuroFilter
+
+
+def synthetic_trajectory(duration, fps, noise, drop, seed=0):
+    """Returns (timestamps, measurements, truth function, moving function)"""
+    rng = np.random.default_rng(seed)
+
+    # Fixations of 0.4 to 1.2 s joined by smooth 150 to 300 ms moves
+    knots = [(0.0, np.array((960.0, 540.0)))]
+    t = 0.0
+    while t < duration:
+        t += rng.uniform(0.4, 1.2)
+        knots.append((t, knots[-1][1]))
+        t += rng.uniform(0.15, 0.3)
+        knots.append((t, rng.uniform((100, 100), (1820, 980))))
+
+    def truth(times):
+        times = np.atleast_1d(times)
+        out = np.empty((len(times), 2))
+        for i, time in enumerate(times):
+            k = np.searchsorted([k[0] for k in knots], time) - 1
+            k = min(max(k, 0), len(knots) - 2)
+            (t0, p0), (t1, p1) = knots[k], knots[k + 1]
+            s = np.clip((time - t0) / (t1 - t0), 0, 1)
+            s = s * s * s * (10 - 15 * s + 6 * s * s)  # minimum jerk profile
+            out[i] = p0 + (p1 - p0) * s
+        return out
+
+    def moving(times):
+        return np.linalg.norm(truth(times + 0.005) - truth(times - 0.005), axis=1) > 0.5
+
+    timestamps = np.arange(0, duration, 1.0 / fps)
+    timestamps = timestamps[rng.random(len(timestamps)) >= drop]
+    measurements = truth(timestamps) + rng.normal(0, noise, (len(timestamps), 2))
+    return timestamps, measurements, truth, moving
+
+
+def recorded_trajectory(path, smoothing=0.1):
+    """Returns (timestamps, measurements, truth function, moving function) from batch samples"""
+    samples = np.load(path)
+    keep = ~np.isnan(samples["gaze_x"])
+    timestamps = samples["timestamp"][keep]
+    measurements = np.stack((samples["gaze_x"][keep], samples["gaze_y"][keep]), axis=1).astype(np.float64)
+
+    def truth(times):
+        times = np.atleast_1d(times)
+        out = np.empty((len(times), 2))
+        for i, time in enumerate(times):
+            weights = np.exp(-0.5 * ((timestamps - time) / smoothing) ** 2)
+            out[i] = weights @ measurements / weights.sum()
+        return out
+
+    def moving(times):
+        speed = np.linalg.norm(truth(times + 0.05) - truth(times - 0.05), axis=1) / 0.1
+        return speed > 200
+
+    return timestamps, measurements, truth, moving
+
+
+def replay(motion_filter, timestamps, measurements, latency, predict):
+    """Returns the cursor position shown latency seconds after each capture"""
+    motion_filter.reset()
+    cursor = np.empty_like(measurements)
+    for i, (timestamp, (x, y)) in enumerate(zip(timestamps, measurements)):
+        motion_filter.update(x, y, timestamp)
+        cursor[i] = motion_filter.predict(latency if predict else 0.0)
+    return cursor
+
+
+def score(cursor, shown_at, truth, moving):
+    """Returns (lag in ms, jitter in px, rmse in px) of a replay"""
+    error = np.linalg.norm(cursor - truth(shown_at), axis=1)
+    is_moving = moving(shown_at)
+
+    # Frames still for half a second, the filters have settled and only noise moves the cursor
+    settled = ~is_moving
+    for delay in np.arange(0.05, 0.5, 0.05):
+        settled &= ~moving(shown_at - delay)
+    settled[0] = False
+    steps = np.linalg.norm(np.diff(cursor, axis=0), axis=1)
+
+    delays = np.arange(0.0, 0.5, 0.002)
+    moving_at = shown_at[is_moving]
+    alignment = [np.mean(np.linalg.norm(cursor[is_moving] - truth(moving_at - delay), axis=1)) for delay in delays]
+
+    lag = 1000 * delays[int(np.argmin(alignment))]
+    jitter = float(np.sqrt(np.mean(steps[settled[1:]] ** 2))) if settled.any() else float("nan")
+    rmse = float(np.sqrt(np.mean(error ** 2)))
+    return lag, jitter, rmse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", help="gaze samples saved by gaze_tracking.batch, synthetic by default")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of synthetic trajectory")
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate of the synthetic trajectory")
+    parser.add_argument("--noise", type=float, default=15.0, help="measurement noise, in pixels")
+    parser.add_argument("--drop", type=float, default=0.1, help="share of dropped frames")
+    parser.add_argument("--latency", type=float, default=0.06, help="seconds from capture to cursor move")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.samples:
+        timestamps, measurements, truth, moving = recorded_trajectory(args.samples)
+    else:
+        timestamps, measurements, truth, moving = synthetic_trajectory(
+            args.duration, args.fps, args.noise, args.drop, args.seed)
+    shown_at = timestamps + args.latency
+
+    filters = [
+        ("raw", EmaFilter(alpha=1.0)),
+        ("ema alpha=0.1", EmaFilter(alpha=0.1)),
+        ("ema alpha=0.3", EmaFilter(alpha=0.3)),
+        ("one_euro", OneEuroFilter()),
+        ("kalman", KalmanFilter()),
+    ]
+
+    print("{:<18} {:>8} {:>10} {:>10} {:>10}".format("filter", "predict", "lag_ms", "jitter_px", "rmse_px"))
+    for name, motion_filter in filters:
+        for predict in (False, True):
+            if predict and isinstance(motion_filter, EmaFilter):
+                continue
+            cursor = replay(motion_filter, timestamps, measurements, args.latency, predict)
+            lag, jitter, rmse = score(cursor, shown_at, truth, moving)
+            print("{:<18} {:>8} {:10.0f} {:10.1f} {:10.1f}".format(name, "yes" if predict else "no", lag, jitter, rmse))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Reports the per-frame cost of the landmark configurations on a recording:
+the former dlib GazeTracking followed by a separate Face Mesh pass,
+and GazeTracking with a single dlib or Face Mesh backend.
+
+    python -m benchmarks.landmark_backends recordings/session.mp4 --frames 300
+"""
+import argparse
+import time
+import cv2
+from gaze_tracking import GazeTracking, DlibBackend, FaceMeshBackend, open_source
+
+
+def dlib_and_face_mesh():
+    """GazeTracking on dlib plus a second face pipeline, as main.py used to run"""
+    import mediapipe as mp
+
+    gaze = GazeTracking(backend=DlibBackend())
+    face_mesh = mp.solutions.face_mesh.FaceMesh(refine_landmarks=True)
+
+    def step(frame):
+        gaze.refresh(frame)
+        face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        return gaze.landmarks is not None
+    return step
+
+
+def single_backend(backend_class):
+    def configuration():
+        gaze = GazeTracking(backend=backend_class())
+
+        def step(frame):
+            gaze.refresh(frame)
+            return gaze.landmarks is not None
+        return step
+    return configuration
+
+
+CONFIGURATIONS = [
+    ("dlib + face mesh", dlib_and_face_mesh),
+    ("dlib", single_backend(DlibBackend)),
+    ("face mesh", single_backend(FaceMeshBackend)),
+]
+
+
+def run(source, configuration, max_frames=None):
+    """Returns (frames, seconds, faces found) for a pass over the source"""
+    step = configuration()
+    frames = 0
+    found = 0
+    elapsed = 0.0
+
+    for frame in open_source(source):
+        start = time.perf_counter()
+        found += step(frame)
+        elapsed += time.perf_counter() - start
+
+        frames += 1
+        if max_frames and frames >= max_frames:
+            break
+
+    return frames, elapsed, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="video file or image directory")
+    parser.add_argument("--frames", type=int, default=None, help="stop after this many frames")
+    args = parser.parse_args()
+
+    for name, configuration in CONFIGURATIONS:
+        frames, elapsed, found = run(args.source, configuration, args.frames)
+        print("{:<18} {:6d} frames  {:7.2f} ms/frame  face found in {:.0%}".format(
+            name, frames, 1000 * elapsed / max(frames, 1), found / max(frames, 1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Measures how long the dlib shape predictor takes to start and how much
+memory it holds: the first load from the disk, a second tracker in the
+same process that shares it through the model registry, and a second
+copy loaded on its own, as every GazeTracking used to.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --warm-up
+    python -m benchmarks.startup --predictor trained_models/shape_predictor_68_face_landmarks.dat
+    python -m benchmarks.startup --emulate-ms 400 --emulate-mb 100 --warm-up
+
+Opening the camera is emulated by sleeping --open-ms. With --warm-up,
+models.warm_up() loads the predictor on a thread meanwhile, as the
+drivers do. With --emulate-ms, the model is replaced by one that sleeps
+that long and holds --emulate-mb, stored under the same registry key,
+so the registry and the warm-up can be measured without dlib or the
+model file; no landmarks are predicted then.
+
+ms      time of the step
+rss_mb  resident memory after the step (the peak on macOS)
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+import numpy as np
+
+
+def resident_mb():
+    """Returns the resident memory of the process in MB, the peak where the current one is unknown"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--predictor", help="shape predictor model, the one of the package by default")
+    parser.add_argument("--warm-up", action="store_true", help="load the predictor on a thread at startup")
+    parser.add_argument("--open-ms", type=float, default=500.0, help="emulated time to open the camera")
+    parser.add_argument("--emulate-ms", type=float, help="emulate a model that takes this long to load")
+    parser.add_argument("--emulate-mb", type=float, default=100.0, help="memory held by the emulated model")
+    args = parser.parse_args()
+
+    rows = []
+
+    def step(name, function):
+        start = time.perf_counter()
+        result = function()
+        rows.append((name, 1000 * (time.perf_counter() - start), resident_mb()))
+        return result
+
+    step("import", lambda: __import__("gaze_tracking"))
+    from gaze_tracking import models
+    path = os.path.abspath(args.predictor) if args.predictor else models.PREDICTOR_PATH
+
+    if args.emulate_ms is not None:
+        # warm_up() checks that the model file exists, the emulated model gets an empty one
+        placeholder = tempfile.NamedTemporaryFile(suffix=".dat")
+        path = placeholder.name
+
+        def load():
+            time.sleep(args.emulate_ms / 1000)
+            return np.ones(int(args.emulate_mb * 2 ** 20), np.uint8)
+
+        # Same registry and key as models.shape_predictor(), so warm_up() shares it
+        def shape_predictor(path=None):
+            return models.registry.get(("shape_predictor", path or models.PREDICTOR_PATH), load)
+        models.shape_predictor = shape_predictor
+    else:
+        try:
+            import dlib
+        except ImportError:
+            parser.error("dlib is not installed, use --emulate-ms to emulate the model")
+        if not os.path.exists(path):
+            parser.error("no shape predictor at {}, use --emulate-ms to emulate the model".format(path))
+
+        def load():
+            return dlib.shape_predictor(path)
+
+    if args.warm_up:
+        step("warm-up started", lambda: models.warm_up(path, background=True))
+    step("camera opens", lambda: time.sleep(args.open_ms / 1000))
+
+    predictor = step("predictor, first", lambda: models.shape_predictor(path))
+    if args.emulate_ms is None:
+        import cv2
+        from .synthetic import synthetic_face
+        frame, _ = synthetic_face(640, 480)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # The box of the drawn face, the HOG detector may not find it
+        face = dlib.rectangle(260, 160, 380, 320)
+        step("first landmarks", lambda: predictor(gray, face))
+
+    step("predictor, shared", lambda: models.shape_predictor(path))
+    copy = step("own copy, unshared", load)
+
+    print("{:<22} {:>9} {:>8}".format("step", "ms", "rss_mb"))
+    for name, ms, rss in rows:
+        print("{:<22} {:9.1f} {:8.1f}".format(name, ms, rss))
+    print("load times:", {key[0]: round(1000 * seconds, 1) for key, seconds in models.registry.load_times.items()})
+    del copy
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Micro and macro benchmarks of the gaze_tracking hot paths, on synthetic
+frames at 480p, 720p and 1080p, and optionally on recorded frames.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --compare baseline.json --tolerance 0.15
+    python -m benchmarks.suite --recorded recordings/frames --backend face_mesh --filter refresh
+
+Results are written as JSON. With --compare, every benchmark whose median
+time grew by more than the tolerance is reported as a regression and the
+exit status is 1.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+import cv2
+from gaze_tracking.calibration import Calibration
+from gaze_tracking.eye import Eye, EyeBuffers
+from gaze_tracking.gaze_tracking import GazeTracking
+from gaze_tracking.landmarks import FaceLandmarks, FaceMeshBackend
+from gaze_tracking.overlay import OverlayRenderer
+from gaze_tracking.pupil import Pupil
+from .synthetic import RESOLUTIONS, SyntheticBackend, synthetic_eye, synthetic_face
+
+
+def measure(function, min_time=0.2, min_runs=5, max_runs=10000):
+    """Calls function until min_time seconds and min_runs calls are reached,
+    and returns statistics of the duration of one call, in microseconds"""
+    function()  # warm up caches and lazy allocations
+
+    durations = []
+    deadline = time.perf_counter() + min_time
+    while len(durations) < max_runs and (len(durations) < min_runs or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    durations.sort()
+    return {
+        "runs": len(durations),
+        "median_us": 1e6 * statistics.median(durations),
+        "mean_us": 1e6 * statistics.fmean(durations),
+        "p90_us": 1e6 * durations[int(0.9 * (len(durations) - 1))],
+        "min_us": 1e6 * durations[0],
+    }
+
+
+def micro_benchmarks():
+    """Yields (name, function) for the per-eye hot paths"""
+    rng = np.random.default_rng(0)
+    eye_frame = synthetic_eye(rng)
+    threshold = Calibration.find_best_threshold(eye_frame)
+
+    yield "pupil.image_processing", lambda: Pupil.image_processing(eye_frame, threshold)
+    yield "pupil.detect_iris", lambda: Pupil(eye_frame, threshold)
+    yield "calibration.find_best_threshold", lambda: Calibration.find_best_threshold(eye_frame)
+
+    for resolution, (width, height) in RESOLUTIONS.items():
+        frame, landmarks = synthetic_face(width, height)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        region = landmarks.eye(0)
+        eye = Eye.__new__(Eye)
+        buffers = EyeBuffers()
+
+        yield "eye._isolate[{}]".format(resolution), lambda: eye._isolate(gray, region, buffers)
+
+    yield "eye._blinking_ratio", lambda: eye._blinking_ratio(region)
+
+    mesh = FaceLandmarks(rng.uniform(0, 640, (478, 3)).astype(np.float32), region, region)
+    yield "landmarks.centroid[mesh]", lambda: mesh.centroid(FaceMeshBackend.MESH_POINTS)
+
+    canvas = np.zeros((480, 640, 3), np.uint8)
+    mesh_pixels = mesh.pixels()
+    yield "overlay.draw_markers[mesh]", lambda: OverlayRenderer.draw_markers(canvas, mesh_pixels)
+
+
+def available_backend(name):
+    """Returns a new landmark backend of that name with its models loaded,
+    or None if its library or model is not installed"""
+    try:
+        if name == "face_mesh":
+            return FaceMeshBackend()
+        from gaze_tracking import models
+        from gaze_tracking.landmarks import DlibBackend
+        # The models load on the first frame, load them here to know they are there
+        models.face_detector()
+        models.warm_up()
+        return DlibBackend()
+    except (ImportError, RuntimeError, OSError):
+        return None
+
+
+def refresh_benchmarks(recorded=None, backend="dlib"):
+    """Yields (name, function) for GazeTracking.refresh on whole frames"""
+    dlib_backend = available_backend("dlib")
+    # Skip the dlib rows when dlib or the shape predictor model is not installed
+    dlib_gaze = GazeTracking(backend=dlib_backend) if dlib_backend is not None else None
+
+    for resolution, (width, height) in RESOLUTIONS.items():
+        frame, landmarks = synthetic_face(width, height)
+        gaze = GazeTracking(backend=SyntheticBackend(landmarks))
+        # Time the calibrated steady state, not the calibration frames
+        while not gaze.calibration.is_complete():
+            gaze.refresh(frame)
+        yield "refresh[synthetic-landmarks,{}]".format(resolution), lambda: gaze.refresh(frame)
+
+        if dlib_gaze is not None:
+            yield "refresh[dlib,{}]".format(resolution), lambda: dlib_gaze.refresh(frame)
+
+    if recorded:
+        recorded_backend = available_backend(backend)
+        if recorded_backend is None:
+            print("refresh[recorded,{}] skipped, the {} backend is not installed".format(backend, backend),
+                  file=sys.stderr)
+            return
+
+        from gaze_tracking.frame_source import ImageSequenceSource
+        frames = list(ImageSequenceSource(recorded))
+        gaze = GazeTracking(backend=recorded_backend)
+        frames_iter = iter(())
+
+        def next_frame():
+            nonlocal frames_iter
+            frame = next(frames_iter, None)
+            if frame is None:
+                frames_iter = iter(frames)
+                frame = next(frames_iter)
+            gaze.refresh(frame)
+        yield "refresh[recorded,{}]".format(backend), next_frame
+
+
+def run(name_filter=None, min_time=0.2, recorded=None, backend="dlib"):
+    results = {}
+    for benchmarks in (micro_benchmarks(), refresh_benchmarks(recorded, backend)):
+        for name, function in benchmarks:
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = measure(function, min_time)
+            print("{:<42} {:12.1f} us  ({} runs)".format(name, results[name]["median_us"], results[name]["runs"]),
+                  file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Returns (lines, regressions) comparing the median times of two runs"""
+    lines = []
+    regressions = []
+    for name, result in sorted(current["results"].items()):
+        reference = baseline["results"].get(name)
+        if reference is None:
+            lines.append("{:<42} {:>12} new".format(name, ""))
+            continue
+
+        ratio = result["median_us"] / reference["median_us"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            flag = "faster"
+        lines.append("{:<42} {:12.1f} us  x{:.2f}  {}".format(name, result["median_us"], ratio, flag))
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write the results to this JSON file, stdout by default")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="relative slowdown flagged as a regression")
+    parser.add_argument("--filter", help="only run the benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent on each benchmark")
+    parser.add_argument("--recorded", help="directory of recorded frames for an end-to-end run")
+    parser.add_argument("--backend", choices=["dlib", "face_mesh"], default="dlib",
+                        help="landmark backend of the recorded run")
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.min_time, args.recorded, args.backend)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    elif not args.compare:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        lines, regressions = compare(results, baseline, args.tolerance)
+        print("\n".join(lines))
+        if regressions:
+            print("{} regression(s) over {:.0%}: {}".format(len(regressions), args.tolerance, ", ".join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
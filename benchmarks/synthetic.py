@@ -0,0 +1,88 @@
+"""
+Synthetic frames for the benchmarks, so they run without a camera.
+Everything is drawn from a seeded generator and is the same on every run.
+"""
+import numpy as np
+import cv2
+from gaze_tracking.landmarks import FaceLandmarks, LandmarkBackend
+
+RESOLUTIONS = {
+    "480p": (640, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+
+
+def synthetic_eye(rng, width=44, height=24):
+    """Returns a grayscale eye frame: a bright sclera, a dark iris and noise,
+    with the white border left by Eye._isolate"""
+    frame = np.full((height, width), 255, np.uint8)
+    sclera = rng.integers(150, 230)
+    cv2.ellipse(frame, (width // 2, height // 2), (width // 2 - 5, height // 2 - 4), 0, 0, 360, int(sclera), -1)
+    iris_x = width // 2 + int(rng.integers(-8, 9))
+    cv2.circle(frame, (iris_x, height // 2), int(rng.integers(5, 9)), int(rng.integers(10, 80)), -1)
+    noise = rng.normal(0, 12, frame.shape)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+def _eye_contour(center_x, center_y, half_width, half_height):
+    """Six eye points in the order of the 68 Multi-PIE landmarks"""
+    return np.array([
+        (center_x - half_width, center_y),
+        (center_x - half_width // 3, center_y - half_height),
+        (center_x + half_width // 3, center_y - half_height),
+        (center_x + half_width, center_y),
+        (center_x + half_width // 3, center_y + half_height),
+        (center_x - half_width // 3, center_y + half_height),
+    ], np.int32)
+
+
+def synthetic_face(width, height, seed=0):
+    """Returns a BGR frame with a drawn face and its FaceLandmarks.
+    The face takes about a third of the frame height, like a user
+    sitting in front of a laptop camera.
+
+    Arguments:
+        width (int): Frame width
+        height (int): Frame height
+        seed (int): Seed of the noise
+    """
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), (90, 100, 110), np.uint8)
+
+    face_h = height // 3
+    face_w = int(face_h * 0.75)
+    cx, cy = width // 2, height // 2
+    cv2.ellipse(frame, (cx, cy), (face_w // 2, face_h // 2), 0, 0, 360, (140, 170, 210), -1)
+
+    eye_dx = face_w // 5
+    eye_y = cy - face_h // 10
+    half_w = max(6, face_w // 10)
+    half_h = max(3, half_w // 2)
+    eyes = []
+    for eye_x in (cx - eye_dx, cx + eye_dx):
+        contour = _eye_contour(eye_x, eye_y, half_w, half_h)
+        cv2.fillPoly(frame, [contour], (235, 235, 235))
+        cv2.circle(frame, (eye_x, eye_y), max(2, half_h - 1), (40, 30, 30), -1)
+        eyes.append(contour)
+
+    noise = rng.normal(0, 6, frame.shape)
+    frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+    points = np.concatenate(eyes).astype(np.float32)
+    return frame, FaceLandmarks(points, eyes[0], eyes[1])
+
+
+class SyntheticBackend(LandmarkBackend):
+    """
+    Landmark backend that always returns the same landmarks, to time
+    GazeTracking.refresh without the cost of a face detector.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, landmarks):
+        self.landmarks = landmarks
+
+    def process(self, frame, gray):
+        return self.landmarks
@@ -0,0 +1,97 @@
+"""
+Compares the ways of typing dictated text: how many characters per
+second reach the application and how long a phrase waits to be typed,
+when phrases keep coming while the previous ones are typed.
+
+    python -m benchmarks.text_output --phrases 20 --every 0.5
+
+Each strategy is emulated with a RecordingBackend that takes the time
+the real one takes, nothing is typed. The costs are rough macOS figures,
+override them to match a machine:
+
+keys     pyautogui waits DARWIN_CATCH_UP_TIME (10 ms) after each key down
+         and key up, so about 20 ms per character
+unicode  one event pair per 20 characters, well under a millisecond
+paste    pbpaste, pbcopy, Cmd+V, then the restore delay of the clipboard
+
+"blocking" is the former behavior, each phrase typed by the thread that
+recognized it before the next one is handled.
+"""
+import argparse
+import statistics
+import time
+from text_output import RecordingBackend, TextOutput
+
+PHRASE = "the quick brown fox jumps over the lazy dog"
+
+
+def run_blocking(backend, phrases, every):
+    """Types each phrase on the calling thread, returns the typing latencies"""
+    latencies = []
+    start = time.monotonic()
+    for i in range(phrases):
+        due = start + i * every
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        backend.type("{} {} ".format(i, PHRASE))
+        latencies.append(time.monotonic() - due)
+    return start, latencies
+
+
+def run_output(backend, phrases, every):
+    """Writes the phrases to a TextOutput, returns the typing latencies"""
+    output = TextOutput(backend)
+    written = []
+    start = time.monotonic()
+    for i in range(phrases):
+        due = start + i * every
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        written.append(due)
+        output.write("{} {}".format(i, PHRASE))
+    output.stop(timeout=None)
+
+    # A phrase is typed by the first call that contains it
+    latencies = []
+    typed = ""
+    calls = iter(backend.calls)
+    for i, due in enumerate(written):
+        marker = "{} {} ".format(i, PHRASE)
+        while marker not in typed:
+            when, text = next(calls)
+            typed += text
+        latencies.append(when - due)
+    return start, latencies, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phrases", type=int, default=20, help="phrases dictated")
+    parser.add_argument("--every", type=float, default=0.5, help="seconds between two phrases")
+    parser.add_argument("--keys-ms-per-char", type=float, default=20.0)
+    parser.add_argument("--unicode-ms-per-call", type=float, default=0.5)
+    parser.add_argument("--paste-ms-per-call", type=float, default=230.0)
+    args = parser.parse_args()
+
+    keys = dict(seconds_per_char=args.keys_ms_per_char / 1000)
+    unicode = dict(seconds_per_call=args.unicode_ms_per_call / 1000)
+    paste = dict(seconds_per_call=args.paste_ms_per_call / 1000)
+    expected = "".join("{} {} ".format(i, PHRASE) for i in range(args.phrases))
+
+    print("{:<16} {:>8} {:>10} {:>10} {:>6} {:>8}".format("strategy", "chars/s", "p50_ms", "max_ms", "calls", "ordered"))
+    rows = [("blocking keys", keys, True), ("keys", keys, False), ("unicode", unicode, False), ("paste", paste, False)]
+    for name, cost, blocking in rows:
+        backend = RecordingBackend(**cost)
+        if blocking:
+            start, latencies = run_blocking(backend, args.phrases, args.every)
+        else:
+            start, latencies, _ = run_output(backend, args.phrases, args.every)
+        print("{:<16} {:8.0f} {:10.0f} {:10.0f} {:>6} {:>8}".format(
+            name, backend.chars_per_second(start), 1000 * statistics.median(latencies), 1000 * max(latencies),
+            len(backend.calls), "yes" if backend.text == expected else "NO"))
+
+
+if __name__ == "__main__":
+    main()
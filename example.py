@@ -1,36 +1,51 @@
+import argparse
 import cv2
-from gaze_tracking import GazeTracking
+from gaze_tracking import GazeTracking, ActivityGate, OverlayRenderer, ControlChannel, open_preview, open_source, run_with_preview
 
-gaze = GazeTracking()
-webcam = cv2.VideoCapture(0)
+parser = argparse.ArgumentParser()
+parser.add_argument("source", nargs="?", default="0", help="camera index, video file or image directory")
+parser.add_argument("--headless", action="store_true", help="no window and no drawing, stop with Ctrl+C or q")
+parser.add_argument("--preview-fps", type=float, default=15, help="largest number of preview frames shown per second")
+parser.add_argument("--idle-after", type=float, default=2.0,
+                    help="seconds without a face before only checking for one twice a second, 0 to process every frame")
+args = parser.parse_args()
 
-while True:
-    # We get a new frame from the webcam
-    _, frame = webcam.read()
+# Frames are skipped while nobody is in front of the camera and still eyes keep their pupils
+activity = ActivityGate(idle_after=args.idle_after) if args.idle_after > 0 else None
+gaze = GazeTracking(activity=activity)
+webcam = open_source(args.source)
+preview = open_preview("Demo", args.headless, args.preview_fps)
+control = ControlChannel()
 
-    # We send this frame to GazeTracking to analyze it
-    gaze.refresh(frame)
 
-    frame = gaze.annotated_frame()
-    text = ""
+def track():
+    """Analyzes every frame and draws the frames the preview will show"""
+    while not control.stopped:
+        # We get a new frame from the webcam
+        ok, frame = webcam.read()
+        if not ok:
+            break
 
-    if gaze.is_blinking():
-        text = "Blinking"
-    elif gaze.is_right():
-        text = "Looking right"
-    elif gaze.is_left():
-        text = "Looking left"
-    elif gaze.is_center():
-        text = "Looking center"
+        # We send this frame to GazeTracking to analyze it
+        gaze.refresh(frame, webcam.timestamp)
 
-    cv2.putText(frame, text, (90, 60), cv2.FONT_HERSHEY_DUPLEX, 1.6, (147, 58, 31), 2)
+        if not preview.due():
+            continue
 
-    left_pupil = gaze.pupil_left_coords()
-    right_pupil = gaze.pupil_right_coords()
-    cv2.putText(frame, "Left pupil:  " + str(left_pupil), (90, 130), cv2.FONT_HERSHEY_DUPLEX, 0.9, (147, 58, 31), 1)
-    cv2.putText(frame, "Right pupil: " + str(right_pupil), (90, 165), cv2.FONT_HERSHEY_DUPLEX, 0.9, (147, 58, 31), 1)
+        # The frame is not used after this point, annotate it in place instead of copying it
+        frame = gaze.annotated_frame(frame)
+        text = OverlayRenderer.status_text(gaze.sample)
 
-    cv2.imshow("Demo", frame)
+        cv2.putText(frame, text, (90, 60), cv2.FONT_HERSHEY_DUPLEX, 1.6, (147, 58, 31), 2)
 
-    if cv2.waitKey(1) == 27:
-        break
+        left_pupil = gaze.pupil_left_coords()
+        right_pupil = gaze.pupil_right_coords()
+        cv2.putText(frame, "Left pupil:  " + str(left_pupil), (90, 130), cv2.FONT_HERSHEY_DUPLEX, 0.9, (147, 58, 31), 1)
+        cv2.putText(frame, "Right pupil: " + str(right_pupil), (90, 165), cv2.FONT_HERSHEY_DUPLEX, 0.9, (147, 58, 31), 1)
+
+        preview.submit(frame)
+
+
+# Tracking runs on its own thread, the window stays on the main thread
+run_with_preview(track, preview, control)
+webcam.release()
@@ -1,15 +1,16 @@
 from scipy.spatial import distance as dist
-from imutils.video import VideoStream
 from imutils import face_utils
 import numpy as np
 import argparse
 import imutils
-import dlib
 import cv2
 import sched
 import time
 import sys
 import Quartz
+from gaze_tracking import Actuator, QuartzBackend, BlinkGestures, ControlChannel, open_preview, open_source, run_with_preview
+from gaze_tracking import CascadeFaceSearch, Metrics, PrometheusFileWriter, warm_up
+from gaze_tracking.models import shape_predictor
 import math
 from datetime import datetime, date
 
@@ -108,6 +109,16 @@ def eye_aspect_ratio(eye):
 ap = argparse.ArgumentParser()
 ap.add_argument("-p", "--shape-predictor", required=True,
                 help="path to facial landmark predictor")
+ap.add_argument("-s", "--source", default="0",
+                help="camera index, video file or image directory to read frames from")
+ap.add_argument("--detect-width", type=int, default=450,
+                help="width of the frame the face is searched on, the eyes are read at full resolution")
+ap.add_argument("--headless", action="store_true",
+                help="no window and no drawing, stop with Ctrl+C or q")
+ap.add_argument("--preview-fps", type=float, default=15,
+                help="largest number of preview frames shown per second")
+ap.add_argument("--metrics", metavar="PATH",
+                help="write the face search and landmark times to this Prometheus text file")
 args = vars(ap.parse_args())
 
 # defining two constants, one for the eye aspect ratio to indicate
@@ -132,11 +143,12 @@ def print_some_times():
     print (time.time())
 
 
-# initialize dlib's face detector (HOG-based) and then create
-# the facial landmark predictor
+# load the facial landmark predictor while the camera opens, it comes
+# from the shared model registry so it is only read once per process.
+# The face it reads is the one found by the Haar cascade, there is no
+# second face detector
 print("Loading facial landmark predictor...")
-detector = dlib.get_frontal_face_detector()
-predictor = dlib.shape_predictor(args["shape_predictor"])
+warm_up(args["shape_predictor"], background=True)
 
 # grab the indexes of the facial landmarks for the left and
 # right eye, respectively
@@ -146,142 +158,165 @@ predictor = dlib.shape_predictor(args["shape_predictor"])
 
 print("Starting live video stream...")
 
-vs = VideoStream(src=0).start()
+vs = open_source(args["source"])
 
-fileStream = False
-time.sleep(1.0)
 currentCount = 0
 
 mouse = Mouse()
+# clicks are posted from the actuator thread, the blink gestures only
+# compare timestamps so the frame loop never sleeps on a blink
+actuator = Actuator(QuartzBackend(mouse))
+blink_gestures = BlinkGestures(bindings={BlinkGestures.LEFT: (BlinkGestures.CLICK, Actuator.LEFT),
+                                         BlinkGestures.RIGHT: (BlinkGestures.CLICK, Actuator.RIGHT),
+                                         BlinkGestures.BOTH: (BlinkGestures.DOUBLE_CLICK, Actuator.LEFT)},
+                               refractory=1.0, long_press=None, actuator=actuator)
 face_cascade = cv2.CascadeClassifier('res/haarcascade_frontalface_default.xml')
-
-while True:
-
-    # if this is a file video stream, then we need to check if
-    # there any more frames left in the buffer to process
-    if fileStream and not vs.more():
-        break
-
-    # grab the frame from the threaded video file stream, resize
-    # it, and convert it to grayscale
-    # channels)
-    frame = vs.read()
-    frame = imutils.resize(frame, width=450)
-
-    height, width, c = frame.shape
-
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    cv2.circle(frame, ((int)(width/2),(int)(height/2)), 4, (0,0,255), 2)
-    cv2.circle(frame, ((int)(width/2),(int)(height/2)), 20, (128,0,128), 2)
-    face = face_cascade.detectMultiScale(gray, 1.15)
-
-    min_dis = 100000
-    x=0
-    y=0
-    w=0
-    h=0
-    for (mx, my, mw, mh) in face:
-        d = dist.euclidean((mx+w/2, my+h/2), (width/2, height/2))
-        if(d < min_dis):
-             min_dis = d
-             x = mx
-             y = my
-             w = mw
-             h = mh
-
-
-    if(x!=0 and y!=0 and w!=0 and h!=0):         
-        cv2.rectangle(frame,(x,y),(x+w,y+h),(255,0,0),2)
-        #to avoid mirror image 
-        x = width - (x + w)
-        slope = math.atan((float)((y+h/2 - height/2)/(x+w/2 - width/2)))
-
-        r = (int)(width/2 + 100 * math.cos(slope))
-        t = (int)(height/2 + 100 * math.sin(slope))
-
-        cv2.line(frame, ((int)(width/2), (int)(height/2)), ((int)(x+w/2), (int)(y+h/2)), (255,0,0), 2)
-        cv2.circle(frame, ((int)(x+w/2), (int)(y+h/2)), 3, (255,0,0), 2)
-        d = dist.euclidean((x+w/2, y+h/2), (width/2, height/2))
-        c, e = mouse.position()
-
-        if(d>20):
-            speed = 5 
-            if(x+w/2 > width/2):
-                mouse.move(c + speed * math.cos(slope), e + speed * math.sin(slope))
-            else :
-                mouse.move(c - speed * math.cos(slope), e - speed * math.sin(slope))
-
- 
-    # detect faces in the grayscale frame
-    rects = detector(gray, 0)
-    prevcount = 0
-    # loop over the face detections
-    for rect in rects:
-        # determine the facial landmarks for the face region, then
-        # convert the facial landmark (x, y)-coordinates to a NumPy
-        # array
-        shape = predictor(gray, rect)
-        shape = face_utils.shape_to_np(shape)
-
-        # extract the left and right eye coordinates, then use the
-        # coordinates to compute the eye aspect ratio for both eyes
-        leftEye = shape[lStart:lEnd]
-        rightEye = shape[rStart:rEnd]
-        leftEAR = eye_aspect_ratio(leftEye)
-        rightEAR = eye_aspect_ratio(rightEye)
-
-        # average the eye aspect ratio together for both eyes\ 
-        ear = (leftEAR + rightEAR) / 2.0
-
-        leftEyeHull = cv2.convexHull(leftEye)
-        rightEyeHull = cv2.convexHull(rightEye)
-        cv2.drawContours(frame, [leftEyeHull], -1, (0, 255, 0), 1)
-        cv2.drawContours(frame, [rightEyeHull],  -1, (0, 255, 0), 1)
-
-        # check to see if the eye aspect ratio is below the blink
-        
-        if leftEAR < EYE_AR_THRESH - 0.12 and rightEAR > EYE_AR_THRESH - 0.12:
-            print ("Left Eye Blinked")
-            m,n = mouse.position()
-            mouse.click_pos(m, n, 0)
-            time.sleep(1)
-
-        elif rightEAR < EYE_AR_THRESH - 0.12 and leftEAR > EYE_AR_THRESH - 0.12:
-            print ("Right Eye Blinked")  
-            m,n = mouse.position()
-            mouse.click_pos(m, n, 1)
-            time.sleep(1) 
-
-        if (leftEAR < EYE_AR_THRESH - 0.12 and rightEAR < EYE_AR_THRESH - 0.12):
-            print("Both Eyes Blinked")
-            m,n = mouse.position()
-            mouse.doubleClick(m, n, 2, 0)
-            COUNTER += 1
-            TOTAL += 1    
-            prevcount = COUNTER
-            time.sleep(1)
-
-        # the computed eye aspect ratio for the frame
-
-        cv2.putText(frame, "Blinks: {}".format(TOTAL), (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        cv2.putText(frame, "Left: {:.2f}".format(leftEAR), (10, 50),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        cv2.putText(frame, "Right: {:.2f}".format(rightEAR), (10, 70),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-        cv2.putText(frame, "EAR: {:.2f}".format(ear), (300, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-
-        break
-
-
-    cv2.imshow("Frame", frame)
-    key = cv2.waitKey(1) & 0xFF
-
-    # if the `q` key was pressed, break from the loop
-    if key == ord("q"):
-        break
-
-cv2.destroyAllWindows()
-vs.stop()
+# after the first face, the cascade only searches a window around the
+# last box for a face of about its size, the whole frame is scanned
+# again when the face is lost
+face_search = CascadeFaceSearch(face_cascade, 1.15)
+
+# time spent finding the face and reading its landmarks, printed at the
+# end and written to the metrics file when one is asked for
+metrics = Metrics()
+metrics_writer = PrometheusFileWriter(metrics, args["metrics"]).start() if args["metrics"] else None
+
+# the preview window is shown at a capped rate from the main thread,
+# or not at all in headless mode
+preview = open_preview("Frame", args["headless"], args["preview_fps"])
+control = ControlChannel()
+
+def track():
+    """Moves the mouse with the face and clicks with blinks, at the camera rate"""
+    global COUNTER, TOTAL
+    # waits for the warm-up, a model that could not be loaded stops the run here
+    predictor = shape_predictor(args["shape_predictor"])
+    while not control.stopped:
+
+        # grab the newest frame from the threaded frame source, the face
+        # is searched on a resized copy and the eyes are read on the full
+        # resolution grayscale frame, which keeps the eye detail
+        ok, full = vs.read()
+        if not ok:
+            break
+        fullGray = cv2.cvtColor(full, cv2.COLOR_BGR2GRAY)
+        frame = imutils.resize(full, width=args["detect_width"])
+        scale = frame.shape[1] / float(full.shape[1])
+
+        height, width, c = frame.shape
+
+        # only the frames the preview will show are drawn on
+        draw = preview.due()
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if draw:
+            cv2.circle(frame, ((int)(width/2),(int)(height/2)), 4, (0,0,255), 2)
+            cv2.circle(frame, ((int)(width/2),(int)(height/2)), 20, (128,0,128), 2)
+        with metrics.time("face_search"):
+            face = face_search.find(gray)
+
+        x=0
+        y=0
+        w=0
+        h=0
+        if face is not None:
+            (x, y, w, h) = face
+
+
+        if(x!=0 and y!=0 and w!=0 and h!=0):         
+            if draw:
+                cv2.rectangle(frame,(x,y),(x+w,y+h),(255,0,0),2)
+            #to avoid mirror image 
+            x = width - (x + w)
+            slope = math.atan((float)((y+h/2 - height/2)/(x+w/2 - width/2)))
+
+            r = (int)(width/2 + 100 * math.cos(slope))
+            t = (int)(height/2 + 100 * math.sin(slope))
+
+            if draw:
+                cv2.line(frame, ((int)(width/2), (int)(height/2)), ((int)(x+w/2), (int)(y+h/2)), (255,0,0), 2)
+                cv2.circle(frame, ((int)(x+w/2), (int)(y+h/2)), 3, (255,0,0), 2)
+            d = dist.euclidean((x+w/2, y+h/2), (width/2, height/2))
+            c, e = mouse.position()
+
+            if(d>20):
+                speed = 5 
+                if(x+w/2 > width/2):
+                    mouse.move(c + speed * math.cos(slope), e + speed * math.sin(slope))
+                else :
+                    mouse.move(c - speed * math.cos(slope), e - speed * math.sin(slope))
+
+
+        # the landmarks are read inside the box of the cascade, mapped
+        # back to full resolution pixels
+        rects = [CascadeFaceSearch.rectangle(face, scale)] if face is not None else []
+        # loop over the face detections
+        for rect in rects:
+            # determine the facial landmarks for the face region, then
+            # convert the facial landmark (x, y)-coordinates to a NumPy
+            # array
+            with metrics.time("landmarks"):
+                shape = predictor(fullGray, rect)
+            shape = face_utils.shape_to_np(shape)
+
+            # extract the left and right eye coordinates, then use the
+            # coordinates to compute the eye aspect ratio for both eyes
+            leftEye = shape[lStart:lEnd]
+            rightEye = shape[rStart:rEnd]
+            leftEAR = eye_aspect_ratio(leftEye)
+            rightEAR = eye_aspect_ratio(rightEye)
+
+            # average the eye aspect ratio together for both eyes\ 
+            ear = (leftEAR + rightEAR) / 2.0
+
+            if draw:
+                leftEyeHull = cv2.convexHull((leftEye * scale).astype("int32"))
+                rightEyeHull = cv2.convexHull((rightEye * scale).astype("int32"))
+                cv2.drawContours(frame, [leftEyeHull], -1, (0, 255, 0), 1)
+                cv2.drawContours(frame, [rightEyeHull],  -1, (0, 255, 0), 1)
+
+            # check to see if the eye aspect ratio is below the blink
+
+            leftClosed = leftEAR < EYE_AR_THRESH - 0.12
+            rightClosed = rightEAR < EYE_AR_THRESH - 0.12
+            for event in blink_gestures.update(leftClosed, rightClosed, vs.timestamp):
+                print("{} Eye(s) Blinked".format(event.gesture.capitalize()))
+                if event.gesture == BlinkGestures.BOTH:
+                    COUNTER += 1
+                    TOTAL += 1
+
+            # the computed eye aspect ratio for the frame
+
+            if draw:
+                cv2.putText(frame, "Blinks: {}".format(TOTAL), (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                cv2.putText(frame, "Left: {:.2f}".format(leftEAR), (10, 50),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                cv2.putText(frame, "Right: {:.2f}".format(rightEAR), (10, 70),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                cv2.putText(frame, "EAR: {:.2f}".format(ear), (300, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+            break
+        else:
+            # no face, a closure in progress is dropped
+            blink_gestures.update(None, None, vs.timestamp)
+
+        if draw:
+            preview.submit(frame)
+
+
+# tracking runs on its own thread, the preview window stays on the main
+# thread and the `q` key, Ctrl+C or q in the terminal end the run
+run_with_preview(track, preview, control)
+actuator.stop()
+if metrics_writer is not None:
+    metrics_writer.stop()
+
+for stage, values in sorted(metrics.snapshot()["stages"].items()):
+    print("{}: {} frames, p50 {:.1f} ms, p95 {:.1f} ms".format(
+        stage, values["count"], 1000 * (values["p50"] or 0), 1000 * (values["p95"] or 0)))
+print("Face search:", face_search.stats)
+
+vs.release()
 
@@ -0,0 +1,374 @@
+"""
+One entry point for every way of controlling the computer:
+
+    python eyecontrol.py gaze         move the cursor where you look
+    python eyecontrol.py head         move the cursor with the head
+    python eyecontrol.py blink        click with blinks
+    python eyecontrol.py dictation    type what you say
+    python eyecontrol.py combined     head cursor, blink clicks and dictation
+
+Each mode imports and starts only what it uses: the camera modes never
+load the speech libraries, dictation never opens the camera, and dlib,
+MediaPipe, pyautogui and the models are loaded on first use. In the
+combined mode the speech libraries and the microphone are started on a
+thread after the first frame, so the cursor moves as early as possible.
+
+With --timing, the time spent importing, building and reaching the first
+frame, or the first audio chunk in dictation mode, is printed.
+"""
+import argparse
+import sys
+import threading
+import time
+
+# When the process started, the --timing marks are measured from here
+START = time.perf_counter()
+
+MODES = {
+    "gaze": ("gaze_cursor",),
+    "head": ("head_cursor",),
+    "blink": ("blink",),
+    "dictation": ("dictation",),
+    "combined": ("head_cursor", "blink", "dictation"),
+}
+
+# Choices of the options, the same as StageQueue.POLICIES, OverlayRenderer.LEVELS,
+# filters.FILTERS, speech_text.RECOGNIZERS and text_output.TEXT_BACKENDS, spelled
+# out so that parsing the command line imports none of them
+DROP_POLICIES = ["block", "drop_oldest", "drop_newest"]
+OVERLAYS = ["none", "minimal", "full"]
+FILTERS = ["ema", "kalman", "one_euro"]
+RECOGNIZERS = ["google", "offline", "stub"]
+TEXT_BACKENDS = ["keys", "paste", "recording", "unicode"]
+
+# Libraries slow to import, --timing tells which ones a mode loaded
+HEAVY_MODULES = ["cv2", "dlib", "mediapipe", "pyautogui", "Quartz", "speech_recognition", "pyaudio"]
+
+
+class Startup(object):
+    """
+    This class records how long after the start of the process each step
+    of the startup was reached, the first time it is reached.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.marks = []
+
+    def mark(self, name):
+        """Records the step, once"""
+        if self.enabled and name not in dict(self.marks):
+            self.marks.append((name, 1000 * (time.perf_counter() - START)))
+
+    def report(self):
+        """Returns the marks as printable text"""
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        return "timing: {}; loaded: {}".format(", ".join("{} {:.0f} ms".format(name, ms) for name, ms in self.marks),
+                                               ", ".join(loaded) or "none")
+
+
+class Dictation(object):
+    """
+    Types what the user says. The speech libraries are imported and the
+    microphone is opened on a thread by start(), so the camera never waits
+    on them.
+    """
+
+    def __init__(self, args, startup):
+        self.args = args
+        self.startup = startup
+        self.processor = None
+        self.stop_event = threading.Event()
+
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Starts the speech processor on a thread and returns at once"""
+        self._thread = threading.Thread(target=self._run, name="dictation-startup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            self._start()
+        except Exception as e:
+            # The camera modes go on without dictation
+            print(f"Dictation could not start: {e}")
+            self.stop_event.set()
+
+    def _start(self):
+        from speech_audio import MicrophoneSource, VadSegmenter, WavFileSource
+        from speech_text import SpeechProcessor, make_recognizer, show_partial
+        from text_output import TextOutput, make_text_backend
+        self.startup.mark("speech imports")
+
+        args = self.args
+        source = WavFileSource(args.wav, realtime=True) if args.wav else MicrophoneSource()
+        segmenter = VadSegmenter(partial_interval=args.partial_interval or None)
+        # Phrases are recognized on a pool of workers and typed in the order they were spoken,
+        # from the text output thread, the phrases spoken meanwhile are typed together
+        processor = SpeechProcessor(make_recognizer(args.recognizer), args.speech_workers, segmenter=segmenter,
+                                    on_partial=show_partial if args.partial_interval else None,
+                                    output=TextOutput(make_text_backend(args.typing)))
+        with self._lock:
+            if self.stop_event.is_set():
+                return
+            self.processor = processor
+            processor.start(source=source)
+
+        # The first chunk written by the capture thread
+        while not self.stop_event.is_set():
+            if source.ring is not None and source.ring.wait(1, 0.1):
+                self.startup.mark("first audio")
+                break
+
+    @property
+    def running(self):
+        """False once the processor is stopped, by the end command or the end of the source"""
+        with self._lock:
+            if self.processor is None:
+                return not self.stop_event.is_set()
+            return self.processor.threads[0].is_alive()
+
+    def stop(self):
+        """Stops the processor, the phrases recognized so far are still typed"""
+        with self._lock:
+            self.stop_event.set()
+            processor = self.processor
+        if processor is not None:
+            processor.stop()
+            processor.join()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=sorted(MODES), help="what the camera and the microphone control")
+    parser.add_argument("source", nargs="?", default="0", help="camera index, video file or image directory")
+    parser.add_argument("--timing", action="store_true", help="print the import time and the time to the first frame")
+    parser.add_argument("--frames", type=int, default=None, help="stop after this many frames")
+
+    camera = parser.add_argument_group("camera modes")
+    camera.add_argument("--backend", choices=["face_mesh", "dlib"], default="face_mesh",
+                        help="landmark backend used for gaze, head tracking and blinks")
+    camera.add_argument("--detect-scale", type=float, default=1.0,
+                        help="with dlib, search faces on a frame this much smaller, landmarks stay at full resolution")
+    camera.add_argument("--cursor", choices=["pyautogui", "quartz", "recording"], default="pyautogui",
+                        help="how mouse events are posted, recording posts nothing")
+    camera.add_argument("--cursor-hz", type=float, default=60, help="largest number of cursor moves per second")
+    camera.add_argument("--screen", help="screen size as WIDTHxHEIGHT, asked to pyautogui by default")
+    camera.add_argument("--metrics", metavar="PATH",
+                        help="write stage latencies and counters to this Prometheus text file")
+    camera.add_argument("--metrics-interval", type=float, default=5.0,
+                        help="seconds between two writes of the metrics file")
+    camera.add_argument("--queue-size", type=int, default=1, help="frames queued between two pipeline stages")
+    camera.add_argument("--drop-policy", choices=DROP_POLICIES, default="drop_oldest",
+                        help="what a full queue does with a new frame")
+    camera.add_argument("--overlay", choices=OVERLAYS, default="full",
+                        help="what is drawn on the preview: nothing, the gaze only or every landmark too")
+    camera.add_argument("--headless", action="store_true", help="no window and no drawing, stop with Ctrl+C or q")
+    camera.add_argument("--preview-fps", type=float, default=15,
+                        help="largest number of preview frames shown per second")
+    camera.add_argument("--idle-after", type=float, default=2.0,
+                        help="seconds without a face before only checking for one twice a second, "
+                             "0 to process every frame")
+    camera.add_argument("--filter", choices=FILTERS, default="one_euro",
+                        help="head cursor smoothing: One Euro, constant velocity Kalman or the former EMA")
+    camera.add_argument("--predict", action="store_true",
+                        help="move the head cursor where the head should be now, from the time since the capture")
+
+    speech = parser.add_argument_group("dictation and combined modes")
+    speech.add_argument("--no-dictation", action="store_true", help="combined mode without dictation")
+    speech.add_argument("--recognizer", choices=RECOGNIZERS, default="google",
+                        help="speech recognizer, offline runs on this machine and sends nothing over the network")
+    speech.add_argument("--speech-workers", type=int, default=2, help="phrases recognized at the same time")
+    speech.add_argument("--typing", choices=TEXT_BACKENDS, default="unicode",
+                        help="how dictated text is typed: key by key, Unicode events, clipboard paste or recorded only")
+    speech.add_argument("--wav", help="replay a 16-bit WAV file in place of the microphone")
+    speech.add_argument("--partial-interval", type=float, default=0.3,
+                        help="seconds between two partial recognitions of a phrase, 0 for whole phrases only")
+    return parser
+
+
+def run_dictation(args, startup):
+    """Types what the user says until the end command, the end of the WAV file or Ctrl+C"""
+    dictation = Dictation(args, startup)
+    dictation.start()
+    startup.mark("ready")
+    try:
+        while dictation.running:
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        pass
+    dictation.stop()
+
+
+def run_camera(args, modes, startup):
+    """Runs the camera modes, with dictation started after the first frame in the combined mode"""
+    import cv2
+    from gaze_tracking import GazeTracking, FaceTracker, CalibrationStore, DlibBackend, FaceMeshBackend
+    from gaze_tracking import Pipeline, Actuator, PyAutoGUIBackend, QuartzBackend, RecordingBackend
+    from gaze_tracking import Metrics, PrometheusFileWriter, OverlayRenderer, ActivityGate, BlinkGestures
+    from gaze_tracking import ControlChannel, open_preview, open_source, run_with_preview, warm_up
+    from gaze_tracking.filters import make_filter
+    startup.mark("imports")
+
+    # One landmark backend does all the face analysis of a frame.
+    # It and the screen are set up before the camera, a missing library then leaves nothing open
+    if args.backend == "face_mesh":
+        backend = FaceMeshBackend(refine_landmarks=True)
+    else:
+        backend = DlibBackend(FaceTracker(detect_scale=args.detect_scale))
+        # The dlib predictor is read from the disk while the camera opens
+        warm_up(background=True)
+
+    screen_size = None
+    if args.screen:
+        screen_size = tuple(int(v) for v in args.screen.lower().split("x"))
+    elif "head_cursor" in modes or "gaze_cursor" in modes:
+        import pyautogui
+        screen_size = tuple(pyautogui.size())
+
+    # Stage latencies and counters, the hooks do nothing unless a metrics file is asked for
+    metrics = Metrics(enabled=bool(args.metrics))
+    metrics_writer = PrometheusFileWriter(metrics, args.metrics, args.metrics_interval).start() if args.metrics else None
+
+    # Frames are skipped while nobody is in front of the camera and still eyes keep their pupils
+    activity = ActivityGate(idle_after=args.idle_after) if args.idle_after > 0 else None
+    gaze = GazeTracking(calibration_store=CalibrationStore(), camera=args.source, backend=backend, metrics=metrics,
+                        activity=activity, screen_size=screen_size)
+
+    # Cursor events are posted from their own thread, the vision loop never waits on them
+    cursors = {"pyautogui": PyAutoGUIBackend, "quartz": QuartzBackend, "recording": RecordingBackend}
+    actuator = Actuator(cursors[args.cursor](), args.cursor_hz, metrics)
+
+    overlay = OverlayRenderer(args.overlay)
+    preview = open_preview("Eye control: " + args.mode, args.headless, args.preview_fps)
+    cam = open_source(args.source)
+    pipeline = Pipeline(cam, args.queue_size, args.drop_policy, metrics)
+    control = ControlChannel(pipeline.stop_event)
+
+    # Blinks of both eyes click, a blink held for a second presses the button until the eyes open
+    blink_gestures = None
+    if "blink" in modes:
+        blink_gestures = BlinkGestures(bindings={BlinkGestures.BOTH: (BlinkGestures.CLICK, Actuator.LEFT)},
+                                       debounce=0.1, refractory=0.4, long_press=1.0, actuator=actuator)
+
+    dictation = None
+    if "dictation" in modes and not args.no_dictation:
+        dictation = Dictation(args, startup)
+
+    # The head cursor moves like a mirror, the gaze ratios are measured on the camera frame
+    mirror = "gaze_cursor" not in modes
+
+    # Head center of the first frame, head cursor position and last gaze point moved to
+    initial_head_center = None
+    screen_x, screen_y = (screen_size[0] // 2, screen_size[1] // 2) if screen_size else (0, 0)
+    last_gaze_point = None
+    first_frame = True
+    # Sensitivity of the head cursor
+    sensitivity = 2.0
+    # Smoothing filter of the head cursor, it works on the capture timestamps
+    cursor_filter = make_filter(args.filter) if "head_cursor" in modes else None
+
+    def landmark_stage(packet):
+        """Mirrors the frame for the head cursor and finds the face landmarks"""
+        if mirror:
+            packet.frame = cv2.flip(packet.frame, 1)
+        packet.gray, packet.landmarks = gaze.find_landmarks(packet.frame, packet.timestamp)
+
+    def gaze_stage(packet):
+        """Locates the pupils and computes the gaze sample and the head center"""
+        packet.sample = gaze.analyze(packet.frame, packet.gray, packet.landmarks, packet.timestamp)
+        packet.gaze_point = gaze.get_gaze_point() if "gaze_cursor" in modes else None
+        packet.head_center = None
+        if packet.landmarks is not None and "head_cursor" in modes:
+            # Average position of the face landmarks, without the irises
+            packet.head_center = packet.landmarks.centroid(FaceMeshBackend.MESH_POINTS)
+
+    def actuation_stage(packet):
+        """Sends the cursor target and the blink clicks to the actuator"""
+        nonlocal initial_head_center, screen_x, screen_y, last_gaze_point, first_frame
+
+        if packet.gaze_point:
+            # Move the cursor only if the gaze point has changed significantly
+            x = min(max(packet.gaze_point[0], 0), screen_size[0] - 1)
+            y = min(max(packet.gaze_point[1], 0), screen_size[1] - 1)
+            if last_gaze_point is None or abs(last_gaze_point[0] - x) > 5 or abs(last_gaze_point[1] - y) > 5:
+                actuator.move_to(x, y)
+                last_gaze_point = (x, y)
+
+        if packet.head_center is not None:
+            if initial_head_center is None:
+                initial_head_center = packet.head_center
+            # Head movement from the initial center, scaled by the sensitivity
+            screen_x += (packet.head_center[0] - initial_head_center[0]) * sensitivity
+            screen_y += (packet.head_center[1] - initial_head_center[1]) * sensitivity
+
+            # Apply smoothing, and with --predict extrapolate over the time elapsed since the capture
+            cursor_filter.update(screen_x, screen_y, packet.timestamp)
+            latency = time.monotonic() - packet.timestamp if args.predict else 0.0
+            x, y = cursor_filter.predict(latency)
+            actuator.move_to(max(0, min(screen_size[0], x)), max(0, min(screen_size[1], y)))
+
+        packet.initial_head_center = initial_head_center
+
+        # One click per blink instead of one per frame
+        if blink_gestures is not None:
+            blink_gestures.update_sample(packet.sample)
+
+        if first_frame:
+            first_frame = False
+            startup.mark("first frame")
+            if dictation is not None:
+                # The speech libraries and the microphone start once the cursor moves
+                dictation.start()
+
+    def preview_stage(packet):
+        """Draws the overlay on the frames the preview will show and hands them over"""
+        if preview.due():
+            frame = overlay.render(packet.frame, packet.landmarks, packet.sample, packet.initial_head_center,
+                                   packet.gaze_point)
+            preview.submit(frame)
+
+        # Exit after --frames or when the speech processor asks to
+        if args.frames and pipeline.stages[-1].processed + 1 >= args.frames:
+            control.stop("frames")
+        if dictation is not None and dictation.processor is not None and not dictation.running:
+            control.stop("speech")
+
+    # Each stage runs on its own thread, the preview window stays on the main thread for imshow.
+    # Esc or q in the window, q in the terminal, Ctrl+C or the speech command end the run.
+    pipeline.add_stage("landmarks", landmark_stage)
+    pipeline.add_stage("gaze", gaze_stage)
+    pipeline.add_stage("actuation", actuation_stage)
+    pipeline.add_stage("preview", preview_stage)
+    startup.mark("ready")
+    run_with_preview(pipeline.run, preview, control)
+    print(pipeline.report())
+
+    # The pipeline released the camera
+    if dictation is not None:
+        dictation.stop()
+    actuator.stop()
+    if metrics_writer is not None:
+        metrics_writer.stop()
+
+
+def main(argv=None):
+    parser = build_parser()
+    # The wrapper scripts put their options before the source
+    args = parser.parse_intermixed_args(argv)
+    modes = MODES[args.mode]
+    startup = Startup(args.timing)
+
+    if modes == ("dictation",):
+        run_dictation(args, startup)
+    else:
+        run_camera(args, modes, startup)
+
+    if args.timing:
+        print(startup.report())
+
+
+if __name__ == "__main__":
+    main()
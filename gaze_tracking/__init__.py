@@ -1 +1,15 @@
 from .gaze_tracking import GazeTracking
+from .frame_source import FrameSource, CameraSource, VideoFileSource, ImageSequenceSource, open_source
+from .face_tracker import FaceTracker, CascadeFaceSearch, detect_faces
+from .calibration_store import CalibrationStore
+from .gaze_sample import GazeSample
+from .landmarks import FaceLandmarks, LandmarkBackend, DlibBackend, FaceMeshBackend
+from .pipeline import Pipeline, Stage, StageQueue, Packet
+from .actuator import Actuator, CursorBackend, PyAutoGUIBackend, QuartzBackend, RecordingBackend
+from .metrics import Metrics, Histogram, PrometheusFileWriter
+from .overlay import OverlayRenderer
+from .preview import ControlChannel, HeadlessPreview, WindowPreview, open_preview, run_with_preview
+from .filters import MotionFilter, EmaFilter, OneEuroFilter, KalmanFilter, make_filter
+from .gestures import BlinkGestures, GestureEvent
+from .activity import ActivityGate
+from .models import ModelRegistry, warm_up
@@ -0,0 +1,140 @@
+import numpy as np
+import cv2
+
+
+class ActivityGate(object):
+    """
+    This class decides how much of each frame GazeTracking has to process,
+    so the tracker does not burn a core while the user is away or still.
+
+    After idle_after seconds without a face the gate goes idle: a frame is
+    only searched for a face every idle_interval seconds, or as soon as the
+    picture changes, and the other frames are skipped. Finding a face wakes
+    it up. While a face is tracked, an eye whose pixels did not change since
+    the last frame keeps its previous pupil instead of being analyzed again.
+    """
+
+    ACTIVE, IDLE = "active", "idle"
+
+    # Size of the thumbnail compared between frames to wake up on motion
+    THUMBNAIL_SIZE = (64, 48)
+
+    def __init__(self, idle_after=2.0, idle_interval=0.5, wake_on_motion=True, pixel_threshold=12,
+                 changed_fraction=0.02, margin=5):
+        """
+        Arguments:
+            idle_after (float): Seconds without a face before going idle
+            idle_interval (float): Seconds between two face searches while idle
+            wake_on_motion (bool): Also search a frame that differs from the previous
+                                   one while idle, for a wake up within a frame
+            pixel_threshold (int): Gray level difference below which a pixel counts
+                                   as camera noise
+            changed_fraction (float): Share of changed pixels above which a region moved
+            margin (int): Pixels added around the eye contour, as in Eye._isolate
+        """
+        self.idle_after = idle_after
+        self.idle_interval = idle_interval
+        self.wake_on_motion = wake_on_motion
+        self.pixel_threshold = pixel_threshold
+        self.changed_fraction = changed_fraction
+        self.margin = margin
+
+        self.stats = {"searched": 0, "skipped": 0, "wakes": 0, "pupils_reused": 0}
+        self.reset()
+
+    def reset(self):
+        """Goes back to the active mode and forgets the previous frames"""
+        self.mode = self.ACTIVE
+        self._last_face = None
+        self._next_search = float("-inf")
+        self._thumbnail = None
+        self._eyes = [None, None]
+
+    @property
+    def idle(self):
+        return self.mode == self.IDLE
+
+    def _changed(self, current, previous):
+        """Returns True if more than changed_fraction of the pixels differ by
+        more than pixel_threshold between two arrays of the same shape"""
+        if current.size == 0:
+            return True
+        difference = cv2.absdiff(current, previous)
+        moved = np.count_nonzero(difference > self.pixel_threshold)
+        return moved > self.changed_fraction * current.size
+
+    def _scene_moved(self, frame):
+        """Compares a thumbnail of the frame with the one of the previous call"""
+        thumbnail = cv2.resize(frame, self.THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        previous, self._thumbnail = self._thumbnail, thumbnail
+        return previous is not None and self._changed(thumbnail, previous)
+
+    def should_search(self, frame, timestamp):
+        """Returns True if the frame must be searched for a face, False if it
+        can be skipped because the gate is idle
+
+        Arguments:
+            frame (numpy.ndarray): BGR frame
+            timestamp (float): Monotonic capture time of the frame, in seconds
+        """
+        if self.mode == self.ACTIVE:
+            return True
+
+        moved = self.wake_on_motion and self._scene_moved(frame)
+        if moved or timestamp >= self._next_search:
+            self._next_search = timestamp + self.idle_interval
+            self.stats["searched"] += 1
+            return True
+
+        self.stats["skipped"] += 1
+        return False
+
+    def face_found(self, found, timestamp):
+        """Updates the mode with the result of a face search
+
+        Arguments:
+            found (bool): True if a face was found on the frame
+            timestamp (float): Monotonic capture time of the frame, in seconds
+        """
+        if found:
+            if self.mode == self.IDLE:
+                self.stats["wakes"] += 1
+                self.mode = self.ACTIVE
+                self._thumbnail = None
+            self._last_face = timestamp
+            return
+
+        self._eyes = [None, None]
+        if self._last_face is None:
+            self._last_face = timestamp
+        if self.mode == self.ACTIVE and timestamp - self._last_face >= self.idle_after:
+            self.mode = self.IDLE
+            self._next_search = timestamp + self.idle_interval
+
+    def eye_still(self, side, gray, region):
+        """Returns True if the pixels around an eye did not change since the
+        last frame, so its previous pupil is still valid
+
+        Arguments:
+            side: 0 for left and 1 for right
+            gray (numpy.ndarray): Grayscale frame
+            region (numpy.ndarray): (6, 2) contour of the eye
+        """
+        height, width = gray.shape[:2]
+        left, top = np.maximum(region.min(axis=0) - self.margin, 0)
+        right, bottom = np.minimum(region.max(axis=0) + self.margin, (width, height))
+        box = (int(left), int(top), int(right), int(bottom))
+
+        previous = self._eyes[side]
+        if previous is not None:
+            previous_box, previous_crop = previous
+            # The landmarks may shake by a pixel, a larger shift is a real move
+            if max(abs(a - b) for a, b in zip(box, previous_box)) <= 2:
+                x0, y0, x1, y1 = previous_box
+                if not self._changed(gray[y0:y1, x0:x1], previous_crop):
+                    # The reference is kept, so a slow drift still adds up to a change
+                    self.stats["pupils_reused"] += 1
+                    return True
+
+        self._eyes[side] = (box, gray[box[1]:box[3], box[0]:box[2]].copy())
+        return False
@@ -0,0 +1,222 @@
+import collections
+import threading
+import time
+from .metrics import NULL_METRICS
+
+
+class CursorBackend(object):
+    """
+    Base class of the cursor backends, the objects that actually
+    post mouse events to the system.
+    """
+
+    def move(self, x, y):
+        raise NotImplementedError
+
+    def click(self, button):
+        raise NotImplementedError
+
+    def double_click(self, button):
+        raise NotImplementedError
+
+    def press(self, button):
+        raise NotImplementedError
+
+    def release(self, button):
+        raise NotImplementedError
+
+
+class PyAutoGUIBackend(CursorBackend):
+    """
+    Posts mouse events with pyautogui. Its pause after every call is
+    turned off, the actuator thread already paces the moves.
+    """
+
+    BUTTONS = ("left", "right", "middle")
+
+    def __init__(self):
+        import pyautogui
+
+        pyautogui.PAUSE = 0
+        pyautogui.FAILSAFE = False
+        self._pyautogui = pyautogui
+
+    def move(self, x, y):
+        self._pyautogui.moveTo(x, y)
+
+    def click(self, button):
+        self._pyautogui.click(button=self.BUTTONS[button])
+
+    def double_click(self, button):
+        self._pyautogui.doubleClick(button=self.BUTTONS[button])
+
+    def press(self, button):
+        self._pyautogui.mouseDown(button=self.BUTTONS[button])
+
+    def release(self, button):
+        self._pyautogui.mouseUp(button=self.BUTTONS[button])
+
+
+class QuartzBackend(CursorBackend):
+    """
+    Posts mouse events with the Quartz Mouse class of mouse.py, macOS only.
+    """
+
+    def __init__(self, mouse=None):
+        if mouse is None:
+            from mouse import Mouse
+            mouse = Mouse()
+        self._mouse = mouse
+
+    def move(self, x, y):
+        self._mouse.move(x, y)
+
+    def click(self, button):
+        self._mouse.click(button)
+
+    def double_click(self, button):
+        x, y = self._mouse.position()
+        self._mouse.doubleClick(x, y, 2, button)
+
+    def press(self, button):
+        x, y = self._mouse.position()
+        self._mouse.press(x, y, button)
+
+    def release(self, button):
+        x, y = self._mouse.position()
+        self._mouse.release(x, y, button)
+
+
+class RecordingBackend(CursorBackend):
+    """
+    Records the events it receives instead of posting them, as
+    (monotonic time, event name, arguments) tuples. A null backend
+    for tests and for headless runs.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def _record(self, name, *args):
+        self.events.append((time.monotonic(), name, args))
+
+    def move(self, x, y):
+        self._record("move", x, y)
+
+    def click(self, button):
+        self._record("click", button)
+
+    def double_click(self, button):
+        self._record("double_click", button)
+
+    def press(self, button):
+        self._record("press", button)
+
+    def release(self, button):
+        self._record("release", button)
+
+
+class Actuator(object):
+    """
+    This class posts cursor events from its own thread, so the vision loop
+    never waits on cursor I/O. Moves are coalesced, only the latest target
+    is kept, and sent at most hz times per second. Clicks are never dropped,
+    they are sent in order, after the moves requested before them.
+    """
+
+    LEFT, RIGHT, MIDDLE = 0, 1, 2
+
+    def __init__(self, backend=None, hz=60, metrics=None):
+        """
+        Arguments:
+            backend (CursorBackend): Posts the events, PyAutoGUIBackend by default
+            hz (float): Largest number of moves per second, None for no limit
+            metrics (Metrics): Receives the time spent posting events, disabled by default
+        """
+        self.backend = backend if backend is not None else PyAutoGUIBackend()
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.interval = 1.0 / hz if hz else 0.0
+
+        self.moves_requested = 0
+        self.moves_sent = 0
+
+        self._target = None
+        self._events = collections.deque()
+        self._next_move = 0.0
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="actuator", daemon=True)
+        self._thread.start()
+
+    def move_to(self, x, y):
+        """Sets the cursor target, replacing the one not sent yet"""
+        with self._condition:
+            self._target = (x, y)
+            self.moves_requested += 1
+            self._condition.notify()
+
+    def _post(self, name, button):
+        with self._condition:
+            if self._target is not None:
+                # The move requested before the click goes first, so the click lands where it was aimed
+                self._events.append(("move", self._target))
+                self._target = None
+            self._events.append((name, button))
+            self._condition.notify()
+
+    def click(self, button=LEFT):
+        self._post("click", button)
+
+    def double_click(self, button=LEFT):
+        self._post("double_click", button)
+
+    def press(self, button=LEFT):
+        self._post("press", button)
+
+    def release(self, button=LEFT):
+        self._post("release", button)
+
+    def _next_action(self):
+        """Waits for the next thing to send and returns it, None once stopped"""
+        with self._condition:
+            while True:
+                if self._events:
+                    return self._events.popleft()
+
+                if self._target is not None:
+                    delay = self._next_move - time.monotonic()
+                    if delay <= 0:
+                        target, self._target = self._target, None
+                        return ("move", target)
+                    self._condition.wait(delay)
+                elif self._stopped:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            action = self._next_action()
+            if action is None:
+                return
+
+            name, argument = action
+            with self.metrics.time("cursor"):
+                if name == "move":
+                    self._next_move = time.monotonic() + self.interval
+                    self.backend.move(*argument)
+                    self.moves_sent += 1
+                else:
+                    getattr(self.backend, name)(argument)
+
+    def stop(self, timeout=1.0):
+        """Sends what is still pending and stops the thread"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    @property
+    def moves_coalesced(self):
+        """Number of requested moves that were replaced before being sent"""
+        return self.moves_requested - self.moves_sent
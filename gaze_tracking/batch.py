@@ -0,0 +1,216 @@
+"""
+Runs GazeTracking over recorded videos, spreading frame ranges across
+a pool of processes, and writes one columnar sample file per run.
+
+    python -m gaze_tracking.batch session1.mp4 session2.mp4 -o samples.npz --workers 16
+
+The output is a NumPy .npz archive with one array per column, load it
+with load_samples() or numpy.load(). Missing values are NaN.
+"""
+import argparse
+import copy
+import os
+import concurrent.futures
+import numpy as np
+import cv2
+from .calibration_store import CalibrationStore
+from .gaze_tracking import GazeTracking
+from .landmarks import DlibBackend, FaceMeshBackend
+
+COLUMNS = (
+    "video", "frame", "timestamp",
+    "pupil_left_x", "pupil_left_y", "pupil_right_x", "pupil_right_y",
+    "horizontal_ratio", "vertical_ratio", "blinking_ratio",
+    "gaze_x", "gaze_y",
+)
+
+BACKENDS = {
+    "dlib": DlibBackend,
+    "face_mesh": FaceMeshBackend,
+}
+
+
+def _tracker(backend, calibration):
+    """Returns a GazeTracking that uses the given calibration as it is, with
+    a new backend: a worker analyzes ranges that do not follow each other,
+    and MediaPipe would carry its face tracking from one to the next. The
+    dlib models come from the registry and are still loaded once per worker."""
+    gaze = GazeTracking(backend=BACKENDS[backend]())
+    if calibration is not None:
+        gaze.calibration = copy.deepcopy(calibration)
+        gaze.calibration.nb_validation_frames = 0
+    return gaze
+
+
+def _init_worker():
+    # One process per core already, OpenCV threads would only compete with them
+    cv2.setNumThreads(1)
+
+
+def analyze_range(path, start, stop, calibration=None, backend="dlib", screen_size=(1920, 1080), video=0):
+    """Analyzes the frames [start, stop) of a video and returns their columns
+
+    Arguments:
+        path (str): Video file
+        start (int): First frame to analyze
+        stop (int): Frame to stop before, None for the end of the video
+        calibration (Calibration): Completed calibration to use, calibrates live when None
+        backend (str): Name of the landmark backend
+        screen_size (tuple): (width, height) used to compute the gaze point
+        video (int): Index of the video, stored in the "video" column
+
+    Returns:
+        dict of column name to numpy.ndarray
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError("Unable to open video file {}".format(path))
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    if start:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    gaze = _tracker(backend, calibration)
+    screen_width, screen_height = screen_size
+    rows = []
+    index = start
+
+    try:
+        while stop is None or index < stop:
+            ok, frame = capture.read()
+            if not ok:
+                break
+
+            sample = gaze.refresh(frame, index / fps)
+            left = sample.pupil_left or (np.nan, np.nan)
+            right = sample.pupil_right or (np.nan, np.nan)
+            horizontal = sample.horizontal_ratio if sample.pupils_located else np.nan
+            vertical = sample.vertical_ratio if sample.pupils_located else np.nan
+            blinking = sample.blinking_ratio if sample.blinking_ratio is not None else np.nan
+
+            rows.append((video, index, sample.timestamp, left[0], left[1], right[0], right[1],
+                         horizontal, vertical, blinking, horizontal * screen_width, vertical * screen_height))
+            index += 1
+    finally:
+        capture.release()
+        if hasattr(gaze.backend, "close"):
+            # Frees the MediaPipe graph of the range
+            gaze.backend.close()
+    return _columns(rows)
+
+
+def _columns(rows):
+    table = np.array(rows, np.float64).reshape(-1, len(COLUMNS))
+    columns = {}
+    for i, name in enumerate(COLUMNS):
+        if name in ("video", "frame"):
+            columns[name] = table[:, i].astype(np.int32)
+        elif name == "timestamp":
+            columns[name] = table[:, i]
+        else:
+            columns[name] = table[:, i].astype(np.float32)
+    return columns
+
+
+def calibrate(path, backend="dlib", max_frames=300):
+    """Runs the live calibration on the first frames of a video and returns it,
+    or None if no face was found in time
+
+    Arguments:
+        path (str): Video file
+        backend (str): Name of the landmark backend
+        max_frames (int): Frames to try before giving up
+    """
+    capture = cv2.VideoCapture(path)
+    gaze = GazeTracking(backend=BACKENDS[backend]())
+    try:
+        for _ in range(max_frames):
+            ok, frame = capture.read()
+            if not ok:
+                break
+            gaze.refresh(frame)
+            if gaze.calibration.is_complete():
+                return gaze.calibration
+    finally:
+        capture.release()
+    return None
+
+
+def frame_ranges(nb_frames, chunk_frames):
+    """Splits a video of nb_frames frames into [start, stop) ranges, the
+    last one is open-ended because frame counts of some codecs are estimates"""
+    starts = list(range(0, max(nb_frames, 1), chunk_frames))
+    stops = starts[1:] + [None]
+    return list(zip(starts, stops))
+
+
+def analyze_videos(paths, workers=None, chunk_frames=300, calibration=None, backend="dlib",
+                   screen_size=(1920, 1080)):
+    """Analyzes every frame of the videos on a process pool and returns the
+    columns of all the samples, in video and frame order
+
+    Arguments:
+        paths (list): Video files
+        workers (int): Number of processes, one per core by default
+        chunk_frames (int): Frames analyzed by one task
+        calibration (Calibration): Calibration shared by all the tasks, calibrated
+                                   on the first video when None
+        backend (str): Name of the landmark backend
+        screen_size (tuple): (width, height) used to compute the gaze point
+    """
+    if calibration is None and paths and backend == "dlib":
+        calibration = calibrate(paths[0], backend)
+
+    tasks = []
+    for video, path in enumerate(paths):
+        capture = cv2.VideoCapture(path)
+        nb_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        capture.release()
+        for start, stop in frame_ranges(nb_frames, chunk_frames):
+            tasks.append((path, start, stop, calibration, backend, screen_size, video))
+
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(analyze_range, *task) for task in tasks]
+        results = [future.result() for future in futures]
+
+    if not results:
+        return _columns([])
+    return {name: np.concatenate([r[name] for r in results]) for name in COLUMNS}
+
+
+def save_samples(path, columns):
+    """Writes the columns to an uncompressed .npz file"""
+    np.savez(path, **columns)
+
+
+def load_samples(path):
+    """Returns the columns stored by save_samples() as a dict of arrays"""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("videos", nargs="+", help="video files to analyze")
+    parser.add_argument("-o", "--output", default="samples.npz", help="where to write the samples")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of processes")
+    parser.add_argument("--chunk", type=int, default=300, help="frames analyzed by one task")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="dlib", help="landmark backend")
+    parser.add_argument("--screen", default="1920x1080", help="screen size used for the gaze point")
+    parser.add_argument("--user", default=None, help="load the calibration profile of this user")
+    parser.add_argument("--camera", default="0", help="camera of the calibration profile")
+    args = parser.parse_args(argv)
+
+    calibration = None
+    if args.user is not None:
+        calibration = CalibrationStore().load(args.user, args.camera)
+        if calibration is None:
+            parser.error("no calibration profile for {} on camera {}".format(args.user, args.camera))
+
+    screen_size = tuple(int(v) for v in args.screen.lower().split("x"))
+    columns = analyze_videos(args.videos, args.workers, args.chunk, calibration, args.backend, screen_size)
+    save_samples(args.output, columns)
+    print("{} samples written to {}".format(len(columns["frame"]), args.output))
+
+
+if __name__ == "__main__":
+    main()
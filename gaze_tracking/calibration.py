@@ -10,12 +10,27 @@ class Calibration(object):
     the best threshold value for the person and the webcam.
     """
 
+    THRESHOLDS = range(5, 100, 5)
+
     def __init__(self):
         self.nb_frames = 20
         self.thresholds_left = []
         self.thresholds_right = []
         self.screen_points = []
         self.eye_positions = []
+        self.mapping = None
+
+        # Checks left to run on live frames before trusting a stored profile
+        self.nb_validation_frames = 0
+        self.validation_tolerance = 10
+        self._live_thresholds = ([], [])
+
+    def reset(self):
+        """Discards the thresholds so the calibration runs again on the next frames"""
+        self.thresholds_left = []
+        self.thresholds_right = []
+        self.nb_validation_frames = 0
+        self._live_thresholds = ([], [])
 
     def is_complete(self):
         """Returns true if the calibration is completed"""
@@ -50,19 +65,50 @@ class Calibration(object):
     def find_best_threshold(eye_frame):
         """Calculates the optimal threshold for the given eye.
 
+        The eye frame is filtered once, then the iris size for every
+        threshold is read from the cumulative histogram of the filtered
+        frame: a pixel turns black when its value is <= the threshold.
+
         Argument:
             eye_frame: eye's frame to analyse
         """
         average_iris_size = 0.48
-        trials = {}
 
-        for threshold in range(5, 100, 5):
-            iris_frame = Pupil.image_processing(eye_frame, threshold)
-            trials[threshold] = Calibration.iris_size(iris_frame)
+        filtered = Pupil.filtering(eye_frame)[5:-5, 5:-5]
+        nb_pixels = filtered.size
+        nb_blacks = np.cumsum(np.bincount(filtered.ravel(), minlength=256))
+
+        trials = {}
+        for threshold in Calibration.THRESHOLDS:
+            trials[threshold] = int(nb_blacks[threshold]) / nb_pixels
 
         best_threshold, iris_size = min(trials.items(), key=(lambda p: abs(p[1] - average_iris_size)))
         return best_threshold
 
+    def needs_validation(self):
+        """Returns true while a loaded profile is still being checked against live frames"""
+        return self.nb_validation_frames > 0 and self.is_complete()
+
+    def validate(self, eye_frame, side):
+        """Computes the best threshold for the given image. Once enough frames
+        were checked for both eyes, the calibration is reset if the median of
+        these thresholds is too far from the stored one for either eye.
+
+        Arguments:
+            eye_frame: eye's frame
+            side: 0 for left and 1 for right
+        """
+        live_thresholds = self._live_thresholds[side]
+        if len(live_thresholds) < self.nb_validation_frames:
+            live_thresholds.append(self.find_best_threshold(eye_frame))
+
+        if all(len(t) >= self.nb_validation_frames for t in self._live_thresholds):
+            deviations = [abs(np.median(t) - self.threshold(s)) for s, t in enumerate(self._live_thresholds)]
+            if max(deviations) > self.validation_tolerance:
+                self.reset()
+            self.nb_validation_frames = 0
+            self._live_thresholds = ([], [])
+
     def evaluate(self, eye_frame, side):
         """Improves calibration by taking into consideration the
         given image.
@@ -87,9 +133,13 @@ class Calibration(object):
         """
         self.eye_positions.append(eye_position)
         self.screen_points.append(screen_point)
+        self.mapping = None
 
     def get_mapping(self):
         """Returns a polynomial mapping from eye positions to screen coordinates."""
+        if self.mapping is not None:
+            return self.mapping
+
         if len(self.screen_points) < 4:
             return None  # Need at least 4 points to fit a polynomial
 
@@ -99,4 +149,5 @@ class Calibration(object):
         x_coefficients = np.polyfit(eye_positions_np[:, 0], screen_points_np[:, 0], 2)
         y_coefficients = np.polyfit(eye_positions_np[:, 1], screen_points_np[:, 1], 2)
 
-        return x_coefficients, y_coefficients
+        self.mapping = (x_coefficients, y_coefficients)
+        return self.mapping
@@ -0,0 +1,106 @@
+import os
+import re
+import zipfile
+import numpy as np
+from .calibration import Calibration
+
+
+class CalibrationStore(object):
+    """
+    This class saves calibrations on disk, one compressed NumPy archive
+    per user and camera, so the calibration phase can be skipped
+    on the next launch.
+    """
+
+    VERSION = 1
+
+    def __init__(self, directory=None, nb_validation_frames=5, validation_tolerance=10):
+        """
+        Arguments:
+            directory (str): Where the profiles are stored, ~/.gaze_tracking/profiles by default
+            nb_validation_frames (int): Live frames used to check a loaded profile
+            validation_tolerance (int): Largest median difference between the stored and
+                                        the live thresholds for the profile to be kept
+        """
+        if directory is None:
+            directory = os.path.join(os.path.expanduser("~"), ".gaze_tracking", "profiles")
+        self.directory = directory
+        self.nb_validation_frames = nb_validation_frames
+        self.validation_tolerance = validation_tolerance
+
+    def path(self, user, camera):
+        """Returns the file of the profile for the given user and camera"""
+        name = "{}-{}".format(user, camera)
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        return os.path.join(self.directory, name + ".npz")
+
+    def save(self, calibration, user="default", camera=0):
+        """Writes the thresholds and the screen mapping of a calibration
+
+        Arguments:
+            calibration (Calibration): A completed calibration
+            user (str): Name of the user
+            camera (int or str): Camera the calibration was made with
+        """
+        if not calibration.is_complete():
+            raise ValueError("Only a completed calibration can be saved")
+
+        data = {
+            "version": np.array(self.VERSION, np.uint8),
+            "thresholds_left": np.array(calibration.thresholds_left, np.uint8),
+            "thresholds_right": np.array(calibration.thresholds_right, np.uint8),
+            "eye_positions": np.array(calibration.eye_positions, np.float32).reshape(-1, 2),
+            "screen_points": np.array(calibration.screen_points, np.float32).reshape(-1, 2),
+        }
+        mapping = calibration.get_mapping()
+        if mapping is not None:
+            data["mapping"] = np.array(mapping, np.float64)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(user, camera)
+        temporary = path + ".tmp.npz"
+        np.savez_compressed(temporary, **data)
+        os.replace(temporary, path)
+        return path
+
+    def load(self, user="default", camera=0):
+        """Returns the stored Calibration for the user and camera, or None.
+        The calibration is checked against the first live frames and
+        starts over if it does not fit them anymore.
+
+        Arguments:
+            user (str): Name of the user
+            camera (int or str): Camera the calibration was made with
+        """
+        path = self.path(user, camera)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != self.VERSION:
+                    return None
+
+                calibration = Calibration()
+                calibration.thresholds_left = data["thresholds_left"].astype(int).tolist()
+                calibration.thresholds_right = data["thresholds_right"].astype(int).tolist()
+                calibration.eye_positions = [tuple(p) for p in data["eye_positions"].tolist()]
+                calibration.screen_points = [tuple(p) for p in data["screen_points"].tolist()]
+                if "mapping" in data:
+                    calibration.mapping = tuple(data["mapping"])
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            # A damaged profile, the calibration starts over
+            return None
+
+        if not calibration.is_complete():
+            return None
+
+        calibration.nb_validation_frames = self.nb_validation_frames
+        calibration.validation_tolerance = self.validation_tolerance
+        return calibration
+
+    def delete(self, user="default", camera=0):
+        """Removes the stored profile of the user and camera, if any"""
+        path = self.path(user, camera)
+        if os.path.isfile(path):
+            os.remove(path)
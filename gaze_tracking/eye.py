@@ -4,53 +4,74 @@ import cv2
 from .pupil import Pupil
 
 
+class EyeBuffers(object):
+    """
+    This class keeps the scratch memory used to isolate an eye,
+    so it is allocated once instead of on every frame.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape):
+        """Returns a contiguous uint8 array of the given shape, backed by
+        memory that is reused across calls with the same name
+
+        Arguments:
+            name (str): Name of the buffer
+            shape (tuple): (height, width) of the array
+        """
+        size = shape[0] * shape[1]
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.size < size:
+            buffer = np.empty(size, np.uint8)
+            self._buffers[name] = buffer
+        return buffer[:size].reshape(shape)
+
+
 class Eye(object):
     """
     This class creates a new frame to isolate the eye and
     initiates the pupil detection.
     """
 
-    LEFT_EYE_POINTS = [36, 37, 38, 39, 40, 41]
-    RIGHT_EYE_POINTS = [42, 43, 44, 45, 46, 47]
-
-    def __init__(self, original_frame, landmarks, side, calibration):
+    def __init__(self, original_frame, landmarks, side, calibration, buffers=None):
+        """
+        Arguments:
+            original_frame (numpy.ndarray): Grayscale frame containing the face
+            landmarks (FaceLandmarks): Landmarks of the face, from any backend
+            side: 0 for left and 1 for right
+            calibration (Calibration): Threshold calibration of the pupil detection
+            buffers (EyeBuffers): Scratch memory to reuse between frames
+        """
         self.frame = None
         self.origin = None
         self.center = None
         self.pupil = None
 
-        self._analyze(original_frame, landmarks, side, calibration)
+        self._analyze(original_frame, landmarks, side, calibration, buffers)
 
     @staticmethod
     def _middle_point(p1, p2):
         """Returns the middle point (x,y) between two points
 
         Arguments:
-            p1 (dlib.point): First point
-            p2 (dlib.point): Second point
+            p1 (numpy.ndarray): First point
+            p2 (numpy.ndarray): Second point
         """
-        x = int((p1.x + p2.x) / 2)
-        y = int((p1.y + p2.y) / 2)
+        x = int((p1[0] + p2[0]) / 2)
+        y = int((p1[1] + p2[1]) / 2)
         return (x, y)
 
-    def _isolate(self, frame, landmarks, points):
+    def _isolate(self, frame, region, buffers=None):
         """Isolate an eye, to have a frame without other part of the face.
 
         Arguments:
             frame (numpy.ndarray): Frame containing the face
-            landmarks (dlib.full_object_detection): Facial landmarks for the face region
-            points (list): Points of an eye (from the 68 Multi-PIE landmarks)
+            region (numpy.ndarray): (6, 2) int32 contour of the eye
+            buffers (EyeBuffers): Scratch memory to reuse, the eye frame is then only
+                                  valid until the next frame is analyzed
         """
-        region = np.array([(landmarks.part(point).x, landmarks.part(point).y) for point in points])
-        region = region.astype(np.int32)
-
-        # Applying a mask to get only the eye
-        height, width = frame.shape[:2]
-        black_frame = np.zeros((height, width), np.uint8)
-        mask = np.full((height, width), 255, np.uint8)
-        cv2.fillPoly(mask, [region], (0, 0, 0))
-        eye = cv2.bitwise_not(black_frame, frame.copy(), mask=mask)
-
         # Cropping on the eye
         margin = 5
         min_x = np.min(region[:, 0]) - margin
@@ -58,43 +79,67 @@ class Eye(object):
         min_y = np.min(region[:, 1]) - margin
         max_y = np.max(region[:, 1]) + margin
 
-        self.frame = eye[min_y:max_y, min_x:max_x]
+        height, width = frame.shape[:2]
+        start_y, stop_y, _ = slice(min_y, max_y).indices(height)
+        start_x, stop_x, _ = slice(min_x, max_x).indices(width)
+        crop = frame[start_y:stop_y, start_x:stop_x]
+        shape = crop.shape[:2]
+
+        if buffers is None:
+            buffers = EyeBuffers()
+        eye = buffers.get("eye", shape)
+
+        # Applying a mask to get only the eye, only on the cropped area
+        if crop.size:
+            mask = buffers.get("mask", shape)
+            mask.fill(0)
+            cv2.fillPoly(mask, [region - (start_x, start_y)], 255)
+            eye.fill(255)
+            cv2.copyTo(crop, mask, eye)
+
+        self.frame = eye
         self.origin = (min_x, min_y)
 
         height, width = self.frame.shape[:2]
         self.center = (width / 2, height / 2)
 
-    def _blinking_ratio(self, landmarks, points):
+    def _blinking_ratio(self, region):
         """Calculates a ratio that can indicate whether an eye is closed or not.
         It's the division of the width of the eye, by its height.
 
-        Arguments:
-            landmarks (dlib.full_object_detection): Facial landmarks for the face region
-            points (list): Points of an eye (from the 68 Multi-PIE landmarks)
+        Argument:
+            region (numpy.ndarray): (6, 2) contour of the eye, in the order
+                                    of the 68 Multi-PIE landmarks
         """
-        left = (landmarks.part(points[0]).x, landmarks.part(points[0]).y)
-        right = (landmarks.part(points[3]).x, landmarks.part(points[3]).y)
-        top = self._middle_point(landmarks.part(points[1]), landmarks.part(points[2]))
-        bottom = self._middle_point(landmarks.part(points[5]), landmarks.part(points[4]))
+        left = region[0]
+        right = region[3]
+        top = self._middle_point(region[1], region[2])
+        bottom = self._middle_point(region[5], region[4])
 
         eye_width = math.hypot((left[0] - right[0]), (left[1] - right[1]))
         eye_height = math.hypot((top[0] - bottom[0]), (top[1] - bottom[1]))
 
         return eye_width / eye_height
 
-    def _analyze(self, original_frame, landmarks, side, calibration):
+    def _analyze(self, original_frame, landmarks, side, calibration, buffers=None):
         """Detects and isolates the eye in a new frame, sends data to the calibration
-        and initializes Pupil object
+        and initializes Pupil object. When the landmarks include the iris,
+        the pupil is placed on it and the threshold calibration is skipped.
         """
-        if side == 0:
-            points = self.LEFT_EYE_POINTS
-        elif side == 1:
-            points = self.RIGHT_EYE_POINTS
-        else:
+        if side not in (0, 1):
+            return
+
+        region = landmarks.eye(side)
+        self.blinking = self._blinking_ratio(region)
+        self._isolate(original_frame, region, buffers)
+
+        iris = landmarks.iris(side)
+        if iris is not None:
+            self.pupil = Pupil(self.frame, None, (iris[0] - self.origin[0], iris[1] - self.origin[1]))
             return
 
-        self.blinking = self._blinking_ratio(landmarks, points)
-        self._isolate(original_frame, landmarks, points)
+        if calibration.needs_validation():
+            calibration.validate(self.frame, side)
 
         if not calibration.is_complete():
             calibration.evaluate(self.frame, side)
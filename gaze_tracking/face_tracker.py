@@ -0,0 +1,251 @@
+import numpy as np
+import cv2
+from . import models
+
+
+def detect_faces(detector, frame, scale=1.0):
+    """Runs a dlib face detector on the frame downscaled by scale and returns
+    the boxes mapped back to pixels of the frame. The landmarks are then
+    found on the full resolution frame, inside these boxes.
+
+    Arguments:
+        detector: dlib.fhog_object_detector, from dlib.get_frontal_face_detector()
+        frame (numpy.ndarray): Grayscale frame
+        scale (float): Size of the frame searched, relative to the frame (0 < scale <= 1)
+    """
+    if scale >= 1.0:
+        return list(detector(np.ascontiguousarray(frame)))
+
+    import dlib
+
+    small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return [dlib.rectangle(int(face.left() / scale), int(face.top() / scale),
+                           int(face.right() / scale), int(face.bottom() / scale))
+            for face in detector(small)]
+
+
+class FaceTracker(object):
+    """
+    This class locates the face with the dlib HOG detector once, then
+    follows its box from frame to frame with a correlation tracker.
+    The detector only runs again on a padded area around the last box,
+    every few frames or when the track is lost.
+    """
+
+    FALLBACK_FULL = "full"
+    FALLBACK_NEXT_FRAME = "next_frame"
+
+    def __init__(self, detect_interval=10, padding=0.5, fallback=FALLBACK_FULL, min_confidence=7.0,
+                 detect_scale=1.0):
+        """
+        Arguments:
+            detect_interval (int): Frames between two detections while the face is tracked
+            padding (float): Margin added around the last box for the local search,
+                             as a fraction of the box size
+            fallback (str): What to do when the track is lost, FALLBACK_FULL searches
+                            the whole frame right away, FALLBACK_NEXT_FRAME reports no
+                            face and searches the whole frame on the next one
+            min_confidence (float): Peak to side lobe ratio below which the
+                                    correlation tracker is considered lost
+            detect_scale (float): Size of the frame the detector searches, relative
+                                  to the frame, 0.5 searches a frame half as wide.
+                                  The faces must stay larger than 80 pixels once scaled
+        """
+        if not 0 < detect_scale <= 1:
+            raise ValueError("detect_scale must be in (0, 1]: {}".format(detect_scale))
+        if fallback not in (self.FALLBACK_FULL, self.FALLBACK_NEXT_FRAME):
+            raise ValueError("Unknown fallback policy: {}".format(fallback))
+
+        self.detect_interval = max(1, detect_interval)
+        self.padding = padding
+        self.fallback = fallback
+        self.min_confidence = min_confidence
+        self.detect_scale = detect_scale
+
+        self.face = None
+        self.stats = {"full_detections": 0, "local_detections": 0, "tracked": 0, "lost": 0}
+
+        import dlib
+        self._tracker = dlib.correlation_tracker()
+        self._frames_since_detection = 0
+
+    def reset(self):
+        """Forgets the current track, the next frame runs a full detection"""
+        self.face = None
+
+    def _detect(self, frame, area=None):
+        """Runs the HOG detector on the frame, or on a part of it,
+        and returns the face closest to the last known box
+
+        Arguments:
+            frame (numpy.ndarray): Grayscale frame
+            area (tuple): (left, top, right, bottom) part of the frame to search
+        """
+        if area is None:
+            left, top = 0, 0
+            faces = detect_faces(models.face_detector(), frame, self.detect_scale)
+            self.stats["full_detections"] += 1
+        else:
+            left, top, right, bottom = area
+            if right - left <= 0 or bottom - top <= 0:
+                return None
+            faces = detect_faces(models.face_detector(), frame[top:bottom, left:right], self.detect_scale)
+            self.stats["local_detections"] += 1
+
+        if not faces:
+            return None
+
+        import dlib
+        faces = [dlib.translate_rect(face, dlib.point(left, top)) for face in faces]
+        if self.face is None:
+            return faces[0]
+        return max(faces, key=lambda face: self.face.intersect(face).area())
+
+    def _search_area(self, frame):
+        """Returns the last box grown by the padding and clipped to the frame"""
+        height, width = frame.shape[:2]
+        pad_x = int(self.face.width() * self.padding)
+        pad_y = int(self.face.height() * self.padding)
+        return (max(0, self.face.left() - pad_x), max(0, self.face.top() - pad_y),
+                min(width, self.face.right() + pad_x), min(height, self.face.bottom() + pad_y))
+
+    def _start_track(self, frame, face):
+        self.face = face
+        self._frames_since_detection = 0
+        if face is not None:
+            self._tracker.start_track(frame, face)
+
+    def _lost(self, frame):
+        self.stats["lost"] += 1
+        self.face = None
+        if self.fallback == self.FALLBACK_FULL:
+            self._start_track(frame, self._detect(frame))
+        return self.face
+
+    def locate(self, frame):
+        """Returns the face box (dlib.rectangle) in the frame, or None
+
+        Argument:
+            frame (numpy.ndarray): Grayscale frame
+        """
+        if self.face is None:
+            self._start_track(frame, self._detect(frame))
+            return self.face
+
+        self._frames_since_detection += 1
+        if self._frames_since_detection >= self.detect_interval:
+            face = self._detect(frame, self._search_area(frame))
+            if face is None:
+                return self._lost(frame)
+            self._start_track(frame, face)
+            return self.face
+
+        confidence = self._tracker.update(frame)
+        if confidence < self.min_confidence:
+            return self._lost(frame)
+
+        import dlib
+        position = self._tracker.get_position()
+        self.face = dlib.rectangle(int(round(position.left())), int(round(position.top())),
+                                   int(round(position.right())), int(round(position.bottom())))
+        self.stats["tracked"] += 1
+        return self.face
+
+
+class CascadeFaceSearch(object):
+    """
+    This class finds the face with an OpenCV Haar cascade. The first
+    search scans the whole frame, the next ones only a window around the
+    last box, for faces close to its size, and the whole frame is scanned
+    again on the frame the face is lost. The box can be handed to a dlib
+    shape predictor, so the face is located once per frame.
+    """
+
+    def __init__(self, cascade, scale_factor=1.15, min_neighbors=3, padding=0.5, size_range=(0.7, 1.4)):
+        """
+        Arguments:
+            cascade (cv2.CascadeClassifier): Loaded face cascade
+            scale_factor (float): Scale step of the cascade search
+            min_neighbors (int): Overlapping detections needed to keep a face
+            padding (float): Margin added around the last box for the window,
+                             as a fraction of the box size
+            size_range (tuple): (smallest, largest) face searched in the window,
+                                relative to the last box
+        """
+        if not 0 < size_range[0] <= 1 <= size_range[1]:
+            raise ValueError("size_range must hold 1: {}".format(size_range))
+
+        self.cascade = cascade
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.padding = padding
+        self.size_range = size_range
+
+        self.face = None
+        self.stats = {"full_scans": 0, "window_scans": 0, "lost": 0}
+
+    def reset(self):
+        """Forgets the last box, the next frame is scanned whole"""
+        self.face = None
+
+    @staticmethod
+    def _closest(faces, x, y):
+        """Returns the (x, y, w, h) box whose center is the closest to (x, y)"""
+        return min(faces, key=lambda face: (face[0] + face[2] / 2 - x) ** 2 + (face[1] + face[3] / 2 - y) ** 2)
+
+    def _scan(self, gray):
+        faces = self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors)
+        self.stats["full_scans"] += 1
+        if len(faces) == 0:
+            return None
+        height, width = gray.shape[:2]
+        return tuple(int(v) for v in self._closest(faces, width / 2, height / 2))
+
+    def _scan_window(self, gray):
+        x, y, w, h = self.face
+        height, width = gray.shape[:2]
+        pad_x, pad_y = int(w * self.padding), int(h * self.padding)
+        left, top = max(0, x - pad_x), max(0, y - pad_y)
+        right, bottom = min(width, x + w + pad_x), min(height, y + h + pad_y)
+
+        smallest = int(min(w, h) * self.size_range[0])
+        largest = min(int(max(w, h) * self.size_range[1]), right - left, bottom - top)
+        if largest < smallest:
+            return None
+
+        faces = self.cascade.detectMultiScale(gray[top:bottom, left:right], self.scale_factor, self.min_neighbors,
+                                              minSize=(smallest, smallest), maxSize=(largest, largest))
+        self.stats["window_scans"] += 1
+        if len(faces) == 0:
+            return None
+        fx, fy, fw, fh = self._closest(faces, x - left + w / 2, y - top + h / 2)
+        return int(fx) + left, int(fy) + top, int(fw), int(fh)
+
+    def find(self, gray):
+        """Returns the face box (x, y, w, h) in the frame, or None
+
+        Argument:
+            gray (numpy.ndarray): Grayscale frame
+        """
+        if self.face is not None:
+            face = self._scan_window(gray)
+            if face is not None:
+                self.face = face
+                return face
+            self.stats["lost"] += 1
+        self.face = self._scan(gray)
+        return self.face
+
+    @staticmethod
+    def corners(face, scale=1.0):
+        """Returns the (left, top, right, bottom) corners of an (x, y, w, h) box
+        found on a frame resized by scale, in pixels of the full resolution frame"""
+        x, y, w, h = face
+        return int(x / scale), int(y / scale), int((x + w) / scale), int((y + h) / scale)
+
+    @staticmethod
+    def rectangle(face, scale=1.0):
+        """Returns an (x, y, w, h) box found on a frame resized by scale
+        as a dlib.rectangle in pixels of the full resolution frame"""
+        import dlib
+        return dlib.rectangle(*CascadeFaceSearch.corners(face, scale))
@@ -0,0 +1,175 @@
+import math
+import numpy as np
+
+
+class MotionFilter(object):
+    """
+    Base class of the cursor filters. A filter smooths (x, y) positions
+    given with their capture timestamps, so a dropped frame is a longer
+    time step instead of a missing one, and can predict where the
+    position will be after the latency of the pipeline.
+    """
+
+    def __init__(self):
+        self.position = None
+        self.velocity = np.zeros(2)
+        self.timestamp = None
+
+    def reset(self):
+        """Forgets the past positions, the next one is taken as is"""
+        self.position = None
+        self.velocity = np.zeros(2)
+        self.timestamp = None
+
+    def _update(self, measurement, dt):
+        raise NotImplementedError
+
+    def update(self, x, y, timestamp):
+        """Adds a measured position and returns the filtered one
+
+        Arguments:
+            x (float): Measured x
+            y (float): Measured y
+            timestamp (float): Monotonic capture time of the measurement, in seconds
+        """
+        measurement = np.array((x, y), np.float64)
+        if self.position is None:
+            self.position = measurement
+        else:
+            dt = timestamp - self.timestamp
+            if dt > 0:
+                self._update(measurement, dt)
+        self.timestamp = timestamp
+        return float(self.position[0]), float(self.position[1])
+
+    def predict(self, latency):
+        """Returns the filtered position extrapolated latency seconds after
+        the last measurement, or None before the first one
+
+        Argument:
+            latency (float): Seconds between the capture and the use of the position
+        """
+        if self.position is None:
+            return None
+        x, y = self.position + self.velocity * max(0.0, latency)
+        return float(x), float(y)
+
+
+class EmaFilter(MotionFilter):
+    """
+    Exponential moving average, the former cursor smoothing, kept as the
+    baseline. alpha is the weight of a new position at the reference rate,
+    it is adjusted to the real time step. It does not estimate the
+    velocity so it does not predict.
+    """
+
+    def __init__(self, alpha=0.1, rate=30.0):
+        """
+        Arguments:
+            alpha (float): Weight of a new position at the reference rate (0 < alpha < 1)
+            rate (float): Reference rate alpha was tuned for, in frames per second
+        """
+        super(EmaFilter, self).__init__()
+        self.alpha = alpha
+        self.rate = rate
+
+    def _update(self, measurement, dt):
+        alpha = 1.0 - (1.0 - self.alpha) ** (dt * self.rate)
+        self.position = alpha * measurement + (1.0 - alpha) * self.position
+
+
+class OneEuroFilter(MotionFilter):
+    """
+    One Euro filter (Casiez et al., CHI 2012): a low-pass filter whose
+    cutoff frequency grows with the speed, so a still cursor does not
+    jitter and a moving one does not lag.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.007, d_cutoff=1.0):
+        """
+        Arguments:
+            min_cutoff (float): Cutoff frequency at rest, in Hz, lower for less jitter
+            beta (float): Increase of the cutoff per unit of speed, higher for less lag
+            d_cutoff (float): Cutoff frequency of the speed estimate, in Hz
+        """
+        super(OneEuroFilter, self).__init__()
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def _update(self, measurement, dt):
+        raw_velocity = (measurement - self.position) / dt
+        alpha_d = self._alpha(self.d_cutoff, dt)
+        self.velocity = alpha_d * raw_velocity + (1.0 - alpha_d) * self.velocity
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self.velocity)
+        alpha = self._alpha(cutoff, dt)
+        self.position = alpha * measurement + (1.0 - alpha) * self.position
+
+
+class KalmanFilter(MotionFilter):
+    """
+    Constant velocity Kalman filter, one independent (position, velocity)
+    state per axis. The process noise is a random acceleration, the
+    matrices are computed from each real time step.
+    """
+
+    def __init__(self, acceleration=2000.0, noise=10.0):
+        """
+        Arguments:
+            acceleration (float): Standard deviation of the unpredicted acceleration,
+                                  in units per second squared, higher for less lag
+            noise (float): Standard deviation of the measurement noise, in units,
+                           higher for less jitter
+        """
+        super(KalmanFilter, self).__init__()
+        self.acceleration = acceleration
+        self.noise = noise
+        self._covariance = None
+
+    def reset(self):
+        super(KalmanFilter, self).reset()
+        self._covariance = None
+
+    def _update(self, measurement, dt):
+        if self._covariance is None:
+            # Position known up to the measurement noise, velocity unknown
+            self._covariance = np.array([[self.noise ** 2, 0.0], [0.0, 1e6]])
+
+        # Prediction, the same 2x2 covariance serves both axes
+        transition = np.array([[1.0, dt], [0.0, 1.0]])
+        q = self.acceleration ** 2
+        process = q * np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+        position = self.position + self.velocity * dt
+        covariance = transition @ self._covariance @ transition.T + process
+
+        # Correction with the measured position
+        gain = covariance[:, 0] / (covariance[0, 0] + self.noise ** 2)
+        innovation = measurement - position
+        self.position = position + gain[0] * innovation
+        self.velocity = self.velocity + gain[1] * innovation
+        self._covariance = covariance - np.outer(gain, covariance[0])
+
+
+FILTERS = {
+    "ema": EmaFilter,
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def make_filter(name, **kwargs):
+    """Returns a new filter from its name in FILTERS
+
+    Arguments:
+        name (str): "ema", "one_euro" or "kalman"
+        kwargs: Parameters of the filter
+    """
+    if name not in FILTERS:
+        raise ValueError("Unknown filter: {}".format(name))
+    return FILTERS[name](**kwargs)
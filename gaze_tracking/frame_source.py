@@ -0,0 +1,314 @@
+import glob
+import os
+import threading
+import time
+import cv2
+
+
+class FrameRing(object):
+    """
+    This class is a small ring buffer shared between a capture thread
+    and a consumer. The consumer always gets the newest frame, frames
+    that were overwritten before being read are counted as dropped.
+    """
+
+    def __init__(self, capacity=2, lossless=False):
+        self.capacity = max(1, capacity)
+        self.lossless = lossless
+        self.frames_written = 0
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.closed = False
+
+        self._slots = [None] * self.capacity
+        self._head = 0
+        self._count = 0
+        self._condition = threading.Condition()
+
+    def put(self, frame, timestamp):
+        """Stores a frame, overwriting the oldest one when the buffer is full.
+        In lossless mode the writer waits for room instead of overwriting.
+
+        Arguments:
+            frame (numpy.ndarray): Frame to store
+            timestamp (float): Monotonic capture time of the frame
+        """
+        with self._condition:
+            if self.lossless:
+                while self._count == self.capacity and not self.closed:
+                    self._condition.wait()
+            if self.closed:
+                return
+
+            tail = (self._head + self._count) % self.capacity
+            self._slots[tail] = (frame, timestamp)
+            if self._count == self.capacity:
+                self._head = (self._head + 1) % self.capacity
+                self.frames_dropped += 1
+            else:
+                self._count += 1
+            self.frames_written += 1
+            self._condition.notify_all()
+
+    def get(self, timeout=None):
+        """Returns the newest (frame, timestamp) pair and drops the older ones.
+        In lossless mode the oldest pair is returned instead and nothing is dropped.
+        Returns None when the buffer is closed and empty, or on timeout.
+
+        Arguments:
+            timeout (float): Seconds to wait for a frame, None waits forever
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._count or self.closed, timeout):
+                return None
+            if not self._count:
+                return None
+
+            if self.lossless:
+                item = self._slots[self._head]
+                self._slots[self._head] = None
+                self._head = (self._head + 1) % self.capacity
+                self._count -= 1
+            else:
+                newest = (self._head + self._count - 1) % self.capacity
+                item = self._slots[newest]
+                self.frames_dropped += self._count - 1
+                self._slots = [None] * self.capacity
+                self._head = 0
+                self._count = 0
+
+            self.frames_read += 1
+            self._condition.notify_all()
+            return item
+
+    def close(self):
+        """Wakes up every waiting reader and writer, no more frames will be stored"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class FrameSource(object):
+    """
+    Base class of the frame sources. A capture thread reads frames
+    from the underlying device or file and writes them into a FrameRing,
+    so grabbing a frame never waits on the camera driver.
+
+    Subclasses implement _open(), _grab() and _close().
+    """
+
+    lossless = False
+
+    def __init__(self, buffer_size=2):
+        self.ring = FrameRing(buffer_size, lossless=self.lossless)
+        self.timestamp = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def _open(self):
+        """Opens the underlying device or file"""
+        raise NotImplementedError
+
+    def _grab(self):
+        """Returns the next frame, or None at the end of the stream"""
+        raise NotImplementedError
+
+    def _close(self):
+        """Releases the underlying device or file"""
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                frame = self._grab()
+                if frame is None:
+                    break
+                self.ring.put(frame, time.monotonic())
+        finally:
+            self._close()
+            self.ring.close()
+
+    def start(self):
+        """Opens the source and starts the capture thread"""
+        if self._thread is None:
+            self._open()
+            self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+            self._thread.start()
+        return self
+
+    def read(self, timeout=None):
+        """Returns (True, frame) with the newest frame, like cv2.VideoCapture.read(),
+        or (False, None) once the stream is over.
+
+        Argument:
+            timeout (float): Seconds to wait for a frame, None waits forever
+        """
+        self.start()
+        item = self.ring.get(timeout)
+        if item is None:
+            return False, None
+
+        frame, self.timestamp = item
+        return True, frame
+
+    def release(self):
+        """Stops the capture thread and releases the source"""
+        self._stop_event.set()
+        self.ring.close()
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def frames_dropped(self):
+        """Number of captured frames that were never handed to the consumer"""
+        return self.ring.frames_dropped
+
+    def __iter__(self):
+        while True:
+            ok, frame = self.read()
+            if not ok:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class CameraSource(FrameSource):
+    """
+    Captures frames from a webcam. Stale frames are dropped so the
+    consumer always works on what the camera sees right now.
+    """
+
+    def __init__(self, index=0, width=None, height=None, buffer_size=2):
+        super(CameraSource, self).__init__(buffer_size)
+        self.index = index
+        self.width = width
+        self.height = height
+        self._capture = None
+
+    def _open(self):
+        self._capture = cv2.VideoCapture(self.index)
+        if not self._capture.isOpened():
+            raise IOError("Unable to open camera {}".format(self.index))
+        # Keep as few frames as possible queued in the driver
+        self._capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if self.width:
+            self._capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        if self.height:
+            self._capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+
+    def _grab(self):
+        ok, frame = self._capture.read()
+        return frame if ok else None
+
+    def _close(self):
+        self._capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """
+    Reads frames from a recorded video file. By default every frame
+    is delivered, set realtime to replay the file at its own frame rate
+    and drop frames like a camera would.
+    """
+
+    def __init__(self, path, realtime=False, buffer_size=4):
+        self.lossless = not realtime
+        super(VideoFileSource, self).__init__(buffer_size)
+        self.path = path
+        self.realtime = realtime
+        self._capture = None
+        self._interval = 0
+        self._next_time = None
+
+    def _open(self):
+        self._capture = cv2.VideoCapture(self.path)
+        if not self._capture.isOpened():
+            raise IOError("Unable to open video file {}".format(self.path))
+        fps = self._capture.get(cv2.CAP_PROP_FPS)
+        self._interval = 1.0 / fps if fps > 0 else 0
+
+    def _grab(self):
+        if self.realtime and self._interval:
+            now = time.monotonic()
+            if self._next_time is None:
+                self._next_time = now
+            elif self._next_time > now:
+                time.sleep(self._next_time - now)
+            self._next_time += self._interval
+
+        ok, frame = self._capture.read()
+        return frame if ok else None
+
+    def _close(self):
+        self._capture.release()
+
+
+class ImageSequenceSource(FrameSource):
+    """
+    Reads frames from a directory or a glob pattern of still images,
+    in file name order. Every image is delivered unless fps is given,
+    in which case the sequence is replayed like a camera.
+    """
+
+    EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+    def __init__(self, pattern, fps=None, loop=False, buffer_size=4):
+        self.lossless = not fps
+        super(ImageSequenceSource, self).__init__(buffer_size)
+        self.pattern = pattern
+        self.fps = fps
+        self.loop = loop
+        self._paths = []
+        self._position = 0
+        self._next_time = None
+
+    def _open(self):
+        if os.path.isdir(self.pattern):
+            paths = [os.path.join(self.pattern, name) for name in os.listdir(self.pattern)]
+        else:
+            paths = glob.glob(self.pattern)
+        self._paths = sorted(p for p in paths if p.lower().endswith(self.EXTENSIONS))
+        if not self._paths:
+            raise IOError("No images found for {}".format(self.pattern))
+
+    def _grab(self):
+        if self._position >= len(self._paths):
+            if not self.loop:
+                return None
+            self._position = 0
+
+        if self.fps:
+            now = time.monotonic()
+            if self._next_time is None:
+                self._next_time = now
+            elif self._next_time > now:
+                time.sleep(self._next_time - now)
+            self._next_time += 1.0 / self.fps
+
+        path = self._paths[self._position]
+        self._position += 1
+        frame = cv2.imread(path)
+        if frame is None:
+            raise IOError("Unable to read image {}".format(path))
+        return frame
+
+
+def open_source(spec=0, **kwargs):
+    """Returns a started frame source for the given specification:
+    a camera index, a video file, a directory of images or a glob pattern.
+
+    Arguments:
+        spec (int or str): What to read frames from
+        kwargs: Extra arguments for the selected source
+    """
+    if isinstance(spec, int) or str(spec).isdigit():
+        source = CameraSource(int(spec), **kwargs)
+    elif os.path.isdir(spec) or glob.has_magic(spec):
+        source = ImageSequenceSource(spec, **kwargs)
+    else:
+        source = VideoFileSource(spec, **kwargs)
+    return source.start()
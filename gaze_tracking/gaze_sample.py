@@ -0,0 +1,72 @@
+from collections import namedtuple
+
+
+class GazeSample(namedtuple("GazeSample", [
+        "timestamp", "pupil_left", "pupil_right", "horizontal_ratio", "vertical_ratio", "blinking_ratio",
+        "blinking_left", "blinking_right"], defaults=(None, None))):
+    """
+    Immutable result of the analysis of one frame. Every value is
+    computed once by GazeTracking.refresh(), the fields are None
+    when the pupils could not be located. The blinking ratio is
+    available as soon as the eyes are found.
+
+    Fields:
+        timestamp (float): Monotonic time of the frame, in seconds
+        pupil_left (tuple): (x, y) of the left pupil in the frame
+        pupil_right (tuple): (x, y) of the right pupil in the frame
+        horizontal_ratio (float): 0.0 is extreme right, 0.5 center, 1.0 extreme left
+        vertical_ratio (float): 0.0 is extreme top, 0.5 center, 1.0 extreme bottom
+        blinking_ratio (float): Width of the eyes divided by their height
+        blinking_left (float): Same ratio for the left eye alone
+        blinking_right (float): Same ratio for the right eye alone
+    """
+
+    __slots__ = ()
+
+    BLINKING_THRESHOLD = 3.8
+    RIGHT_THRESHOLD = 0.35
+    LEFT_THRESHOLD = 0.65
+
+    @property
+    def pupils_located(self):
+        """True if both pupils were located on the frame"""
+        return self.pupil_left is not None
+
+    @property
+    def is_right(self):
+        """True if the user is looking to the right, None if the pupils are not located"""
+        if self.pupils_located:
+            return self.horizontal_ratio <= self.RIGHT_THRESHOLD
+
+    @property
+    def is_left(self):
+        """True if the user is looking to the left, None if the pupils are not located"""
+        if self.pupils_located:
+            return self.horizontal_ratio >= self.LEFT_THRESHOLD
+
+    @property
+    def is_center(self):
+        """True if the user is looking to the center, None if the pupils are not located"""
+        if self.pupils_located:
+            return self.RIGHT_THRESHOLD < self.horizontal_ratio < self.LEFT_THRESHOLD
+
+    @property
+    def is_blinking(self):
+        """True if the user closes their eyes, None if the pupils are not located"""
+        if self.pupils_located:
+            return self.blinking_ratio > self.BLINKING_THRESHOLD
+
+    @property
+    def left_closed(self):
+        """True if the left eye is closed, None if the eyes are not found"""
+        if self.blinking_left is not None:
+            return self.blinking_left > self.BLINKING_THRESHOLD
+
+    @property
+    def right_closed(self):
+        """True if the right eye is closed, None if the eyes are not found"""
+        if self.blinking_right is not None:
+            return self.blinking_right > self.BLINKING_THRESHOLD
+
+
+GazeSample.EMPTY = GazeSample(None, None, None, None, None, None)
@@ -1,9 +1,12 @@
-import os
+import time
+import numpy as np
 import cv2
-import dlib
-from .eye import Eye
-import pyautogui
+from .eye import Eye, EyeBuffers
 from .calibration import Calibration
+from .gaze_sample import GazeSample
+from .landmarks import DlibBackend
+from .metrics import NULL_METRICS
+from .overlay import OverlayRenderer
 
 
 class GazeTracking(object):
@@ -13,132 +16,250 @@ class GazeTracking(object):
     and the pupil and allows to know if the eyes are open or closed
     """
 
-    def __init__(self):
+    def __init__(self, face_tracker=None, calibration_store=None, user="default", camera=0, backend=None,
+                 metrics=None, activity=None, screen_size=None):
+        """
+        Arguments:
+            face_tracker (FaceTracker): Follows the face between frames instead of
+                                        running the detector on every full frame,
+                                        used by the default dlib backend
+            calibration_store (CalibrationStore): Where the calibration of the user is
+                                                  loaded from and saved to once completed
+            user (str): Name of the user, for the calibration profile
+            camera (int or str): Camera in use, for the calibration profile
+            backend (LandmarkBackend): Finds the face landmarks, DlibBackend by default
+            metrics (Metrics): Receives the time spent in each stage, disabled by default
+            activity (ActivityGate): Skips frames while nobody is there and reuses the
+                                     pupils of still eyes, every frame is processed
+                                     in full by default
+            screen_size (tuple): (width, height) of the screen for the gaze point,
+                                 asked to pyautogui on first use by default
+        """
         self.frame = None
+        self.landmarks = None
         self.eye_left = None
         self.eye_right = None
-        self.calibration = Calibration()
+        self.sample = GazeSample.EMPTY
+        self._screen_size = screen_size
+
+        self.calibration_store = calibration_store
+        self._profile = (user, camera)
+        self.calibration = None
+        if calibration_store is not None:
+            self.calibration = calibration_store.load(user, camera)
+        self._calibration_saved = self.calibration is not None
+        if self.calibration is None:
+            self.calibration = Calibration()
 
-        # _face_detector is used to detect faces
-        self._face_detector = dlib.get_frontal_face_detector()
+        # Scratch memory reused to isolate each eye, one set per side
+        self._eye_buffers = (EyeBuffers(), EyeBuffers())
 
-        # _predictor is used to get facial landmarks of a given face
-        cwd = os.path.abspath(os.path.dirname(__file__))
-        model_path = os.path.abspath(os.path.join(cwd, "trained_models/shape_predictor_68_face_landmarks.dat"))
-        self._predictor = dlib.shape_predictor(model_path)
+        # backend finds the face and its landmarks, once per frame
+        self.backend = backend if backend is not None else DlibBackend(face_tracker)
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.activity = activity
 
     @property
     def pupils_located(self):
         """Check that the pupils have been located"""
-        try:
-            int(self.eye_left.pupil.x)
-            int(self.eye_left.pupil.y)
-            int(self.eye_right.pupil.x)
-            int(self.eye_right.pupil.y)
-            return True
-        except Exception:
-            return False
-
-    def _analyze(self):
-        """Detects the face and initializes Eye objects"""
-        frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
-        faces = self._face_detector(frame)
+        return self.sample.pupils_located
 
+    def _pupil_coords(self, eye):
+        """Returns the coordinates of the pupil of an eye in the frame, or None"""
         try:
-            landmarks = self._predictor(frame, faces[0])
-            self.eye_left = Eye(frame, landmarks, 0, self.calibration)
-            self.eye_right = Eye(frame, landmarks, 1, self.calibration)
+            return (int(eye.origin[0] + eye.pupil.x), int(eye.origin[1] + eye.pupil.y))
+        except (AttributeError, TypeError):
+            return None
+
+    def _sample(self, timestamp):
+        """Computes every value derived from the eyes of the current frame"""
+        left, right = self.eye_left, self.eye_right
+        if left is None or right is None:
+            return GazeSample(timestamp, None, None, None, None, None)
+
+        blinking_ratio = (left.blinking + right.blinking) / 2
+        pupil_left = self._pupil_coords(left)
+        pupil_right = self._pupil_coords(right)
+        if pupil_left is None or pupil_right is None:
+            return GazeSample(timestamp, None, None, None, None, blinking_ratio, left.blinking, right.blinking)
 
-        except IndexError:
+        horizontal_ratio = (left.pupil.x / (left.center[0] * 2 - 10) + right.pupil.x / (right.center[0] * 2 - 10)) / 2
+        vertical_ratio = (left.pupil.y / (left.center[1] * 2 - 10) + right.pupil.y / (right.center[1] * 2 - 10)) / 2
+        return GazeSample(timestamp, pupil_left, pupil_right, horizontal_ratio, vertical_ratio, blinking_ratio,
+                          left.blinking, right.blinking)
+
+    def _eye(self, gray, landmarks, side):
+        """Returns the Eye of a side, the one of the previous frame if the
+        activity gate finds that its pixels did not change"""
+        previous = (self.eye_left, self.eye_right)[side]
+        if self.activity is not None and self.activity.eye_still(side, gray, landmarks.eye(side)):
+            if previous is not None:
+                self.metrics.increment("pupils_reused")
+                return previous
+        return Eye(gray, landmarks, side, self.calibration, self._eye_buffers[side])
+
+    def find_landmarks(self, frame, timestamp=None):
+        """Converts the frame to grayscale and finds the face landmarks.
+        This is the first half of refresh(), it only uses the backend so it
+        can run on another thread than analyze().
+
+        Arguments:
+            frame (numpy.ndarray): BGR frame to analyze
+            timestamp (float): Monotonic capture time of the frame, now by default
+
+        Returns:
+            (grayscale frame, FaceLandmarks or None), (None, None) when the
+            activity gate is idle and skips the frame
+        """
+        metrics = self.metrics
+        activity = self.activity
+        if activity is not None:
+            if timestamp is None:
+                timestamp = time.monotonic()
+            if not activity.should_search(frame, timestamp):
+                metrics.increment("frames_idle")
+                return None, None
+
+        with metrics.time("grayscale"):
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        with metrics.time("landmarks"):
+            landmarks = self.backend.process(frame, gray)
+
+        if activity is not None:
+            activity.face_found(landmarks is not None, timestamp)
+            metrics.set("idle", int(activity.idle))
+        return gray, landmarks
+
+    def analyze(self, frame, gray, landmarks, timestamp=None):
+        """Initializes Eye objects from landmarks found by find_landmarks()
+        and computes the gaze sample of the frame.
+
+        Arguments:
+            frame (numpy.ndarray): BGR frame the landmarks were found on
+            gray (numpy.ndarray): Same frame in grayscale, None if the activity gate skipped it
+            landmarks (FaceLandmarks): Landmarks of the face, or None
+            timestamp (float): Monotonic capture time of the frame, now by default
+        """
+        self.frame = frame
+        self.landmarks = landmarks
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        if gray is None:
+            # Skipped by the activity gate, find_landmarks() counted it as idle
             self.eye_left = None
             self.eye_right = None
+            self.sample = GazeSample(timestamp, None, None, None, None, None)
+            return self.sample
 
-    def refresh(self, frame):
-        """Refresh the frame and analyzes it."""
-        self.frame = frame
-        self._analyze()
+        metrics = self.metrics
+        metrics.increment("frames_processed")
+
+        if landmarks is None:
+            metrics.increment("faces_lost")
+            self.eye_left = None
+            self.eye_right = None
+        else:
+            with metrics.time("pupils"):
+                self.eye_left = self._eye(gray, landmarks, 0)
+                self.eye_right = self._eye(gray, landmarks, 1)
+
+        self.sample = self._sample(timestamp)
+        self._store_calibration()
+        return self.sample
+
+    def refresh(self, frame, timestamp=None):
+        """Refresh the frame and analyzes it.
+
+        Arguments:
+            frame (numpy.ndarray): BGR frame to analyze
+            timestamp (float): Monotonic capture time of the frame, now by default
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        gray, landmarks = self.find_landmarks(frame, timestamp)
+        return self.analyze(frame, gray, landmarks, timestamp)
+
+    def _store_calibration(self):
+        """Saves the calibration profile once it is completed and checked"""
+        if self.calibration_store is None:
+            return
+
+        if not self.calibration.is_complete():
+            self._calibration_saved = False
+        elif not self._calibration_saved and not self.calibration.needs_validation():
+            self.calibration_store.save(self.calibration, *self._profile)
+            self._calibration_saved = True
 
     def pupil_left_coords(self):
         """Returns the coordinates of the left pupil"""
-        if self.pupils_located:
-            x = self.eye_left.origin[0] + self.eye_left.pupil.x
-            y = self.eye_left.origin[1] + self.eye_left.pupil.y
-            return (x, y)
+        return self.sample.pupil_left
 
     def pupil_right_coords(self):
         """Returns the coordinates of the right pupil"""
-        if self.pupils_located:
-            x = self.eye_right.origin[0] + self.eye_right.pupil.x
-            y = self.eye_right.origin[1] + self.eye_right.pupil.y
-            return (x, y)
+        return self.sample.pupil_right
 
     def horizontal_ratio(self):
         """Returns a number between 0.0 and 1.0 that indicates the
         horizontal direction of the gaze. The extreme right is 0.0,
         the center is 0.5, and the extreme left is 1.0
         """
-        if self.pupils_located:
-            pupil_left = self.eye_left.pupil.x / (self.eye_left.center[0] * 2 - 10)
-            pupil_right = self.eye_right.pupil.x / (self.eye_right.center[0] * 2 - 10)
-            return (pupil_left + pupil_right) / 2
+        return self.sample.horizontal_ratio
 
     def vertical_ratio(self):
         """Returns a number between 0.0 and 1.0 that indicates the
         vertical direction of the gaze. The extreme top is 0.0,
         the center is 0.5, and the extreme bottom is 1.0
         """
-        if self.pupils_located:
-            pupil_left = self.eye_left.pupil.y / (self.eye_left.center[1] * 2 - 10)
-            pupil_right = self.eye_right.pupil.y / (self.eye_right.center[1] * 2 - 10)
-            return (pupil_left + pupil_right) / 2
+        return self.sample.vertical_ratio
 
     def is_right(self):
         """Returns true if the user is looking to the right"""
-        if self.pupils_located:
-            return self.horizontal_ratio() <= 0.35
+        return self.sample.is_right
 
     def is_left(self):
         """Returns true if the user is looking to the left"""
-        if self.pupils_located:
-            return self.horizontal_ratio() >= 0.65
+        return self.sample.is_left
 
     def is_center(self):
         """Returns true if the user is looking to the center"""
-        if self.pupils_located:
-            return not self.is_right() and not self.is_left()
+        return self.sample.is_center
 
     def is_blinking(self):
         """Returns true if the user closes his eyes"""
-        if self.pupils_located:
-            blinking_ratio = (self.eye_left.blinking + self.eye_right.blinking) / 2
-            return blinking_ratio > 3.8
+        return self.sample.is_blinking
+
+    def annotated_frame(self, out=None):
+        """Returns the main frame with pupils highlighted
 
-    def annotated_frame(self):
-        """Returns the main frame with pupils highlighted"""
-        frame = self.frame.copy()
+        Argument:
+            out (numpy.ndarray): Buffer of the frame shape to draw into, which can be
+                                 reused between frames or be the frame itself to draw
+                                 in place. A new copy of the frame by default.
+        """
+        if out is None:
+            out = self.frame.copy()
+        elif out is not self.frame:
+            np.copyto(out, self.frame)
 
         if self.pupils_located:
-            color = (0, 255, 0)
-            x_left, y_left = self.pupil_left_coords()
-            x_right, y_right = self.pupil_right_coords()
-            cv2.line(frame, (x_left - 5, y_left), (x_left + 5, y_left), color)
-            cv2.line(frame, (x_left, y_left - 5), (x_left, y_left + 5), color)
-            cv2.line(frame, (x_right - 5, y_right), (x_right + 5, y_right), color)
-            cv2.line(frame, (x_right, y_right - 5), (x_right, y_right + 5), color)
-
-        return frame
-    
+            pupils = (self.sample.pupil_left, self.sample.pupil_right)
+            OverlayRenderer.draw_markers(out, pupils, size=5, color=(0, 255, 0), thickness=1, shape="+")
+
+        return out
+
     def get_gaze_point(self):
         """Returns the coordinates on the screen where the user is looking."""
-        screen_width, screen_height = pyautogui.size()
-
-        if self.pupils_located:
-            horizontal_ratio = self.horizontal_ratio()
-            vertical_ratio = self.vertical_ratio()
+        if self._screen_size is None:
+            import pyautogui
+            self._screen_size = pyautogui.size()
+        screen_width, screen_height = self._screen_size
 
+        sample = self.sample
+        if sample.pupils_located:
             # Calculate screen coordinates
-            x_coord = int(horizontal_ratio * screen_width)
-            y_coord = int(vertical_ratio * screen_height)
+            x_coord = int(sample.horizontal_ratio * screen_width)
+            y_coord = int(sample.vertical_ratio * screen_height)
 
             return (x_coord, y_coord)
 
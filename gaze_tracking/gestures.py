@@ -0,0 +1,151 @@
+from collections import namedtuple
+
+
+class GestureEvent(namedtuple("GestureEvent", ["timestamp", "action", "button", "gesture"])):
+    """
+    Discrete event emitted by BlinkGestures.
+
+    Fields:
+        timestamp (float): Monotonic time of the frame that triggered it
+        action (str): "click", "double_click", "press" or "release"
+        button (int): Mouse button, Actuator.LEFT, RIGHT or MIDDLE
+        gesture (str): "left", "right" or "both", the eyes that were closed
+    """
+
+    __slots__ = ()
+
+
+class BlinkGestures(object):
+    """
+    This class turns the per-frame state of the eyes into discrete mouse
+    events, without ever waiting: it only compares monotonic timestamps.
+
+    A closure counts once it lasted the debounce window, and ends as a
+    click of the button bound to the closed eyes when they open again.
+    A closure held for the long press window presses the button instead,
+    and releases it when the eyes open. After an event, new closures are
+    ignored for the refractory window. Eyes closing one after the other
+    make a "both" gesture.
+    """
+
+    LEFT, RIGHT, BOTH = "left", "right", "both"
+    CLICK, DOUBLE_CLICK, PRESS, RELEASE = "click", "double_click", "press", "release"
+
+    # Same values as Actuator.LEFT and Actuator.RIGHT
+    LEFT_BUTTON, RIGHT_BUTTON = 0, 1
+
+    DEFAULT_BINDINGS = {
+        LEFT: (CLICK, LEFT_BUTTON),
+        RIGHT: (CLICK, RIGHT_BUTTON),
+        BOTH: (CLICK, LEFT_BUTTON),
+    }
+
+    def __init__(self, bindings=None, debounce=0.1, refractory=0.5, long_press=1.0, actuator=None):
+        """
+        Arguments:
+            bindings (dict): Maps "left", "right" and "both" to an (action, button)
+                             pair, action being "click" or "double_click". A gesture
+                             left out is ignored. DEFAULT_BINDINGS by default
+            debounce (float): Seconds a closure must last to count
+            refractory (float): Seconds after an event during which closures are ignored
+            long_press (float): Seconds after which a closure presses the button,
+                                None to only click
+            actuator (Actuator): Receives the events as they are emitted, if given
+        """
+        self.bindings = dict(self.DEFAULT_BINDINGS if bindings is None else bindings)
+        self.debounce = debounce
+        self.refractory = refractory
+        self.long_press = long_press
+        self.actuator = actuator
+
+        self.events_emitted = 0
+        self.reset()
+
+    def reset(self):
+        """Forgets the current closure and the refractory window, call release()
+        on the actuator first if a long closure pressed a button"""
+        self._closed_since = None
+        self._gesture = None
+        self._pressed = None
+        self._quiet_until = float("-inf")
+        self._ignoring = False
+
+    def _emit(self, events, timestamp, action, button, gesture):
+        event = GestureEvent(timestamp, action, button, gesture)
+        events.append(event)
+        self.events_emitted += 1
+        if self.actuator is not None:
+            getattr(self.actuator, action)(button)
+
+    def _end(self, events, timestamp, counted):
+        """Ends the current closure, with its click or release if counted"""
+        if self._pressed is not None:
+            self._emit(events, timestamp, self.RELEASE, self._pressed, self._gesture)
+            self._quiet_until = timestamp + self.refractory
+        elif counted and self._gesture in self.bindings:
+            action, button = self.bindings[self._gesture]
+            self._emit(events, timestamp, action, button, self._gesture)
+            self._quiet_until = timestamp + self.refractory
+
+        self._closed_since = None
+        self._gesture = None
+        self._pressed = None
+
+    def update(self, left_closed, right_closed, timestamp):
+        """Adds the state of the eyes on a frame and returns the events it triggers
+
+        Arguments:
+            left_closed (bool): True if the left eye is closed, None if unknown
+            right_closed (bool): True if the right eye is closed, None if unknown
+            timestamp (float): Monotonic capture time of the frame, in seconds
+
+        Returns:
+            List of GestureEvent, most often empty
+        """
+        events = []
+
+        if left_closed is None or right_closed is None:
+            # The face was lost, a closure can not be told from a look away
+            if self._closed_since is not None:
+                self._end(events, timestamp, counted=False)
+            return events
+
+        if left_closed and right_closed:
+            gesture = self.BOTH
+        elif left_closed:
+            gesture = self.LEFT
+        elif right_closed:
+            gesture = self.RIGHT
+        else:
+            gesture = None
+
+        if gesture is None:
+            self._ignoring = False
+            if self._closed_since is not None:
+                counted = timestamp - self._closed_since >= self.debounce
+                self._end(events, timestamp, counted)
+            return events
+
+        if self._closed_since is None:
+            # A closure started during the refractory window is ignored until the eyes open
+            if self._ignoring or timestamp < self._quiet_until:
+                self._ignoring = True
+                return events
+            self._closed_since = timestamp
+            self._gesture = gesture
+        elif gesture != self._gesture and self._pressed is None:
+            # One eye then both, or the other one: the closure becomes a both-eye gesture
+            self._gesture = self.BOTH
+
+        held = timestamp - self._closed_since
+        if (self.long_press is not None and self._pressed is None and held >= self.long_press
+                and self._gesture in self.bindings):
+            button = self.bindings[self._gesture][1]
+            self._emit(events, timestamp, self.PRESS, button, self._gesture)
+            self._pressed = button
+
+        return events
+
+    def update_sample(self, sample):
+        """Same as update(), from the eyes of a GazeSample"""
+        return self.update(sample.left_closed, sample.right_closed, sample.timestamp)
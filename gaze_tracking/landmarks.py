@@ -0,0 +1,219 @@
+import numpy as np
+import cv2
+from . import models
+from .face_tracker import detect_faces
+
+
+class FaceLandmarks(object):
+    """
+    This class holds the landmarks found on one face, in pixels of
+    the frame, whatever backend found them. They are converted once
+    per frame into a single (N, 3) float32 array, x and y in pixels
+    and z the depth given by the backend (0 for 2D backends), and
+    every consumer reads from it. The eye contours always follow
+    the order of the 68 Multi-PIE landmarks: outer corner, two upper
+    points, inner corner, two lower points.
+    """
+
+    def __init__(self, points, left_eye, right_eye, left_iris=None, right_iris=None):
+        """
+        Arguments:
+            points (numpy.ndarray): (N, 3) or (N, 2) float32 array of every landmark
+            left_eye (numpy.ndarray): (6, 2) int32 contour of the left eye
+            right_eye (numpy.ndarray): (6, 2) int32 contour of the right eye
+            left_iris (tuple): (x, y) center of the left iris, if the backend finds it
+            right_iris (tuple): (x, y) center of the right iris, if the backend finds it
+        """
+        if points.shape[1] == 2:
+            points = np.hstack((points, np.zeros((len(points), 1), np.float32)))
+        self.array = np.asarray(points, np.float32)
+        self.points = self.array[:, :2]
+        self.eyes = (left_eye, right_eye)
+        self.irises = (left_iris, right_iris)
+        self._pixels = None
+
+    def eye(self, side):
+        """Returns the contour of an eye
+
+        Argument:
+            side: 0 for left and 1 for right
+        """
+        return self.eyes[side]
+
+    def iris(self, side):
+        """Returns the center of an iris, or None if the backend does not find irises
+
+        Argument:
+            side: 0 for left and 1 for right
+        """
+        return self.irises[side]
+
+    def subset(self, indices):
+        """Returns the (x, y) coordinates of some landmarks
+
+        Argument:
+            indices (list or slice): Landmarks to keep
+        """
+        return self.points[indices]
+
+    def centroid(self, indices=None):
+        """Returns the average (x, y) position of some landmarks, all of them by default
+
+        Argument:
+            indices (list or slice): Landmarks to average
+        """
+        points = self.points if indices is None else self.points[indices]
+        x, y = points.mean(axis=0)
+        return float(x), float(y)
+
+    def pixels(self, indices=None):
+        """Returns the int32 pixel coordinates of some landmarks, all of them by default,
+        computed once per frame
+
+        Argument:
+            indices (list or slice): Landmarks to keep
+        """
+        if self._pixels is None:
+            self._pixels = self.points.astype(np.int32)
+        return self._pixels if indices is None else self._pixels[indices]
+
+
+class LandmarkBackend(object):
+    """
+    Base class of the landmark backends. A backend finds one face
+    on a frame and returns its FaceLandmarks.
+    """
+
+    name = None
+
+    def process(self, frame, gray):
+        """Returns the FaceLandmarks of the face on the frame, or None
+
+        Arguments:
+            frame (numpy.ndarray): BGR frame
+            gray (numpy.ndarray): Same frame in grayscale
+        """
+        raise NotImplementedError
+
+
+class DlibBackend(LandmarkBackend):
+    """
+    Finds the face with the dlib HOG detector, or with a FaceTracker,
+    and its 68 landmarks with the dlib shape predictor. The detector can
+    search a downscaled frame, the landmarks are always predicted on the
+    full resolution frame so the eyes keep all their pixels. The models
+    come from the shared registry, they are read from the disk on the
+    first frame, or by models.warm_up(), and shared by every backend.
+    """
+
+    name = "dlib"
+
+    LEFT_EYE_POINTS = [36, 37, 38, 39, 40, 41]
+    RIGHT_EYE_POINTS = [42, 43, 44, 45, 46, 47]
+
+    def __init__(self, face_tracker=None, detect_scale=1.0, predictor_path=None):
+        """
+        Arguments:
+            face_tracker (FaceTracker): Follows the face between frames instead of
+                                        running the detector on every full frame,
+                                        it then has its own detect_scale
+            detect_scale (float): Size of the frame the detector searches, relative
+                                  to the frame, without a face tracker
+            predictor_path (str): Shape predictor model, the 68 point predictor
+                                  of the package by default
+        """
+        if not 0 < detect_scale <= 1:
+            raise ValueError("detect_scale must be in (0, 1]: {}".format(detect_scale))
+        self.face_tracker = face_tracker
+        self.detect_scale = detect_scale
+        self.predictor_path = predictor_path
+
+    def process(self, frame, gray):
+        if self.face_tracker is not None:
+            face = self.face_tracker.locate(gray)
+        else:
+            faces = detect_faces(models.face_detector(), gray, self.detect_scale)
+            face = faces[0] if faces else None
+
+        if face is None:
+            return None
+
+        shape = models.shape_predictor(self.predictor_path)(gray, face)
+        points = np.array([(part.x, part.y, 0) for part in shape.parts()], np.float32)
+        pixels = points[:, :2].astype(np.int32)
+        return FaceLandmarks(points, pixels[self.LEFT_EYE_POINTS], pixels[self.RIGHT_EYE_POINTS])
+
+
+class FaceMeshBackend(LandmarkBackend):
+    """
+    Finds the face and its 468 landmarks with MediaPipe Face Mesh.
+    With refined landmarks the iris centers are found too, and the
+    pupils are located from them instead of by thresholding.
+    MediaPipe already works coarse to fine, it detects the face on a
+    small copy of the frame and reads the landmarks on a crop of the
+    full frame, so there is no detect_scale here.
+    """
+
+    name = "face_mesh"
+
+    # Same order as the 68 Multi-PIE eye points
+    LEFT_EYE_POINTS = [33, 160, 158, 133, 153, 144]
+    RIGHT_EYE_POINTS = [362, 385, 387, 263, 373, 380]
+    LEFT_IRIS_CENTER = 468
+    RIGHT_IRIS_CENTER = 473
+
+    # Every landmark of the mesh, without the refined iris points
+    MESH_POINTS = slice(0, 468)
+
+    def __init__(self, refine_landmarks=True, min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        """
+        Arguments:
+            refine_landmarks (bool): Also find the irises
+            min_detection_confidence (float): Score needed to detect a face
+            min_tracking_confidence (float): Score needed to keep tracking it
+        """
+        import mediapipe as mp
+
+        self.refine_landmarks = refine_landmarks
+        self._face_mesh = mp.solutions.face_mesh.FaceMesh(
+            max_num_faces=1,
+            refine_landmarks=refine_landmarks,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence)
+
+    def process(self, frame, gray):
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        output = self._face_mesh.process(rgb_frame)
+        if not output.multi_face_landmarks:
+            return None
+
+        frame_h, frame_w = frame.shape[:2]
+        points = self.to_array(output.multi_face_landmarks[0], frame_w, frame_h)
+
+        pixels = points[:, :2].astype(np.int32)
+        left_iris = right_iris = None
+        if len(points) > self.RIGHT_IRIS_CENTER:
+            left_iris = tuple(pixels[self.LEFT_IRIS_CENTER])
+            right_iris = tuple(pixels[self.RIGHT_IRIS_CENTER])
+
+        return FaceLandmarks(points, pixels[self.LEFT_EYE_POINTS], pixels[self.RIGHT_EYE_POINTS],
+                             left_iris, right_iris)
+
+    @staticmethod
+    def to_array(face_landmarks, frame_w, frame_h):
+        """Converts a MediaPipe landmark list to an (N, 3) float32 array in pixels,
+        reading every landmark once. z is scaled like x, as MediaPipe does.
+
+        Arguments:
+            face_landmarks: NormalizedLandmarkList of one face
+            frame_w (int): Frame width
+            frame_h (int): Frame height
+        """
+        array = np.array([(landmark.x, landmark.y, landmark.z) for landmark in face_landmarks.landmark],
+                         np.float32).reshape(-1, 3)
+        array *= (frame_w, frame_h, frame_w)
+        return array
+
+    def close(self):
+        """Releases the MediaPipe graph"""
+        self._face_mesh.close()
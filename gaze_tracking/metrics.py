@@ -0,0 +1,215 @@
+import bisect
+import os
+import threading
+import time
+
+
+class Histogram(object):
+    """
+    This class counts durations in fixed, logarithmically spaced buckets,
+    from 1 microsecond to about 10 seconds. Its memory does not grow with
+    the number of values, percentiles are estimated within one bucket (25%).
+    """
+
+    BOUNDS = [1e-6 * 1.25 ** i for i in range(73)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, value):
+        """Adds a duration, in seconds"""
+        index = bisect.bisect_left(self.BOUNDS, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def percentile(self, q):
+        """Returns an estimate of the q-th percentile (0 to 100), in seconds,
+        or None when nothing was recorded"""
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+        if not count:
+            return None
+
+        rank = q / 100.0 * count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                low = self.BOUNDS[index - 1] if index > 0 else 0.0
+                high = self.BOUNDS[index] if index < len(self.BOUNDS) else self.BOUNDS[-1]
+                return low + (high - low) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.BOUNDS[-1]
+
+
+class _Timer(object):
+    """Context manager recording the time spent in its block into a histogram"""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.record(time.perf_counter() - self._start)
+
+
+class _NullTimer(object):
+    """Context manager that does nothing, returned when metrics are disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics(object):
+    """
+    This class collects the latency histograms of the tracking stages,
+    counters (frames processed, faces lost...) and gauges (frames dropped
+    by a source...). When disabled, every hook returns right away.
+    """
+
+    def __init__(self, enabled=True, prefix="gaze_tracking"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def time(self, stage):
+        """Returns a context manager timing its block as the given stage
+
+        Argument:
+            stage (str): Name of the stage, like "landmarks" or "capture"
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self._histogram(stage))
+
+    def observe(self, stage, seconds):
+        """Records a duration measured elsewhere for the given stage"""
+        if self.enabled:
+            self._histogram(stage).record(seconds)
+
+    def increment(self, name, value=1):
+        """Adds to a counter, like "frames_processed" or "faces_lost" """
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name, value):
+        """Sets a gauge, like the number of frames dropped by a source"""
+        if self.enabled:
+            self.gauges[name] = value
+
+    def snapshot(self):
+        """Returns the current values: counters, gauges and, for each stage,
+        the number of samples, their total and the p50/p95/p99 in seconds"""
+        with self._lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+        return {
+            "counters": counters,
+            "gauges": dict(self.gauges),
+            "stages": {
+                name: {
+                    "count": h.count,
+                    "sum": h.sum,
+                    "p50": h.percentile(50),
+                    "p95": h.percentile(95),
+                    "p99": h.percentile(99),
+                }
+                for name, h in histograms.items()
+            },
+        }
+
+    def to_prometheus(self):
+        """Returns the snapshot in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = "{}_{}_total".format(self.prefix, name)
+            lines += ["# TYPE {} counter".format(metric), "{} {}".format(metric, value)]
+
+        for name, value in sorted(snapshot["gauges"].items()):
+            metric = "{}_{}".format(self.prefix, name)
+            lines += ["# TYPE {} gauge".format(metric), "{} {}".format(metric, value)]
+
+        if snapshot["stages"]:
+            metric = "{}_stage_seconds".format(self.prefix)
+            lines.append("# TYPE {} summary".format(metric))
+            for stage, values in sorted(snapshot["stages"].items()):
+                for quantile in ("p50", "p95", "p99"):
+                    if values[quantile] is not None:
+                        lines.append('{}{{stage="{}",quantile="0.{}"}} {:.9f}'.format(
+                            metric, stage, quantile[1:], values[quantile]))
+                lines.append('{}_sum{{stage="{}"}} {:.9f}'.format(metric, stage, values["sum"]))
+                lines.append('{}_count{{stage="{}"}} {}'.format(metric, stage, values["count"]))
+
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusFileWriter(object):
+    """
+    This class writes the metrics to a text file in the Prometheus
+    exposition format every few seconds, for the node exporter textfile
+    collector or for a quick look. The file is replaced atomically.
+    """
+
+    def __init__(self, metrics, path, interval=5.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+
+    def write(self):
+        """Writes the current metrics now"""
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as output:
+            output.write(self.metrics.to_prometheus())
+        os.replace(temporary, self.path)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.write()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the periodic writes and writes the final values"""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.write()
+
+
+# Shared disabled instance, the default of every hook
+NULL_METRICS = Metrics(enabled=False)
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+# The 68 point predictor shipped with the package, about 100 MB
+PREDICTOR_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                              "trained_models/shape_predictor_68_face_landmarks.dat"))
+
+
+class ModelRegistry(object):
+    """
+    This class loads each model once per process, on first use, and hands
+    the same object to every caller, so several trackers in one process
+    share the memory and only the first one waits for the disk. Loading
+    is thread safe: a model asked from two threads at once is loaded once,
+    and a slow load does not hold back the other models. A load that fails
+    is not tried again, its error is raised to every caller.
+    """
+
+    def __init__(self):
+        self.load_times = {}
+
+        self._models = {}
+        self._errors = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """Returns the model stored under key, loading it with loader() the first time
+
+        Arguments:
+            key: Name of the model, with whatever makes it unique such as its path
+            loader (callable): Builds the model
+        """
+        if key in self._models:
+            return self._models[key]
+
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key in self._errors:
+                raise self._errors[key]
+            if key not in self._models:
+                start = time.perf_counter()
+                try:
+                    model = loader()
+                except Exception as e:
+                    self._errors[key] = e
+                    raise
+                self.load_times[key] = time.perf_counter() - start
+                self._models[key] = model
+        return self._models[key]
+
+    def loaded(self, key):
+        """Returns True if the model is already in memory"""
+        return key in self._models
+
+    def clear(self):
+        """Forgets every model, they are freed once their users let them go"""
+        with self._lock:
+            self._models.clear()
+            self._errors.clear()
+            self._locks.clear()
+            self.load_times.clear()
+
+
+# Shared by the whole process
+registry = ModelRegistry()
+
+_local = threading.local()
+
+
+def shape_predictor(path=None):
+    """Returns the dlib shape predictor of the model file, shared by the process.
+    Predicting landmarks does not change the predictor, threads can share it.
+
+    Argument:
+        path (str): Model file, the 68 point predictor of the package by default
+    """
+    path = _predictor_path(path)
+
+    def load():
+        import dlib
+        _check_exists(path)
+        return dlib.shape_predictor(path)
+    return registry.get(("shape_predictor", path), load)
+
+
+def _predictor_path(path):
+    return os.path.abspath(path) if path is not None else PREDICTOR_PATH
+
+
+def _check_exists(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError("Shape predictor model not found: {}".format(path))
+
+
+def face_detector():
+    """Returns the dlib HOG face detector of the calling thread.
+    The detector keeps scratch images between calls, so each thread builds
+    its own once, and every tracker running on that thread shares it."""
+    if not hasattr(_local, "face_detector"):
+        import dlib
+        _local.face_detector = dlib.get_frontal_face_detector()
+    return _local.face_detector
+
+
+def warm_up(predictor_path=None, background=False):
+    """Loads the shape predictor ahead of the first frame, so it is not
+    read from the disk while the user waits for the cursor to move.
+    A missing model file is reported at once, on the calling thread.
+
+    Arguments:
+        predictor_path (str): Model file, the 68 point predictor of the package by default
+        background (bool): Load on a thread and return it at once, while the camera opens
+    """
+    _check_exists(_predictor_path(predictor_path))
+    if not background:
+        shape_predictor(predictor_path)
+        return None
+
+    def load():
+        try:
+            shape_predictor(predictor_path)
+        except Exception:
+            # The registry keeps the error, the first shape_predictor() call raises it
+            pass
+    thread = threading.Thread(target=load, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
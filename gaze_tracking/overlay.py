@@ -0,0 +1,107 @@
+import numpy as np
+import cv2
+
+
+class OverlayRenderer(object):
+    """
+    This class draws the preview overlay: landmark markers, pupils, the head
+    center and the gaze information. Markers are drawn with a single
+    cv2.polylines call, whatever their number, instead of two cv2.line
+    calls each. With the NONE level nothing is drawn at all.
+    """
+
+    NONE = "none"
+    MINIMAL = "minimal"
+    FULL = "full"
+    LEVELS = (NONE, MINIMAL, FULL)
+
+    TEXT_COLOR = (147, 58, 31)
+
+    def __init__(self, level=FULL, marker_size=3, color=(0, 255, 0), thickness=2):
+        """
+        Arguments:
+            level (str): NONE draws nothing, MINIMAL draws the pupils, the head
+                         center and the text, FULL also draws every landmark
+            marker_size (int): Half size of a landmark marker, in pixels
+            color (tuple): BGR color of the landmark markers
+            thickness (int): Line thickness of the landmark markers
+        """
+        if level not in self.LEVELS:
+            raise ValueError("Unknown overlay level: {}".format(level))
+
+        self.level = level
+        self.marker_size = marker_size
+        self.color = color
+        self.thickness = thickness
+
+    @property
+    def enabled(self):
+        return self.level != self.NONE
+
+    @staticmethod
+    def _marker_offsets(shape, size):
+        """Returns the (2, 2, 2) segments of a marker centered on (0, 0)"""
+        if shape == "x":
+            return np.array([[[-size, -size], [size, size]], [[size, -size], [-size, size]]], np.int32)
+        return np.array([[[-size, 0], [size, 0]], [[0, -size], [0, size]]], np.int32)
+
+    @classmethod
+    def draw_markers(cls, frame, points, size=3, color=(0, 255, 0), thickness=2, shape="x"):
+        """Draws a marker on each point with one cv2.polylines call
+
+        Arguments:
+            frame (numpy.ndarray): Frame to draw on, in place
+            points (numpy.ndarray): (N, 2) pixel coordinates
+            size (int): Half size of a marker
+            color (tuple): BGR color
+            thickness (int): Line thickness
+            shape (str): "x" for a cross, "+" for a plus
+        """
+        points = np.asarray(points, np.int32).reshape(-1, 1, 1, 2)
+        if not len(points):
+            return
+        segments = (points + cls._marker_offsets(shape, size)).reshape(-1, 2, 2)
+        cv2.polylines(frame, segments, False, color, thickness)
+
+    @staticmethod
+    def status_text(sample):
+        """Returns the text describing a GazeSample"""
+        if sample.is_blinking:
+            return "Blinking"
+        elif sample.is_right:
+            return "Looking right"
+        elif sample.is_left:
+            return "Looking left"
+        elif sample.is_center:
+            return "Looking center"
+        return ""
+
+    def render(self, frame, landmarks=None, sample=None, head_center=None, gaze_point=None):
+        """Draws the overlay on the frame, in place, according to the level
+
+        Arguments:
+            frame (numpy.ndarray): BGR frame to draw on
+            landmarks (FaceLandmarks): Landmarks of the face, or None
+            sample (GazeSample): Gaze of the frame, or None
+            head_center (tuple): Reference head position, drawn as a red dot
+            gaze_point (tuple): Screen coordinates where the user is looking
+        """
+        if self.level == self.NONE:
+            return frame
+
+        if landmarks is not None:
+            if self.level == self.FULL:
+                self.draw_markers(frame, landmarks.pixels(), self.marker_size, self.color, self.thickness)
+            if head_center is not None:
+                cv2.circle(frame, (int(head_center[0]), int(head_center[1])), 5, (0, 0, 255), -1)
+
+        if sample is not None:
+            if sample.pupils_located:
+                self.draw_markers(frame, (sample.pupil_left, sample.pupil_right), 5, (0, 255, 0), 1, "+")
+            cv2.putText(frame, self.status_text(sample), (90, 60), cv2.FONT_HERSHEY_DUPLEX, 1.6, self.TEXT_COLOR, 2)
+
+        if gaze_point:
+            cv2.putText(frame, "Gaze Point: {}".format(gaze_point), (90, 200), cv2.FONT_HERSHEY_DUPLEX, 0.9,
+                        self.TEXT_COLOR, 1)
+
+        return frame
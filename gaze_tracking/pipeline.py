@@ -0,0 +1,275 @@
+import collections
+import threading
+import time
+from .metrics import NULL_METRICS
+
+
+class StageQueue(object):
+    """
+    This class is the bounded queue between two pipeline stages.
+    When it is full, the drop policy decides what happens to a new item:
+    DROP_OLDEST keeps the latest items, DROP_NEWEST keeps the queued
+    ones and BLOCK makes the producer wait.
+    """
+
+    BLOCK = "block"
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+    def __init__(self, maxsize=1, policy=DROP_OLDEST):
+        if policy not in self.POLICIES:
+            raise ValueError("Unknown drop policy: {}".format(policy))
+
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+
+        self._items = collections.deque()
+        self._condition = threading.Condition()
+
+    def put(self, item):
+        """Adds an item, or drops one according to the policy when the queue is full"""
+        with self._condition:
+            if self.policy == self.BLOCK:
+                while len(self._items) >= self.maxsize and not self.closed:
+                    self._condition.wait()
+            if self.closed:
+                return
+
+            if len(self._items) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == self.DROP_NEWEST:
+                    return
+                self._items.popleft()
+
+            self._items.append(item)
+            self._condition.notify_all()
+
+    def get(self, timeout=None):
+        """Returns the oldest queued item, or None when the queue is closed or on timeout"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._items or self.closed, timeout):
+                return None
+            if not self._items:
+                return None
+
+            item = self._items.popleft()
+            self._condition.notify_all()
+            return item
+
+    def close(self):
+        """Wakes up every waiting producer and consumer, queued items can still be read"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class Packet(object):
+    """
+    This class carries one frame through the pipeline. Stages add their
+    results as attributes, so a later stage never reads state that an
+    earlier stage is already overwriting with the next frame.
+    """
+
+    def __init__(self, frame, timestamp):
+        self.frame = frame
+        self.timestamp = timestamp
+
+
+class Stage(object):
+    """
+    This class runs one step of the pipeline on its own thread. It takes
+    packets from its input queue, calls its function and forwards the
+    packet to the output queue unless the function returns False. An
+    exception of the function ends the stage and is kept in error.
+    """
+
+    def __init__(self, name, function, queue_size=1, policy=StageQueue.DROP_OLDEST, metrics=NULL_METRICS):
+        self.name = name
+        self.metrics = metrics
+        self._metric_name = "pipeline." + name
+        self.function = function
+        self.input = StageQueue(queue_size, policy)
+        self.output = None
+
+        self.processed = 0
+        self.busy_time = 0.0
+        self.error = None
+        self._thread = None
+
+    def process(self, packet):
+        """Runs the stage function on a packet and forwards it"""
+        start = time.perf_counter()
+        keep = self.function(packet)
+        elapsed = time.perf_counter() - start
+        self.busy_time += elapsed
+        self.metrics.observe(self._metric_name, elapsed)
+        self.processed += 1
+
+        if keep is not False and self.output is not None:
+            self.output.put(packet)
+
+    def _run(self):
+        try:
+            while True:
+                packet = self.input.get()
+                if packet is None:
+                    break
+                self.process(packet)
+        except Exception as e:
+            # Raised again by Pipeline.run() on the calling thread
+            self.error = e
+        finally:
+            if self.output is not None:
+                self.output.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def mean_time(self):
+        """Average seconds spent in the stage function per packet"""
+        return self.busy_time / self.processed if self.processed else 0.0
+
+
+class Pipeline(object):
+    """
+    This class runs a frame source and a chain of stages, each one on its
+    own thread, joined by bounded queues. OpenCV, dlib and MediaPipe release
+    the GIL while they work, so stages overlap and the frame rate is set by
+    the slowest stage instead of the sum of all of them.
+
+    The last stage can run on the calling thread with run(), which is
+    needed for cv2.imshow on macOS.
+    """
+
+    def __init__(self, source, queue_size=1, policy=StageQueue.DROP_OLDEST, metrics=None):
+        """
+        Arguments:
+            source (FrameSource): Where the frames come from
+            queue_size (int): Default size of the queues between stages
+            policy (str): Default drop policy of the queues
+            metrics (Metrics): Receives the time spent in each stage and
+                               the frames dropped, disabled by default
+        """
+        self.source = source
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self.queue_size = queue_size
+        self.policy = policy
+        self.stages = []
+        self.stop_event = threading.Event()
+
+        self.frames_in = 0
+        self._start_time = None
+        self._capture_thread = None
+
+    def add_stage(self, name, function, queue_size=None, policy=None):
+        """Appends a stage at the end of the pipeline
+
+        Arguments:
+            name (str): Name of the stage, used in the statistics
+            function (callable): Called with each Packet, returns False to drop it
+            queue_size (int): Size of the input queue of the stage
+            policy (str): Drop policy of the input queue of the stage
+        """
+        stage = Stage(name, function,
+                      self.queue_size if queue_size is None else queue_size,
+                      self.policy if policy is None else policy,
+                      self.metrics)
+        if self.stages:
+            self.stages[-1].output = stage.input
+        self.stages.append(stage)
+        return self
+
+    def _capture(self):
+        try:
+            while not self.stop_event.is_set():
+                with self.metrics.time("capture"):
+                    ok, frame = self.source.read()
+                if not ok:
+                    break
+                self.frames_in += 1
+                self.metrics.set("frames_dropped", self.frames_dropped)
+                self.stages[0].input.put(Packet(frame, self.source.timestamp))
+        finally:
+            self.stages[0].input.close()
+
+    def start(self, threaded_stages=None):
+        """Starts the capture thread and the stage threads
+
+        Argument:
+            threaded_stages (int): How many stages get their own thread,
+                                   all of them by default
+        """
+        if threaded_stages is None:
+            threaded_stages = len(self.stages)
+
+        self._start_time = time.perf_counter()
+        for stage in self.stages[:threaded_stages]:
+            stage.start()
+        self._capture_thread = threading.Thread(target=self._capture, name="capture", daemon=True)
+        self._capture_thread.start()
+        return self
+
+    def run(self):
+        """Starts the pipeline and runs its last stage on the calling thread
+        until the source is over or stop() is called. The first exception
+        of a threaded stage is raised once the pipeline has stopped."""
+        self.start(len(self.stages) - 1)
+        last = self.stages[-1]
+        try:
+            while not self.stop_event.is_set():
+                packet = last.input.get()
+                if packet is None:
+                    break
+                last.process(packet)
+        finally:
+            self.stop()
+        for stage in self.stages:
+            if stage.error is not None:
+                raise stage.error
+
+    def stop(self):
+        """Stops the capture and lets every stage finish"""
+        self.stop_event.set()
+        self.source.release()
+        for stage in self.stages:
+            stage.input.close()
+        for stage in self.stages:
+            stage.join(1.0)
+
+    @property
+    def frames_dropped(self):
+        """Frames dropped by the source and by every stage queue"""
+        return self.source.frames_dropped + sum(stage.input.dropped for stage in self.stages)
+
+    def stats(self):
+        """Returns the end-to-end frame rate and, for each stage, the frames
+        processed, the frames dropped at its input and the mean time spent"""
+        elapsed = time.perf_counter() - self._start_time if self._start_time else 0.0
+        last = self.stages[-1].processed if self.stages else 0
+        return {
+            "fps": last / elapsed if elapsed else 0.0,
+            "frames_captured": self.frames_in,
+            "capture_dropped": self.source.frames_dropped,
+            "stages": [
+                {"name": s.name, "processed": s.processed, "dropped": s.input.dropped, "mean_ms": 1000 * s.mean_time}
+                for s in self.stages
+            ],
+        }
+
+    def report(self):
+        """Returns the statistics as printable text"""
+        stats = self.stats()
+        lines = ["{:.1f} fps end to end, {} frames captured, {} dropped by the source".format(
+            stats["fps"], stats["frames_captured"], stats["capture_dropped"])]
+        for stage in stats["stages"]:
+            lines.append("  {name:<10} {processed:6d} processed {dropped:6d} dropped {mean_ms:8.2f} ms".format(**stage))
+        return "\n".join(lines)
@@ -0,0 +1,182 @@
+import signal
+import sys
+import threading
+import time
+import cv2
+
+
+class ControlChannel(object):
+    """
+    This class carries the commands that end a run, whatever their source:
+    a key pressed in the preview window, a line typed in the terminal,
+    a signal or the program itself. The tracking loop only checks stopped.
+    """
+
+    QUIT_KEYS = (27, ord("q"))
+    QUIT_COMMANDS = ("q", "quit", "exit")
+
+    def __init__(self, stop_event=None):
+        """
+        Argument:
+            stop_event (threading.Event): Event set on stop, shared with a Pipeline
+                                          for instance, a new one by default
+        """
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.reason = None
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    def stop(self, reason="stopped"):
+        """Asks every loop sharing the channel to end"""
+        if self.reason is None:
+            self.reason = reason
+        self.stop_event.set()
+
+    def wait(self, timeout=None):
+        """Waits until the channel is stopped, returns True if it is"""
+        return self.stop_event.wait(timeout)
+
+    def handle_key(self, key):
+        """Handles a key code returned by cv2.waitKey"""
+        if key & 0xFF in self.QUIT_KEYS:
+            self.stop("key")
+
+    def install_signal_handlers(self):
+        """Stops on SIGINT and SIGTERM, must be called from the main thread"""
+        for name in ("SIGINT", "SIGTERM"):
+            signal.signal(getattr(signal, name), lambda signum, frame: self.stop("signal"))
+
+    def listen_stdin(self):
+        """Stops when "q" is typed in the terminal, for runs without a window"""
+        def listen():
+            for line in sys.stdin:
+                if line.strip().lower() in self.QUIT_COMMANDS:
+                    self.stop("stdin")
+                    return
+
+        if sys.stdin is not None and sys.stdin.isatty():
+            threading.Thread(target=listen, name="stdin", daemon=True).start()
+
+
+class HeadlessPreview(object):
+    """
+    Preview that shows nothing. due() is always False so the tracking
+    loop skips the drawing too, and run() only waits for the stop.
+    """
+
+    def due(self):
+        return False
+
+    def submit(self, frame):
+        pass
+
+    def run(self, control):
+        control.install_signal_handlers()
+        control.listen_stdin()
+        # Short waits so the main thread still gets KeyboardInterrupt everywhere
+        while not control.wait(0.1):
+            pass
+
+
+class WindowPreview(object):
+    """
+    This class shows frames in an OpenCV window at a capped rate, from
+    its own loop, so the tracking loop runs at the camera rate and never
+    waits on the GUI. The tracking loop asks due() before drawing an
+    overlay and hands the frame over with submit(), only the newest frame
+    is kept. run() must be called from the main thread on macOS.
+    """
+
+    def __init__(self, title, fps=15):
+        """
+        Arguments:
+            title (str): Title of the window
+            fps (float): Largest number of frames shown per second
+        """
+        self.title = title
+        self.interval = 1.0 / fps if fps else 0.0
+        self.frames_shown = 0
+
+        self._frame = None
+        self._next_frame = 0.0
+        self._condition = threading.Condition()
+
+    def due(self):
+        """Returns True when a frame submitted now would be shown"""
+        return time.monotonic() >= self._next_frame
+
+    def submit(self, frame):
+        """Hands a frame over to the preview loop, replacing the one not shown yet"""
+        with self._condition:
+            self._frame = frame
+            self._next_frame = time.monotonic() + self.interval
+            self._condition.notify()
+
+    def _next(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._frame is not None, self.interval or 0.01)
+            frame, self._frame = self._frame, None
+            return frame
+
+    def run(self, control):
+        """Shows the submitted frames and handles the keys until the control channel stops"""
+        try:
+            while not control.stopped:
+                frame = self._next()
+                if frame is not None:
+                    cv2.imshow(self.title, frame)
+                    self.frames_shown += 1
+                # waitKey also runs the GUI event loop, it is called even without a new frame
+                control.handle_key(cv2.waitKey(1))
+        except KeyboardInterrupt:
+            control.stop("signal")
+        finally:
+            cv2.destroyWindow(self.title)
+
+
+def open_preview(title, headless=False, fps=15):
+    """Returns a WindowPreview, or a HeadlessPreview in headless mode
+
+    Arguments:
+        title (str): Title of the window
+        headless (bool): Show nothing and draw nothing
+        fps (float): Largest number of frames shown per second
+    """
+    if headless:
+        return HeadlessPreview()
+    return WindowPreview(title, fps)
+
+
+def run_with_preview(loop, preview, control):
+    """Runs loop() on a tracking thread and the preview on the calling thread.
+    When either ends the other one is stopped through the control channel.
+    An exception raised by loop() is raised again here once both have ended.
+
+    Arguments:
+        loop (callable): Tracking loop, returns when control.stopped is set
+        preview (WindowPreview or HeadlessPreview): What shows the frames
+        control (ControlChannel): Channel shared by the loop and the preview
+    """
+    errors = []
+
+    def track():
+        try:
+            loop()
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            control.stop("done")
+
+    thread = threading.Thread(target=track, name="tracking", daemon=True)
+    thread.start()
+    try:
+        preview.run(control)
+    except KeyboardInterrupt:
+        control.stop("signal")
+    finally:
+        control.stop()
+        thread.join()
+    if errors:
+        raise errors[0]
@@ -8,13 +8,36 @@ class Pupil(object):
     the position of the pupil
     """
 
-    def __init__(self, eye_frame, threshold):
+    def __init__(self, eye_frame, threshold, position=None):
+        """
+        Arguments:
+            eye_frame (numpy.ndarray): Frame containing an eye and nothing else
+            threshold (int): Threshold value used to binarize the eye frame
+            position (tuple): (x, y) of the pupil in the eye frame when it is already
+                              known, from iris landmarks, instead of detected
+        """
         self.iris_frame = None
         self.threshold = threshold
         self.x = None
         self.y = None
 
-        self.detect_iris(eye_frame)
+        if position is not None:
+            self.x, self.y = int(position[0]), int(position[1])
+        else:
+            self.detect_iris(eye_frame)
+
+    KERNEL = np.ones((3, 3), np.uint8)
+
+    @staticmethod
+    def filtering(eye_frame):
+        """Smooths the eye frame and removes small dark spots, this is the
+        part of the processing that does not depend on the threshold
+
+        Arguments:
+            eye_frame (numpy.ndarray): Frame containing an eye and nothing else
+        """
+        new_frame = cv2.bilateralFilter(eye_frame, 10, 15, 15)
+        return cv2.erode(new_frame, Pupil.KERNEL, iterations=3)
 
     @staticmethod
     def image_processing(eye_frame, threshold):
@@ -22,13 +45,12 @@ class Pupil(object):
 
         Arguments:
             eye_frame (numpy.ndarray): Frame containing an eye and nothing else
+            threshold (int): Threshold value used to binarize the eye frame
 
         Returns:
             A frame with a single element representing the iris
         """
-        kernel = np.ones((3, 3), np.uint8)
-        new_frame = cv2.bilateralFilter(eye_frame, 10, 15, 15)
-        new_frame = cv2.erode(new_frame, kernel, iterations=3)
+        new_frame = Pupil.filtering(eye_frame)
         new_frame = cv2.threshold(new_frame, threshold, 255, cv2.THRESH_BINARY)[1]
 
         return new_frame
@@ -1,14 +1,34 @@
+import argparse
+import time
 import cv2
-import mediapipe as mp
 import pyautogui
-import numpy as np
+from gaze_tracking import Actuator, FaceMeshBackend, OverlayRenderer, ControlChannel, open_preview, open_source
+from gaze_tracking import run_with_preview
+from gaze_tracking.filters import FILTERS, make_filter
+
+parser = argparse.ArgumentParser()
+parser.add_argument("source", nargs="?", default="0", help="camera index, video file or image directory")
+parser.add_argument("--headless", action="store_true", help="no window and no drawing, stop with Ctrl+C or q")
+parser.add_argument("--preview-fps", type=float, default=15, help="largest number of preview frames shown per second")
+parser.add_argument("--filter", choices=sorted(FILTERS), default="one_euro",
+                    help="cursor smoothing: One Euro, constant velocity Kalman or the former EMA")
+parser.add_argument("--predict", action="store_true",
+                    help="move the cursor where the head should be now, from the time since the capture")
+args = parser.parse_args()
 
 # Accessing camera
-cam = cv2.VideoCapture(0)
+cam = open_source(args.source)
 pyautogui.FAILSAFE = False
 
-# Initialize MediaPipe Face Mesh
-face_mesh = mp.solutions.face_mesh.FaceMesh(refine_landmarks=True)
+# Preview window shown at a capped rate, or nothing at all in headless mode
+preview = open_preview("Head Tracking Mouse Control", args.headless, args.preview_fps)
+control = ControlChannel()
+
+# Initialize MediaPipe Face Mesh, its landmarks come back as one NumPy array per frame
+face_mesh = FaceMeshBackend(refine_landmarks=True)
+# Cursor moves are posted from their own thread
+actuator = Actuator()
+
 # Screen dimensions
 screen_w, screen_h = pyautogui.size()
 screen_x, screen_y = screen_w // 2, screen_h // 2
@@ -19,79 +39,64 @@ initial_head_center = None
 # Sensitivity of the mouse movement
 sensitivity = 2.0  # Adjust this value to change cursor sensitivity
 
-# Smoothing parameters
-alpha = 0.1  # Smoothing factor (0 < alpha < 1)
+# Smoothing filter, it works on the capture timestamps so dropped frames do not change its behavior
+cursor_filter = make_filter(args.filter)
 smoothed_x, smoothed_y = screen_x, screen_y
 
-# Function to draw a small green X
-def draw_x(img, center, size=5, color=(0, 255, 0)):
-    x, y = center
-    cv2.line(img, (x - size, y - size), (x + size, y + size), color, 2)
-    cv2.line(img, (x + size, y - size), (x - size, y + size), color, 2)
-
-# Function to calculate average position of landmarks
-def calculate_avg_landmark_position(landmarks, indices, frame_w, frame_h):
-    avg_x, avg_y = 0, 0
-    for idx in indices:
-        landmark = landmarks[idx]
-        avg_x += landmark.x * frame_w
-        avg_y += landmark.y * frame_h
-    avg_x /= len(indices)
-    avg_y /= len(indices)
-    return avg_x, avg_y
-
 # Landmarks indices for full face tracking
-all_landmarks_indices = list(range(468))  # Face Mesh provides 468 landmarks
-
-while True:
-    _, frame = cam.read()
-    frame = cv2.flip(frame, 1)
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    output = face_mesh.process(rgb_frame)
-    landmark_points = output.multi_face_landmarks
-
-    if landmark_points:
-        landmarks = landmark_points[0].landmark
-        frame_h, frame_w, _ = frame.shape
-
-        # Calculate the average position of the selected landmarks
-        avg_x, avg_y = calculate_avg_landmark_position(landmarks, all_landmarks_indices, frame_w, frame_h)
-
-        # If initial head center is not set, set it to the current average position
-        if initial_head_center is None:
-            initial_head_center = (avg_x, avg_y)
-
-        # Calculate head movement from the initial center
-        move_x = avg_x - initial_head_center[0]
-        move_y = avg_y - initial_head_center[1]
-
-        # Apply sensitivity factor
-        screen_x += move_x * sensitivity
-        screen_y += move_y * sensitivity
-
-        # Apply smoothing
-        smoothed_x = alpha * screen_x + (1 - alpha) * smoothed_x
-        smoothed_y = alpha * screen_y + (1 - alpha) * smoothed_y
-
-        # Clipping cursor movement
-        smoothed_x = max(0, min(screen_w, smoothed_x))
-        smoothed_y = max(0, min(screen_h, smoothed_y))
-
-        pyautogui.moveTo(smoothed_x, smoothed_y)
-
-        # Draw landmarks and the initial center on the frame
-        for idx in all_landmarks_indices:
-            landmark = landmarks[idx]
-            x = int(landmark.x * frame_w)
-            y = int(landmark.y * frame_h)
-            draw_x(frame, (x, y), size=3, color=(0, 255, 0))  # Draw small green X
-
-        if initial_head_center:
-            cv2.circle(frame, (int(initial_head_center[0]), int(initial_head_center[1])), 5, (0, 0, 255), -1)
-    
-    cv2.imshow("Head Tracking Mouse Control", frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+all_landmarks_indices = FaceMeshBackend.MESH_POINTS  # Face Mesh provides 468 landmarks, without the irises
+
+def track():
+    """Moves the cursor with the head, at the camera rate"""
+    global initial_head_center, screen_x, screen_y, smoothed_x, smoothed_y
+    while not control.stopped:
+        ok, frame = cam.read()
+        if not ok:
+            break
+        frame = cv2.flip(frame, 1)
+        landmarks = face_mesh.process(frame, None)
+
+        if landmarks is not None:
+            # Calculate the average position of the selected landmarks
+            avg_x, avg_y = landmarks.centroid(all_landmarks_indices)
+
+            # If initial head center is not set, set it to the current average position
+            if initial_head_center is None:
+                initial_head_center = (avg_x, avg_y)
+
+            # Calculate head movement from the initial center
+            move_x = avg_x - initial_head_center[0]
+            move_y = avg_y - initial_head_center[1]
+
+            # Apply sensitivity factor
+            screen_x += move_x * sensitivity
+            screen_y += move_y * sensitivity
+
+            # Apply smoothing, and with --predict extrapolate over the time elapsed since the capture
+            cursor_filter.update(screen_x, screen_y, cam.timestamp)
+            latency = time.monotonic() - cam.timestamp if args.predict else 0.0
+            smoothed_x, smoothed_y = cursor_filter.predict(latency)
+
+            # Clipping cursor movement
+            smoothed_x = max(0, min(screen_w, smoothed_x))
+            smoothed_y = max(0, min(screen_h, smoothed_y))
+
+            actuator.move_to(smoothed_x, smoothed_y)
+
+        # Only the frames the preview will show are drawn on
+        if preview.due():
+            if landmarks is not None:
+                # Draw landmarks and the initial center on the frame
+                OverlayRenderer.draw_markers(frame, landmarks.pixels(all_landmarks_indices), size=3)  # Small green Xs, in one call
+
+                if initial_head_center:
+                    cv2.circle(frame, (int(initial_head_center[0]), int(initial_head_center[1])), 5, (0, 0, 255), -1)
+
+            preview.submit(frame)
+
+# Tracking runs on its own thread, the window stays on the main thread
+run_with_preview(track, preview, control)
 
 cam.release()
-cv2.destroyAllWindows()
+face_mesh.close()
+actuator.stop()
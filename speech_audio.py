@@ -0,0 +1,375 @@
+import collections
+import threading
+import time
+import wave
+import numpy as np
+
+
+class AudioRing(object):
+    """
+    This class is a ring buffer of 16-bit mono samples shared between a
+    capture thread and a reader. Samples are addressed by their absolute
+    index since the start of the capture, so the reader can go back in
+    time, up to the capacity, to keep the start of a word that was only
+    recognized as speech a few chunks later.
+    """
+
+    def __init__(self, rate, seconds=10.0):
+        """
+        Arguments:
+            rate (int): Samples per second
+            seconds (float): Audio kept, in seconds
+        """
+        self.rate = rate
+        self.capacity = int(rate * seconds)
+        self.written = 0
+        self.closed = False
+
+        self._samples = np.zeros(self.capacity, np.int16)
+        self._condition = threading.Condition()
+
+    @property
+    def oldest(self):
+        """Index of the oldest sample still in the buffer"""
+        return max(0, self.written - self.capacity)
+
+    def write(self, samples):
+        """Appends samples, overwriting the oldest ones
+
+        Argument:
+            samples (numpy.ndarray): int16 samples
+        """
+        samples = samples[-self.capacity:]
+        with self._condition:
+            start = self.written % self.capacity
+            end = start + len(samples)
+            if end <= self.capacity:
+                self._samples[start:end] = samples
+            else:
+                split = self.capacity - start
+                self._samples[start:] = samples[:split]
+                self._samples[:end - self.capacity] = samples[split:]
+            self.written += len(samples)
+            self._condition.notify_all()
+
+    def wait(self, index, timeout=None):
+        """Waits until the sample before index is written, returns False
+        when the buffer is closed before or on timeout
+
+        Arguments:
+            index (int): Absolute index to wait for
+            timeout (float): Seconds to wait, None waits forever
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.written >= index or self.closed, timeout)
+            return self.written >= index
+
+    def read(self, start, end):
+        """Returns a copy of the samples from start to end, absolute indexes,
+        clipped to what the buffer still holds"""
+        with self._condition:
+            start = max(start, self.oldest)
+            end = min(end, self.written)
+            if end <= start:
+                return np.zeros(0, np.int16)
+            indexes = np.arange(start, end) % self.capacity
+            return self._samples[indexes]
+
+    def close(self):
+        """Wakes up the reader, no more samples will be written"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class AudioSource(object):
+    """
+    Base class of the audio sources. A capture thread reads chunks of
+    16-bit mono samples from the device or file and writes them into an
+    AudioRing, so a slow reader never makes the device overflow.
+
+    Subclasses implement _open(), _read() and _close().
+    """
+
+    def __init__(self, rate=16000, chunk_ms=30, ring_seconds=10.0):
+        """
+        Arguments:
+            rate (int): Samples per second
+            chunk_ms (int): Duration of a chunk read from the device, in milliseconds
+            ring_seconds (float): Audio kept in the ring buffer, in seconds
+        """
+        self.rate = rate
+        self.chunk = int(rate * chunk_ms / 1000)
+        self.ring_seconds = ring_seconds
+        self.ring = None
+        self._thread = None
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _read(self):
+        """Returns the next chunk as int16 samples, or None at the end"""
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def _capture(self):
+        try:
+            while not self.ring.closed:
+                samples = self._read()
+                if samples is None:
+                    break
+                self.ring.write(samples)
+        finally:
+            self._close()
+            self.ring.close()
+
+    def start(self):
+        """Opens the source and starts the capture thread, returns the ring it writes to"""
+        self._open()
+        self.ring = AudioRing(self.rate, self.ring_seconds)
+        self._thread = threading.Thread(target=self._capture, name="audio-capture", daemon=True)
+        self._thread.start()
+        return self.ring
+
+    def stop(self):
+        """Stops the capture and waits for the device to be released"""
+        if self.ring is not None:
+            self.ring.close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class MicrophoneSource(AudioSource):
+    """
+    Captures the default microphone with PyAudio, the library used by
+    speech_recognition.Microphone.
+    """
+
+    def __init__(self, rate=16000, chunk_ms=30, ring_seconds=10.0, device_index=None):
+        super(MicrophoneSource, self).__init__(rate, chunk_ms, ring_seconds)
+        self.device_index = device_index
+        self._audio = None
+        self._stream = None
+
+    def _open(self):
+        import pyaudio
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(format=pyaudio.paInt16, channels=1, rate=self.rate, input=True,
+                                        frames_per_buffer=self.chunk, input_device_index=self.device_index)
+
+    def _read(self):
+        data = self._stream.read(self.chunk, exception_on_overflow=False)
+        return np.frombuffer(data, np.int16)
+
+    def _close(self):
+        self._stream.stop_stream()
+        self._stream.close()
+        self._audio.terminate()
+
+
+class WavFileSource(AudioSource):
+    """
+    Replays a 16-bit WAV file in place of the microphone, for tests and
+    benchmarks. Stereo files are mixed down to mono. In real time mode
+    the chunks are delivered at the pace of a microphone.
+    """
+
+    def __init__(self, path, chunk_ms=30, ring_seconds=None, realtime=False):
+        """
+        Arguments:
+            path (str): Path of the WAV file
+            chunk_ms (int): Duration of a chunk, in milliseconds
+            ring_seconds (float): Audio kept in the ring buffer, the whole file by default
+            realtime (bool): Deliver the chunks at the rate they were recorded
+        """
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError("Only 16-bit WAV files are supported: {}".format(path))
+            rate = wav.getframerate()
+            duration = wav.getnframes() / rate
+        super(WavFileSource, self).__init__(rate, chunk_ms, ring_seconds or duration + 1.0)
+        self.path = path
+        self.realtime = realtime
+        self._wav = None
+        self._started = None
+        self._delivered = 0
+
+    def _open(self):
+        self._wav = wave.open(self.path, "rb")
+        self._started = time.monotonic()
+        self._delivered = 0
+
+    def _read(self):
+        data = self._wav.readframes(self.chunk)
+        if not data:
+            return None
+
+        samples = np.frombuffer(data, np.int16)
+        channels = self._wav.getnchannels()
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+
+        if self.realtime:
+            due = self._started + (self._delivered + len(samples)) / self.rate
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self._delivered += len(samples)
+        return samples
+
+    def _close(self):
+        self._wav.close()
+
+
+class EnergyVad(object):
+    """
+    Voice activity detector on the energy of each chunk. The noise floor
+    is followed all along on the chunks without speech, instead of being
+    measured once at startup, so the detector keeps up with a fan that
+    starts or a room that gets quieter.
+    """
+
+    def __init__(self, ratio=3.0, min_rms=200.0, adaptation=0.05):
+        """
+        Arguments:
+            ratio (float): Energy over the noise floor that counts as speech
+            min_rms (float): Energy under which a chunk is never speech
+            adaptation (float): Weight of a silent chunk in the noise floor (0 < adaptation <= 1)
+        """
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.adaptation = adaptation
+        self.noise = None
+
+    @staticmethod
+    def rms(samples):
+        """Returns the root mean square of int16 samples"""
+        if len(samples) == 0:
+            return 0.0
+        samples = samples.astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples)))
+
+    def is_speech(self, samples):
+        """Returns True if the chunk holds speech, and updates the noise
+        floor when it does not
+
+        Argument:
+            samples (numpy.ndarray): int16 samples of one chunk
+        """
+        energy = self.rms(samples)
+        if self.noise is None:
+            self.noise = energy
+        speech = energy > max(self.min_rms, self.noise * self.ratio)
+        if not speech:
+            self.noise += self.adaptation * (energy - self.noise)
+        return speech
+
+
+class Segment(collections.namedtuple("Segment", ["phrase", "samples", "rate", "start", "end", "final", "emitted"])):
+    """
+    Audio of a phrase, or of its beginning for a partial segment.
+
+    Fields:
+        phrase (int): Number of the phrase, shared by its partial and final segments
+        samples (numpy.ndarray): int16 samples, the pre-roll included
+        rate (int): Samples per second
+        start (float): Start of the segment in the stream, in seconds
+        end (float): End of the segment in the stream, in seconds
+        final (bool): True for the whole phrase, False for a partial segment
+        emitted (float): Position of the stream when the segment was cut, in seconds,
+                         after end for a final segment that waited for the silence
+    """
+
+    __slots__ = ()
+
+    def audio_data(self):
+        """Returns the segment as a speech_recognition.AudioData for the recognizers"""
+        import speech_recognition as sr
+        return sr.AudioData(self.samples.tobytes(), self.rate, 2)
+
+
+class VadSegmenter(object):
+    """
+    This class cuts the stream of an AudioSource into phrases, chunk by
+    chunk, as it is captured. A phrase starts after min_speech seconds of
+    speech and begins pre_roll seconds earlier, so the onset of the first
+    word is kept. While the phrase goes on, a partial segment of it is
+    emitted every partial_interval seconds, and the final segment when
+    silence seconds pass without speech or the phrase reaches max_phrase.
+    """
+
+    def __init__(self, vad=None, pre_roll=0.3, min_speech=0.06, silence=0.5, partial_interval=0.3,
+                 max_phrase=10.0):
+        """
+        Arguments:
+            vad (EnergyVad): Tells the chunks with speech, EnergyVad() by default
+            pre_roll (float): Seconds kept before the detected start of speech
+            min_speech (float): Seconds of speech needed to start a phrase
+            silence (float): Seconds without speech that end a phrase
+            partial_interval (float): Seconds between two partial segments, None for
+                                      final segments only
+            max_phrase (float): Longest phrase, a longer one is cut
+        """
+        self.vad = vad if vad is not None else EnergyVad()
+        self.pre_roll = pre_roll
+        self.min_speech = min_speech
+        self.silence = silence
+        self.partial_interval = partial_interval
+        self.max_phrase = max_phrase
+
+    def segments(self, source, stop_event=None):
+        """Captures the source and yields its Segments until it ends or stop_event is set
+
+        Arguments:
+            source (AudioSource): Where the audio comes from
+            stop_event (threading.Event): Ends the capture when set
+        """
+        ring = source.start()
+        rate, chunk = source.rate, source.chunk
+        phrase = 0
+        position = 0
+        speech_run = 0
+        start = None
+        last_speech = None
+        last_emit = None
+
+        def segment(end, final):
+            samples = ring.read(start, end)
+            return Segment(phrase, samples, rate, start / rate, end / rate, final, position / rate)
+
+        try:
+            while stop_event is None or not stop_event.is_set():
+                if not ring.wait(position + chunk, 0.1):
+                    if ring.closed:
+                        break
+                    continue
+                samples = ring.read(position, position + chunk)
+                position += chunk
+                speech = self.vad.is_speech(samples)
+
+                if start is None:
+                    speech_run = speech_run + chunk if speech else 0
+                    if speech_run >= self.min_speech * rate:
+                        start = max(ring.oldest, position - speech_run - int(self.pre_roll * rate))
+                        last_speech = last_emit = position
+                    continue
+
+                if speech:
+                    last_speech = position
+                if (position - last_speech >= self.silence * rate
+                        or position - start >= self.max_phrase * rate):
+                    yield segment(min(position, last_speech + chunk), True)
+                    phrase += 1
+                    start = None
+                    speech_run = 0
+                elif self.partial_interval and position - last_emit >= self.partial_interval * rate:
+                    yield segment(position, False)
+                    last_emit = position
+
+            if start is not None and last_speech is not None:
+                # The stream ended inside a phrase
+                yield segment(last_speech, True)
+        finally:
+            source.stop()
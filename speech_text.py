@@ -1,62 +1,339 @@
-import speech_recognition as sr
-import pyautogui
-import threading
+import argparse
+import collections
+import concurrent.futures
 import queue
+import threading
+import time
+from speech_audio import MicrophoneSource, VadSegmenter, WavFileSource
+from text_output import TEXT_BACKENDS, TextOutput, make_text_backend
+
+
+class RecognitionError(Exception):
+    """Raised by a recognizer backend that can not be reached or is not installed"""
+
+
+class RecognizerBackend(object):
+    """
+    Base class of the speech recognizers. A backend turns one phrase of
+    audio into text. recognize() is called from several worker threads
+    at once and must not keep state between calls.
+    """
+
+    name = None
+
+    def recognize(self, audio):
+        """Returns the text of a phrase, or None if nothing was understood
+
+        Argument:
+            audio (speech_recognition.AudioData): Phrase to recognize
+        """
+        raise NotImplementedError
+
+
+class GoogleRecognizer(RecognizerBackend):
+    """
+    Sends every phrase to the Google Web Speech API, the former behavior.
+    Needs a network connection.
+    """
+
+    name = "google"
+
+    def __init__(self, language="en-US"):
+        import speech_recognition as sr
+
+        self.language = language
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        try:
+            return self._recognizer.recognize_google(audio, language=self.language)
+        except self._sr.UnknownValueError:
+            return None
+        except self._sr.RequestError as e:
+            raise RecognitionError(e)
+
+
+class OfflineRecognizer(RecognizerBackend):
+    """
+    Recognizes the phrases on this machine with CMU Sphinx, nothing is
+    sent over the network. Needs the pocketsphinx package.
+    """
+
+    name = "offline"
+
+    def __init__(self, language="en-US", keywords=None):
+        """
+        Arguments:
+            language (str): Language of the installed Sphinx model
+            keywords (list): (phrase, sensitivity) pairs to only listen for, such
+                             as commands, all the words of the model by default
+        """
+        import speech_recognition as sr
+
+        self.language = language
+        self.keywords = keywords
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+
+    def recognize(self, audio):
+        try:
+            return self._recognizer.recognize_sphinx(audio, language=self.language, keyword_entries=self.keywords)
+        except self._sr.UnknownValueError:
+            return None
+        except self._sr.RequestError as e:
+            # Raised when pocketsphinx or the language model is missing
+            raise RecognitionError(e)
+
+
+class StubRecognizer(RecognizerBackend):
+    """
+    Deterministic recognizer for tests and benchmarks: a phrase given as
+    a string is its own text, any other phrase is looked up in transcripts.
+    Recognition can be made to take time, to emulate long phrases. It does
+    not need speech_recognition.
+    """
+
+    name = "stub"
+
+    def __init__(self, transcripts=None, seconds_per_char=0.0):
+        """
+        Arguments:
+            transcripts (dict): Text of each phrase that is not a string
+            seconds_per_char (float): Time spent per character of the text
+        """
+        self.transcripts = transcripts or {}
+        self.seconds_per_char = seconds_per_char
+
+    def recognize(self, audio):
+        if isinstance(audio, str):
+            text = audio
+        elif hasattr(audio, "frame_data"):
+            # Audio from a segmenter, a speech_recognition.AudioData, is described by its duration
+            duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+            text = self.transcripts.get(audio, "[{:.2f} s]".format(duration))
+        else:
+            text = self.transcripts.get(audio)
+        if text and self.seconds_per_char:
+            time.sleep(len(text) * self.seconds_per_char)
+        return text or None
+
+
+RECOGNIZERS = {
+    "google": GoogleRecognizer,
+    "offline": OfflineRecognizer,
+    "stub": StubRecognizer,
+}
+
+
+def make_recognizer(name, **kwargs):
+    """Returns a new recognizer backend from its name in RECOGNIZERS
+
+    Arguments:
+        name (str): "google", "offline" or "stub"
+        kwargs: Parameters of the backend
+    """
+    if name not in RECOGNIZERS:
+        raise ValueError("Unknown recognizer: {}".format(name))
+    return RECOGNIZERS[name](**kwargs)
+
+
+def show_partial(text):
+    """Prints the text recognized so far in the phrase being spoken"""
+    print(f"... {text}")
+
+
+class SpeechProcessor(object):
+    """
+    This class listens to the microphone on one thread and recognizes the
+    phrases on a pool of workers, so a long phrase does not hold back the
+    next ones. The texts are still handled in the order they were spoken.
+    The processing thread blocks on the audio queue instead of polling it,
+    and stop() ends both threads.
+
+    The audio is streamed and cut into phrases by a VadSegmenter. While a
+    phrase is spoken, its beginning is recognized every few hundred
+    milliseconds and the partial text is shown, the final text of the
+    phrase is the one typed. Partial segments are skipped while the
+    workers are busy.
+    """
+
+    # Put on the audio queue to end the processing thread
+    _STOP = object()
+
+    def __init__(self, backend=None, workers=2, on_text=None, end_command="end", end_repeats=3,
+                 segmenter=None, on_partial=show_partial, output=None):
+        """
+        Arguments:
+            backend (RecognizerBackend): Turns phrases into text, GoogleRecognizer by default
+            workers (int): Phrases recognized at the same time
+            on_text (callable): Called with the text of each phrase, output.write by default
+            end_command (str): Word that stops the processor when said end_repeats
+                               times in a row, None to never stop on speech
+            end_repeats (int): Number of end commands in a row that stop the processor
+            segmenter (VadSegmenter): Cuts the audio stream into phrases, VadSegmenter() by default
+            on_partial (callable): Called with the text of the beginning of a phrase being
+                                   spoken, None to only recognize whole phrases
+            output (TextOutput): Types the text of the phrases from its own thread when
+                                 on_text is not given, a TextOutput typing key by key
+                                 by default. It is stopped with the processor
+        """
+        self.backend = backend if backend is not None else GoogleRecognizer()
+        self.workers = max(1, workers)
+        if output is None and on_text is None:
+            output = TextOutput()
+        self.output = output
+        self.on_text = on_text if on_text is not None else output.write
+        self.end_command = end_command
+        self.end_repeats = end_repeats
+        self.segmenter = segmenter if segmenter is not None else VadSegmenter()
+        self.on_partial = on_partial
 
-class SpeechProcessor:
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
         self.audio_queue = queue.Queue()
         self.stop_event = threading.Event()
+        self.previous_commands = collections.deque(maxlen=end_repeats)
+        self.threads = []
+
+        # Recognitions in the order the phrases were queued, handled from the front
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+
+    def submit(self, audio, final=True):
+        """Queues a phrase for recognition, from the microphone or any other source
+
+        Arguments:
+            audio (speech_recognition.AudioData): Phrase to recognize
+            final (bool): False for the beginning of a phrase still being spoken
+        """
+        self.audio_queue.put((audio, final))
 
-    def listen_thread(self):
-        with sr.Microphone() as source:
-            print("Adjusting for ambient noise, please wait...")
-            self.recognizer.adjust_for_ambient_noise(source)
-            print("Listening...")
-
-            while not self.stop_event.is_set():
-                try:
-                    # Capture audio from the microphone
-                    audio = self.recognizer.listen(source, timeout=None, phrase_time_limit=5)
-                    self.audio_queue.put(audio)
-                except sr.WaitTimeoutError:
-                    # Continue listening in case of timeout
-                    pass
+    def stop(self):
+        """Ends the listening and processing threads, the phrases not handled yet are dropped"""
+        self.stop_event.set()
+        self.audio_queue.put(self._STOP)
+
+    def listen_thread(self, source=None):
+        """Streams the source, the microphone by default, and queues its phrases
+
+        Argument:
+            source (AudioSource): Where the audio comes from
+        """
+        source = source if source is not None else MicrophoneSource()
+        print("Listening...")
+        for segment in self.segmenter.segments(source, self.stop_event):
+            if segment.final or self.on_partial is not None:
+                self.submit(segment.audio_data(), segment.final)
+        # The source ended, the phrases queued so far are still handled
+        self.audio_queue.put(self._STOP)
+
+    def _recognize(self, audio):
+        try:
+            return self.backend.recognize(audio)
+        except RecognitionError as e:
+            # Handle the case when there's a problem with the recognizer
+            print(f"Sorry, there was an error with the request: {e}")
+            return None
+
+    def _deliver(self, _future=None):
+        """Handles the finished recognitions at the front of the queue, in order"""
+        with self._lock:
+            while self._pending and self._pending[0][0].done():
+                future, final = self._pending.popleft()
+                if future.cancelled() or self.stop_event.is_set():
+                    continue
+                text = future.result()
+                if text and final:
+                    self._handle(text)
+                elif text and self.on_partial is not None:
+                    self.on_partial(text)
+
+    def _handle(self, text):
+        print(f"Recognized text: {text}")
+        if self.end_command is not None:
+            # Check for consecutive end commands
+            self.previous_commands.append(text.strip().lower())
+            if list(self.previous_commands) == [self.end_command] * self.end_repeats:
+                print("Detected '{}' {} times consecutively. Exiting...".format(self.end_command, self.end_repeats))
+                self.stop()
+                return
+        self.on_text(text)
 
     def process_thread(self):
-        while not self.stop_event.is_set():
-            if not self.audio_queue.empty():
-                audio = self.audio_queue.get()
-                try:
-                    # Recognize speech using Google Web Speech API
-                    response = self.recognizer.recognize_google(audio)
-                    print(f"Recognized text: {response}")
-                    pyautogui.write(response + ' ')
-                except sr.UnknownValueError:
-                    # Handle the case when speech is unintelligible
-                    pass
-                except sr.RequestError as e:
-                    # Handle the case when there's a problem with the API request
-                    print(f"Sorry, there was an error with the request: {e}")
-
-    def start(self):
-        # Start the listening and processing threads
-        listen_thread = threading.Thread(target=self.listen_thread)
-        process_thread = threading.Thread(target=self.process_thread)
-
-        listen_thread.start()
-        process_thread.start()
+        pool = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="recognizer")
+        try:
+            while True:
+                item = self.audio_queue.get()
+                if item is self._STOP:
+                    break
+                audio, final = item
+                with self._lock:
+                    busy = len(self._pending) >= self.workers
+                if busy and not final:
+                    # A newer partial segment, or the final one, will follow
+                    continue
+                future = pool.submit(self._recognize, audio)
+                with self._lock:
+                    self._pending.append((future, final))
+                future.add_done_callback(self._deliver)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=self.stop_event.is_set())
+            if self.output is not None:
+                # Types what was recognized before the stop
+                self.output.stop(timeout=None)
 
+    def start(self, listen=True, source=None):
+        """Starts the processing thread, and the listening thread unless
+        the phrases are submitted by the caller, and returns them
+
+        Arguments:
+            listen (bool): Listen to the audio source
+            source (AudioSource): Where the audio comes from, the microphone by default
+        """
+        self.threads = [threading.Thread(target=self.process_thread, name="speech-process")]
+        if listen:
+            self.threads.append(threading.Thread(target=self.listen_thread, args=(source,), name="speech-listen",
+                                                 daemon=True))
+
+        for thread in self.threads:
+            thread.start()
+        return self.threads
+
+    def join(self, timeout=None):
+        """Waits for the threads started by start()"""
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def run(self, source=None):
+        """Listens and types until the end command, the end of the source or Ctrl+C
+
+        Argument:
+            source (AudioSource): Where the audio comes from, the microphone by default
+        """
+        self.start(source=source)
         try:
-            listen_thread.join()
-            process_thread.join()
+            # The processing thread ends on stop() or once the source ended
+            while self.threads[0].is_alive():
+                self.threads[0].join(0.1)
         except KeyboardInterrupt:
             # Handle termination gracefully
-            self.stop_event.set()
-            listen_thread.join()
-            process_thread.join()
+            self.stop()
+        self.join()
+
 
 if __name__ == "__main__":
-    processor = SpeechProcessor()
-    processor.start()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recognizer", choices=sorted(RECOGNIZERS), default="google",
+                        help="speech recognizer, offline runs on this machine")
+    parser.add_argument("--workers", type=int, default=2, help="phrases recognized at the same time")
+    parser.add_argument("--wav", help="replay a 16-bit WAV file in place of the microphone")
+    parser.add_argument("--typing", choices=sorted(TEXT_BACKENDS), default="unicode",
+                        help="how the text is typed: key by key, Unicode events, clipboard paste or recorded only")
+    parser.add_argument("--partial-interval", type=float, default=0.3,
+                        help="seconds between two partial recognitions of a phrase, 0 for whole phrases only")
+    args = parser.parse_args()
+
+    segmenter = VadSegmenter(partial_interval=args.partial_interval or None)
+    processor = SpeechProcessor(make_recognizer(args.recognizer), args.workers, segmenter=segmenter,
+                                on_partial=show_partial if args.partial_interval else None,
+                                output=TextOutput(make_text_backend(args.typing)))
+    processor.run(WavFileSource(args.wav, realtime=True) if args.wav else None)
@@ -0,0 +1,106 @@
+"""
+Tests of the activity gate through GazeTracking, with a backend whose
+face comes and goes as the test says, on synthetic frames.
+
+    python -m pytest tests
+"""
+import numpy as np
+import cv2
+import pytest
+from benchmarks.synthetic import synthetic_face
+from gaze_tracking import ActivityGate, GazeTracking, Metrics
+from gaze_tracking.landmarks import LandmarkBackend
+
+FPS = 30.0
+
+
+class StubBackend(LandmarkBackend):
+    """Returns landmarks while present is set, and counts the searches"""
+
+    name = "stub"
+
+    def __init__(self, landmarks):
+        self.landmarks = landmarks
+        self.present = False
+        self.searches = 0
+
+    def process(self, frame, gray):
+        self.searches += 1
+        return self.landmarks if self.present else None
+
+
+def tracker(**gate):
+    frame, landmarks = synthetic_face(640, 480)
+    backend = StubBackend(landmarks)
+    metrics = Metrics(enabled=True)
+    gaze = GazeTracking(backend=backend, metrics=metrics, activity=ActivityGate(**gate))
+    return gaze, backend, metrics, frame
+
+
+def play(gaze, backend, frame, start, seconds):
+    """Refreshes the same frame at FPS and returns the times of the frames that were searched"""
+    searched = []
+    for i in range(int(seconds * FPS)):
+        timestamp = start + i / FPS
+        before = backend.searches
+        gaze.refresh(frame, timestamp)
+        if backend.searches > before:
+            searched.append(timestamp)
+    return searched
+
+
+def test_frames_are_skipped_while_idle_and_searched_every_interval():
+    gaze, backend, metrics, frame = tracker(idle_after=1.0, idle_interval=0.5, wake_on_motion=False)
+    searched = play(gaze, backend, frame, 0.0, 3.0)
+
+    # Every frame until the gate goes idle after a second without a face
+    assert [t for t in searched if t <= 1.0] == [i / FPS for i in range(int(FPS) + 1)]
+    # Then one frame every idle_interval
+    assert [t for t in searched if t > 1.0] == pytest.approx([1.5, 2.0, 2.5])
+    assert gaze.activity.idle
+
+
+def test_skipped_frames_are_only_counted_as_idle():
+    gaze, backend, metrics, frame = tracker(idle_after=1.0, idle_interval=0.5, wake_on_motion=False)
+    searched = play(gaze, backend, frame, 0.0, 3.0)
+
+    counters = metrics.snapshot()["counters"]
+    assert counters["frames_processed"] == len(searched)
+    assert counters["faces_lost"] == len(searched)
+    assert counters["frames_idle"] == int(3.0 * FPS) - len(searched)
+    # The last frame was skipped, its sample is empty
+    assert gaze.frame is frame and gaze.eye_left is None and not gaze.sample.pupils_located
+
+
+def test_motion_wakes_the_gate_on_the_frame_it_happens():
+    gaze, backend, metrics, frame = tracker(idle_after=1.0, idle_interval=10.0)
+    play(gaze, backend, frame, 0.0, 2.0)
+    assert gaze.activity.idle
+
+    # Still frames are skipped, a changed picture is searched at once
+    assert play(gaze, backend, frame, 2.0, 0.5) == []
+    backend.present = True
+    moved = np.roll(frame, 40, axis=1)
+    assert play(gaze, backend, moved, 2.5, 1 / FPS) == [2.5]
+    assert not gaze.activity.idle
+    assert gaze.activity.stats["wakes"] == 1
+    # Awake, every frame is searched again
+    assert len(play(gaze, backend, moved, 3.0, 0.5)) == int(0.5 * FPS)
+
+
+def test_still_eyes_keep_their_pupils():
+    gaze, backend, metrics, frame = tracker(idle_after=1.0)
+    backend.present = True
+    gaze.refresh(frame, 0.0)
+    left, right = gaze.eye_left, gaze.eye_right
+
+    gaze.refresh(frame.copy(), 1 / FPS)
+    assert gaze.eye_left is left and gaze.eye_right is right
+    assert metrics.snapshot()["counters"]["pupils_reused"] == 2
+
+    # The left eye moves, it is analyzed again, the right one is kept
+    x, y = backend.landmarks.eye(0).mean(axis=0).astype(int)
+    changed = frame.copy()
+    cv2.circle(changed, (int(x), int(y)), 6, (255, 255, 255), -1)
+    gaze.refresh(changed, 2 / FPS)
+    assert gaze.eye_left is not left and gaze.eye_right is right
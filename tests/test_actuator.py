@@ -0,0 +1,69 @@
+"""
+Tests of the Actuator with the recording backend, so no cursor event
+is posted.
+
+    python -m pytest tests
+"""
+import time
+from gaze_tracking import Actuator, RecordingBackend
+
+
+def moves(backend):
+    return [(t, args) for t, name, args in backend.events if name == "move"]
+
+
+def test_latest_move_wins():
+    backend = RecordingBackend()
+    actuator = Actuator(backend, hz=10)
+    for i in range(100):
+        actuator.move_to(i, i)
+    actuator.stop(timeout=None)
+
+    sent = moves(backend)
+    assert sent[-1][1] == (99, 99)
+    assert len(sent) <= 3
+    assert actuator.moves_sent == len(sent)
+    assert actuator.moves_coalesced == 100 - len(sent)
+
+
+def test_moves_are_rate_limited():
+    backend = RecordingBackend()
+    actuator = Actuator(backend, hz=20)
+    deadline = time.monotonic() + 0.5
+    i = 0
+    while time.monotonic() < deadline:
+        actuator.move_to(i, i)
+        i += 1
+        time.sleep(0.002)
+    actuator.stop(timeout=None)
+
+    times = [t for t, _ in moves(backend)]
+    assert 5 <= len(times) <= 0.5 * 20 + 2
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.045
+
+
+def test_clicks_are_kept_in_order_after_the_moves_before_them():
+    backend = RecordingBackend()
+    # A slow rate, the moves requested before a click still go first
+    actuator = Actuator(backend, hz=1)
+    actuator.move_to(1, 1)
+    actuator.click()
+    actuator.move_to(2, 2)
+    actuator.press()
+    actuator.move_to(3, 3)
+    actuator.release()
+    actuator.click(Actuator.RIGHT)
+    actuator.double_click()
+    actuator.stop(timeout=None)
+
+    buttons = [(name, args) for _, name, args in backend.events if name != "move"]
+    assert buttons == [("click", (0,)), ("press", (0,)), ("release", (0,)), ("click", (1,)), ("double_click", (0,))]
+
+    last_move = None
+    before = {}
+    for _, name, args in backend.events:
+        if name == "move":
+            last_move = args
+        else:
+            before.setdefault(name, last_move)
+    assert before == {"click": (1, 1), "press": (2, 2), "release": (3, 3), "double_click": (3, 3)}
@@ -0,0 +1,45 @@
+"""
+Tests of the calibration profiles, written to a temporary directory.
+
+    python -m pytest tests
+"""
+import pytest
+from benchmarks.synthetic import SyntheticBackend
+from gaze_tracking import CalibrationStore, GazeTracking
+from gaze_tracking.calibration import Calibration
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CalibrationStore(str(tmp_path))
+
+
+def complete_calibration():
+    calibration = Calibration()
+    calibration.thresholds_left = [40] * calibration.nb_frames
+    calibration.thresholds_right = [42] * calibration.nb_frames
+    return calibration
+
+
+def test_profile_is_read_back(store):
+    store.save(complete_calibration(), "ada", 0)
+    calibration = store.load("ada", 0)
+
+    assert calibration.is_complete()
+    assert calibration.thresholds_left == [40] * calibration.nb_frames
+    assert calibration.thresholds_right == [42] * calibration.nb_frames
+    assert store.load("ada", 1) is None
+
+
+@pytest.mark.parametrize("damage", ["truncated", "empty", "not a zip"])
+def test_damaged_profile_starts_a_new_calibration(store, damage):
+    path = store.save(complete_calibration(), "ada", 0)
+    with open(path, "rb") as profile:
+        data = profile.read()
+    damaged = {"truncated": data[:len(data) // 2], "empty": b"", "not a zip": b"PK\x03\x04" + b"\x00" * 64}[damage]
+    with open(path, "wb") as profile:
+        profile.write(damaged)
+
+    assert store.load("ada", 0) is None
+    gaze = GazeTracking(calibration_store=store, user="ada", camera=0, backend=SyntheticBackend(None))
+    assert not gaze.calibration.is_complete()
@@ -0,0 +1,96 @@
+"""
+Tests of CascadeFaceSearch with a scripted cascade that records how it
+is called and returns the boxes it is given, so no trained cascade is
+needed.
+
+    python -m pytest tests
+"""
+import numpy as np
+import pytest
+from gaze_tracking import CascadeFaceSearch
+
+
+class ScriptedCascade(object):
+    """Returns the next list of boxes of the script on each call, relative to the image it gets"""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = []
+
+    def detectMultiScale(self, image, scale_factor, min_neighbors, minSize=None, maxSize=None):
+        self.calls.append((image.shape, minSize, maxSize))
+        return np.array(self.script.pop(0), np.int32).reshape(-1, 4)
+
+
+def frame(width=320, height=240):
+    return np.zeros((height, width), np.uint8)
+
+
+def test_first_search_scans_the_whole_frame_and_keeps_the_central_face():
+    cascade = ScriptedCascade([(0, 0, 40, 40), (140, 100, 50, 50)])
+    search = CascadeFaceSearch(cascade)
+
+    assert search.find(frame()) == (140, 100, 50, 50)
+    assert cascade.calls == [((240, 320), None, None)]
+
+
+def test_next_search_covers_a_window_for_faces_of_about_the_same_size():
+    # The window box (10, 12) is (80, 62) in the frame
+    cascade = ScriptedCascade([(100, 80, 60, 60)], [(10, 12, 58, 58)])
+    search = CascadeFaceSearch(cascade, padding=0.5, size_range=(0.7, 1.4))
+    search.find(frame())
+
+    assert search.find(frame()) == (80, 62, 58, 58)
+    # Padding of 30 pixels around the box: columns 70 to 190, rows 50 to 170
+    assert cascade.calls[1] == ((120, 120), (42, 42), (84, 84))
+
+
+def test_window_is_clipped_to_the_frame():
+    cascade = ScriptedCascade([(10, 20, 60, 60)], [(0, 0, 60, 60)])
+    search = CascadeFaceSearch(cascade, padding=0.5, size_range=(0.7, 2.0))
+    search.find(frame())
+    search.find(frame())
+
+    # Columns 0 to 100, rows 0 to 110, the largest face fits the window
+    assert cascade.calls[1] == ((110, 100), (42, 42), (100, 100))
+
+
+def test_lost_face_is_searched_once_on_the_whole_frame():
+    cascade = ScriptedCascade([(100, 80, 60, 60)], [], [(20, 30, 60, 60)], [(5, 5, 60, 60)], [], [], [])
+    search = CascadeFaceSearch(cascade)
+
+    search.find(frame())
+    # Lost in the window, found again by one whole frame scan on the same frame
+    assert search.find(frame()) == (20, 30, 60, 60)
+    assert search.stats == {"full_scans": 2, "window_scans": 1, "lost": 1}
+    # Back to the window around the new box
+    search.find(frame())
+    assert search.stats == {"full_scans": 2, "window_scans": 2, "lost": 1}
+
+    # Lost again and not found: one scan per frame, no window without a box
+    assert search.find(frame()) is None
+    assert search.find(frame()) is None
+    assert search.stats == {"full_scans": 4, "window_scans": 3, "lost": 2}
+    assert not cascade.script
+
+
+def test_reset_scans_the_whole_frame():
+    cascade = ScriptedCascade([(100, 80, 60, 60)], [(100, 80, 60, 60)])
+    search = CascadeFaceSearch(cascade)
+    search.find(frame())
+    search.reset()
+    search.find(frame())
+
+    assert [shape for shape, _, _ in cascade.calls] == [(240, 320), (240, 320)]
+
+
+def test_box_is_mapped_back_to_full_resolution():
+    assert CascadeFaceSearch.corners((45, 30, 90, 90), 450 / 1920.0) == (192, 128, 576, 512)
+    assert CascadeFaceSearch.corners((45, 30, 90, 90)) == (45, 30, 135, 120)
+
+
+def test_rectangle_is_a_dlib_rectangle_at_full_resolution():
+    dlib = pytest.importorskip("dlib")
+    rect = CascadeFaceSearch.rectangle((45, 30, 90, 90), 0.5)
+    assert isinstance(rect, dlib.rectangle)
+    assert (rect.left(), rect.top(), rect.right(), rect.bottom()) == (90, 60, 270, 240)
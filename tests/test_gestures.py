@@ -0,0 +1,89 @@
+"""
+Table-driven tests of BlinkGestures. Each case is a list of frames,
+(timestamp, left closed, right closed), None for a lost face, and the
+(timestamp, action, button, gesture) events they must trigger.
+
+    python -m pytest tests
+"""
+import pytest
+from gaze_tracking.gestures import BlinkGestures
+
+LEFT, RIGHT, BOTH = BlinkGestures.LEFT, BlinkGestures.RIGHT, BlinkGestures.BOTH
+CLICK, DOUBLE_CLICK = BlinkGestures.CLICK, BlinkGestures.DOUBLE_CLICK
+PRESS, RELEASE = BlinkGestures.PRESS, BlinkGestures.RELEASE
+LOST = None
+
+CASES = {
+    "closure shorter than the debounce": (
+        [(0.0, True, True), (0.05, True, True), (0.08, False, False)],
+        [],
+    ),
+    "blink clicks when the eyes open": (
+        [(0.0, True, True), (0.1, True, True), (0.15, False, False)],
+        [(0.15, CLICK, 0, BOTH)],
+    ),
+    "right wink clicks the right button": (
+        [(0.0, False, True), (0.2, False, True), (0.25, False, False)],
+        [(0.25, CLICK, 1, RIGHT)],
+    ),
+    "one eye then the other is both": (
+        [(0.0, True, False), (0.05, False, True), (0.2, False, False)],
+        [(0.2, CLICK, 0, BOTH)],
+    ),
+    "closure in the refractory window is ignored until the eyes open": (
+        [(0.0, True, True), (0.15, False, False),
+         # Closed again before 0.65, still closed after it: the latch keeps it ignored
+         (0.3, True, True), (0.8, True, True), (0.9, False, False),
+         (1.0, True, True), (1.2, True, True), (1.3, False, False)],
+        [(0.15, CLICK, 0, BOTH), (1.3, CLICK, 0, BOTH)],
+    ),
+    "long closure presses, opening the eyes releases": (
+        [(0.0, True, True), (0.5, True, True), (1.0, True, True), (1.5, True, True), (1.6, False, False)],
+        [(1.0, PRESS, 0, BOTH), (1.6, RELEASE, 0, BOTH)],
+    ),
+    "lost face releases a press": (
+        [(0.0, False, True), (1.0, False, True), (1.2, LOST, LOST)],
+        [(1.0, PRESS, 1, RIGHT), (1.2, RELEASE, 1, RIGHT)],
+    ),
+    "lost face drops a closure without a click": (
+        [(0.0, True, True), (0.2, True, True), (0.3, LOST, LOST), (0.4, False, False)],
+        [],
+    ),
+}
+
+
+@pytest.mark.parametrize("frames, expected", list(CASES.values()), ids=list(CASES))
+def test_events(frames, expected):
+    gestures = BlinkGestures(debounce=0.1, refractory=0.5, long_press=1.0)
+    events = []
+    for timestamp, left, right in frames:
+        events += gestures.update(left, right, timestamp)
+
+    assert [tuple(event) for event in events] == expected
+    assert gestures.events_emitted == len(expected)
+
+
+def test_bindings_choose_the_action_and_skip_unbound_gestures():
+    gestures = BlinkGestures(bindings={BOTH: (DOUBLE_CLICK, 0)}, long_press=None)
+    frames = [(0.0, True, False), (0.2, True, False), (0.3, False, False),
+              (1.0, True, True), (3.0, True, True), (3.1, False, False)]
+    events = [event for timestamp, left, right in frames for event in gestures.update(left, right, timestamp)]
+
+    # No long press, a long closure still only clicks
+    assert [tuple(event) for event in events] == [(3.1, DOUBLE_CLICK, 0, BOTH)]
+
+
+def test_events_are_sent_to_the_actuator():
+    class Actuator(object):
+        def __init__(self):
+            self.calls = []
+
+        def __getattr__(self, action):
+            return lambda button: self.calls.append((action, button))
+
+    actuator = Actuator()
+    gestures = BlinkGestures(actuator=actuator)
+    for timestamp, closed in [(0.0, True), (1.0, True), (1.1, False)]:
+        gestures.update(closed, closed, timestamp)
+
+    assert actuator.calls == [(PRESS, 0), (RELEASE, 0)]
@@ -0,0 +1,49 @@
+"""
+Tests of the model registry and the warm-up, with emulated loaders, so
+they need neither dlib nor the model file.
+
+    python -m pytest tests
+"""
+import threading
+import pytest
+from gaze_tracking import models
+
+
+def test_registry_loads_each_model_once_across_threads():
+    registry = models.ModelRegistry()
+    loads = []
+
+    def load():
+        loads.append(1)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("model", load))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
+    assert registry.loaded("model")
+
+
+def test_registry_raises_a_failed_load_again_without_retrying():
+    registry = models.ModelRegistry()
+    loads = []
+
+    def load():
+        loads.append(1)
+        raise RuntimeError("damaged model")
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match="damaged model"):
+            registry.get("model", load)
+    assert len(loads) == 1
+    assert not registry.loaded("model")
+
+
+def test_warm_up_reports_a_missing_model_on_the_calling_thread(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        models.warm_up(str(tmp_path / "missing.dat"), background=True)
@@ -0,0 +1,39 @@
+"""
+Tests of the threaded Pipeline on a short sequence of synthetic images.
+
+    python -m pytest tests
+"""
+import os
+import cv2
+import numpy as np
+import pytest
+from gaze_tracking import ImageSequenceSource, Pipeline
+
+
+@pytest.fixture
+def frames(tmp_path):
+    for i in range(10):
+        cv2.imwrite(os.path.join(str(tmp_path), "{:03d}.png".format(i)), np.full((48, 64, 3), i, np.uint8))
+    return str(tmp_path)
+
+
+def test_every_frame_goes_through_every_stage(frames):
+    seen = []
+    pipeline = Pipeline(ImageSequenceSource(frames), policy="block")
+    pipeline.add_stage("first", lambda packet: None)
+    pipeline.add_stage("last", lambda packet: seen.append(int(packet.frame[0, 0, 0])))
+    pipeline.run()
+
+    assert seen == list(range(10))
+
+
+def test_error_of_a_threaded_stage_is_raised_by_run(frames):
+    def landmarks(packet):
+        raise FileNotFoundError("no model")
+
+    pipeline = Pipeline(ImageSequenceSource(frames), policy="block")
+    pipeline.add_stage("landmarks", landmarks)
+    pipeline.add_stage("last", lambda packet: None)
+    with pytest.raises(FileNotFoundError, match="no model"):
+        pipeline.run()
+    assert pipeline.stop_event.is_set()
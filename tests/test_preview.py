@@ -0,0 +1,31 @@
+"""
+Tests of run_with_preview with a preview that only waits for the stop,
+so they need no window.
+
+    python -m pytest tests
+"""
+import pytest
+from gaze_tracking.preview import ControlChannel, run_with_preview
+
+
+class WaitingPreview(object):
+    """Stands for HeadlessPreview without its signal handlers"""
+
+    def run(self, control):
+        control.wait(5)
+
+
+def test_run_ends_when_the_loop_returns():
+    control = ControlChannel()
+    run_with_preview(lambda: None, WaitingPreview(), control)
+    assert control.reason == "done"
+
+
+def test_error_of_the_loop_is_raised_to_the_caller():
+    def loop():
+        raise FileNotFoundError("no model")
+
+    control = ControlChannel()
+    with pytest.raises(FileNotFoundError, match="no model"):
+        run_with_preview(loop, WaitingPreview(), control)
+    assert control.stopped
@@ -0,0 +1,35 @@
+"""
+Tests of the streaming segmenter on a synthetic recording, so they need
+no microphone.
+
+    python -m pytest tests
+"""
+from benchmarks.dictation import synthetic_recording
+from speech_audio import VadSegmenter, WavFileSource
+
+
+def test_segmenter_finds_every_phrase(tmp_path):
+    path = str(tmp_path / "dictation.wav")
+    truth = synthetic_recording(path, phrases=4)
+
+    segments = list(VadSegmenter().segments(WavFileSource(path)))
+    finals = [segment for segment in segments if segment.final]
+
+    assert len(finals) == len(truth)
+    for segment, (start, end) in zip(finals, truth):
+        # The pre-roll keeps the onset of the first word
+        assert segment.start <= start
+        assert segment.end >= end - 0.1
+
+
+def test_segmenter_sends_partials_before_the_final_segment(tmp_path):
+    path = str(tmp_path / "dictation.wav")
+    truth = synthetic_recording(path, phrases=4)
+
+    segments = list(VadSegmenter(partial_interval=0.3).segments(WavFileSource(path)))
+
+    for phrase in range(len(truth)):
+        finals = [i for i, segment in enumerate(segments) if segment.phrase == phrase and segment.final]
+        partials = [i for i, segment in enumerate(segments) if segment.phrase == phrase and not segment.final]
+        assert len(finals) == 1
+        assert partials and max(partials) < finals[0]
@@ -0,0 +1,29 @@
+"""
+Tests of the speech processor with the stub recognizer, so they need no
+microphone, network or speech_recognition.
+
+    python -m pytest tests
+"""
+from speech_text import SpeechProcessor, StubRecognizer, make_recognizer
+
+
+def test_processor_delivers_in_order_and_stops_on_the_end_command():
+    texts = []
+    # The long first phrase is recognized last, it must still be delivered first
+    processor = SpeechProcessor(StubRecognizer(seconds_per_char=0.005), workers=3, on_text=texts.append,
+                                on_partial=None)
+    processor.start(listen=False)
+    for phrase in ["a much longer first phrase", "two", "end", "end", "three", "end", "end", "end", "dropped"]:
+        processor.submit(phrase)
+    processor.join(5)
+
+    assert not any(thread.is_alive() for thread in processor.threads)
+    assert processor.stop_event.is_set()
+    assert texts == ["a much longer first phrase", "two", "end", "end", "three", "end", "end"]
+
+
+def test_stub_recognizer_reads_strings_and_transcripts():
+    recognizer = make_recognizer("stub", transcripts={b"audio": "hello"})
+    assert recognizer.recognize("phrase") == "phrase"
+    assert recognizer.recognize(b"audio") == "hello"
+    assert recognizer.recognize(b"other") is None
@@ -0,0 +1,30 @@
+"""
+Tests of the queued text output with the recording backend, so no key
+is typed.
+
+    python -m pytest tests
+"""
+import pytest
+from text_output import RecordingBackend, TextOutput, make_text_backend
+
+
+def test_output_types_in_order_and_coalesces():
+    backend = RecordingBackend(seconds_per_call=0.05)
+    output = TextOutput(backend)
+    # The first phrase is being typed while the others are written
+    for phrase in ["one", "two", "three", "four"]:
+        output.write(phrase)
+
+    assert output.flush(5)
+    output.stop()
+
+    assert backend.text == "one two three four "
+    assert output.phrases_typed == 4
+    assert output.calls < 4
+    assert output.phrases_coalesced == 4 - output.calls
+
+
+def test_text_backends_are_made_by_name():
+    assert isinstance(make_text_backend("recording"), RecordingBackend)
+    with pytest.raises(ValueError):
+        make_text_backend("telepathy")
@@ -0,0 +1,280 @@
+import collections
+import os
+import subprocess
+import threading
+import time
+
+
+class TextBackend(object):
+    """
+    Base class of the text backends, the objects that actually inject
+    text where the keyboard focus is.
+    """
+
+    name = None
+
+    def type(self, text):
+        raise NotImplementedError
+
+
+class KeyPressBackend(TextBackend):
+    """
+    Types the text one key event per character with pyautogui, the former
+    behavior. Slow on long phrases, and characters without a key on the
+    keyboard layout are skipped, but it works in every application.
+    """
+
+    name = "keys"
+
+    def __init__(self, interval=0.0):
+        """
+        Argument:
+            interval (float): Seconds between two characters
+        """
+        import pyautogui
+
+        pyautogui.PAUSE = 0
+        self._pyautogui = pyautogui
+        self.interval = interval
+
+    def type(self, text):
+        self._pyautogui.write(text, interval=self.interval)
+
+
+class QuartzUnicodeBackend(TextBackend):
+    """
+    Posts the text as Unicode string keyboard events, up to 20 UTF-16
+    characters per event, the most macOS takes. Any character can be
+    typed, whatever the keyboard layout. macOS only.
+    """
+
+    name = "unicode"
+
+    # Longest string macOS reads from one keyboard event, in UTF-16 units
+    CHUNK = 20
+
+    def __init__(self, interval=0.0):
+        """
+        Argument:
+            interval (float): Seconds between two events, for applications that drop
+                              events posted too quickly
+        """
+        import Quartz
+        self._quartz = Quartz
+        self.interval = interval
+
+    @classmethod
+    def chunks(cls, text):
+        """Splits the text in strings of at most CHUNK UTF-16 units, without
+        cutting a character in two"""
+        chunk = []
+        units = 0
+        for character in text:
+            size = 2 if ord(character) > 0xFFFF else 1
+            if units + size > cls.CHUNK:
+                yield "".join(chunk), units
+                chunk = []
+                units = 0
+            chunk.append(character)
+            units += size
+        if chunk:
+            yield "".join(chunk), units
+
+    def type(self, text):
+        Quartz = self._quartz
+        for chunk, units in self.chunks(text):
+            for key_down in (True, False):
+                event = Quartz.CGEventCreateKeyboardEvent(None, 0, key_down)
+                Quartz.CGEventKeyboardSetUnicodeString(event, units, chunk)
+                Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
+            if self.interval:
+                time.sleep(self.interval)
+
+
+class ClipboardPasteBackend(TextBackend):
+    """
+    Copies the text to the clipboard and pastes it with Cmd+V, one event
+    for the whole text. The previous text of the clipboard is put back
+    after restore_delay, other kinds of clipboard content are lost.
+    macOS only.
+    """
+
+    name = "paste"
+
+    # Virtual key code of V on macOS
+    KEY_V = 9
+
+    def __init__(self, restore=True, restore_delay=0.2):
+        """
+        Arguments:
+            restore (bool): Put the previous text of the clipboard back
+            restore_delay (float): Seconds given to the application to read the
+                                   clipboard before it is restored
+        """
+        import Quartz
+        self._quartz = Quartz
+        self.restore = restore
+        self.restore_delay = restore_delay
+        self._env = dict(os.environ, LANG="en_US.UTF-8")
+
+    def _paste(self):
+        Quartz = self._quartz
+        for key_down in (True, False):
+            event = Quartz.CGEventCreateKeyboardEvent(None, self.KEY_V, key_down)
+            Quartz.CGEventSetFlags(event, Quartz.kCGEventFlagMaskCommand)
+            Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
+
+    def type(self, text):
+        previous = None
+        if self.restore:
+            previous = subprocess.run(["pbpaste"], capture_output=True, env=self._env).stdout
+
+        subprocess.run(["pbcopy"], input=text.encode("utf-8"), env=self._env, check=True)
+        self._paste()
+
+        if previous is not None:
+            time.sleep(self.restore_delay)
+            subprocess.run(["pbcopy"], input=previous, env=self._env, check=True)
+
+
+class RecordingBackend(TextBackend):
+    """
+    Records the text it receives instead of typing it, as (monotonic time,
+    text) pairs, and can take time like a real backend: seconds_per_call
+    for each call and seconds_per_char for each character. A null backend
+    for tests, headless runs and benchmarks.
+    """
+
+    name = "recording"
+
+    def __init__(self, seconds_per_call=0.0, seconds_per_char=0.0):
+        self.seconds_per_call = seconds_per_call
+        self.seconds_per_char = seconds_per_char
+        self.calls = []
+
+    def type(self, text):
+        cost = self.seconds_per_call + self.seconds_per_char * len(text)
+        if cost:
+            time.sleep(cost)
+        self.calls.append((time.monotonic(), text))
+
+    @property
+    def text(self):
+        """Everything typed so far"""
+        return "".join(text for _, text in self.calls)
+
+    def chars_per_second(self, since):
+        """Characters typed per second from since to the last call
+
+        Argument:
+            since (float): Monotonic time the first text was written
+        """
+        if not self.calls or self.calls[-1][0] <= since:
+            return 0.0
+        return len(self.text) / (self.calls[-1][0] - since)
+
+
+TEXT_BACKENDS = {
+    "keys": KeyPressBackend,
+    "unicode": QuartzUnicodeBackend,
+    "paste": ClipboardPasteBackend,
+    "recording": RecordingBackend,
+}
+
+
+def make_text_backend(name, **kwargs):
+    """Returns a new text backend from its name in TEXT_BACKENDS
+
+    Arguments:
+        name (str): "keys", "unicode", "paste" or "recording"
+        kwargs: Parameters of the backend
+    """
+    if name not in TEXT_BACKENDS:
+        raise ValueError("Unknown text backend: {}".format(name))
+    return TEXT_BACKENDS[name](**kwargs)
+
+
+class TextOutput(object):
+    """
+    This class types text from its own thread, so the speech processor
+    never waits on key events. Phrases written while one is being typed
+    are coalesced and typed in a single call, in the order they were
+    written, each followed by the separator.
+    """
+
+    def __init__(self, backend=None, separator=" "):
+        """
+        Arguments:
+            backend (TextBackend): Types the text, KeyPressBackend by default
+            separator (str): Added after each phrase
+        """
+        self.backend = backend if backend is not None else KeyPressBackend()
+        self.separator = separator
+
+        self.phrases_written = 0
+        self.phrases_typed = 0
+        self.calls = 0
+        self.chars_typed = 0
+
+        self._pending = collections.deque()
+        self._typing = False
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="text-output", daemon=True)
+        self._thread.start()
+
+    def write(self, text):
+        """Queues a phrase to type, returns at once"""
+        with self._condition:
+            self._pending.append(text)
+            self.phrases_written += 1
+            self._condition.notify_all()
+
+    def _next_text(self):
+        """Waits for phrases and returns (their joined text, their number), None once stopped"""
+        with self._condition:
+            self._typing = False
+            self._condition.notify_all()
+            while not self._pending:
+                if self._stopped:
+                    return None
+                self._condition.wait()
+
+            text = "".join(phrase + self.separator for phrase in self._pending)
+            count = len(self._pending)
+            self._pending.clear()
+            self._typing = True
+            return text, count
+
+    def _run(self):
+        while True:
+            batch = self._next_text()
+            if batch is None:
+                return
+
+            text, count = batch
+            try:
+                self.backend.type(text)
+            except Exception as e:
+                # The text is lost, the next phrases are still typed
+                print(f"Could not type the text: {e}")
+            self.calls += 1
+            self.phrases_typed += count
+            self.chars_typed += len(text)
+
+    def flush(self, timeout=None):
+        """Waits until every phrase written so far is typed, returns False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._typing, timeout)
+
+    def stop(self, timeout=1.0):
+        """Types what is still pending and stops the thread"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    @property
+    def phrases_coalesced(self):
+        """Number of phrases typed in the same call as an earlier one"""
+        return self.phrases_typed - self.calls